@@ -35,8 +35,19 @@ def mapper(genome, tree):
             # Can generate tree information faster using
             # algorithm.mapper.map_ind_from_genome() if we don't need to
             # store the whole tree.
+            if params['TABLE_MAPPER']:
+                phenotype, genome, tree, nodes, invalid, depth, \
+                    used_codons = get_table_mapper().map(genome)
+
+            else:
+                phenotype, genome, tree, nodes, invalid, depth, \
+                    used_codons = map_ind_from_genome(genome)
+
+        elif params['LAZY_TREES']:
+            # Map the genome like algorithm.mapper.map_tree_from_genome()
+            # without building the tree, which is built on first use.
             phenotype, genome, tree, nodes, invalid, depth, \
-                used_codons = map_ind_from_genome(genome)
+                used_codons = map_tree_info_from_genome(genome)
 
         else:
             # Build the tree using algorithm.mapper.map_tree_from_genome().
@@ -175,6 +186,156 @@ def map_ind_from_genome(genome):
     return output, genome, None, nodes, False, max_depth, used_input
 
 
+class TableMapper:
+    """
+    Genotype to phenotype mapper over a grammar compiled into integer-indexed
+    tables. Non-terminals are numbered from 0, terminals are numbered from
+    -1 downwards (~index into the list of terminal strings). Gives results
+    identical to map_ind_from_genome().
+    """
+
+    def __init__(self, bnf_grammar):
+        """
+        Compiles the production rules of a grammar.
+
+        :param bnf_grammar: An instance of the representation.grammar.Grammar
+        class.
+        """
+
+        self.non_terminals = list(bnf_grammar.rules)
+        self.non_terminal_ids = {nt: i for i, nt in
+                                 enumerate(self.non_terminals)}
+        self.terminals, self.terminal_ids = [], {}
+
+        # For each non-terminal a tuple of productions. A production is a
+        # tuple (symbols in reverse order, number of non-terminals).
+        self.productions = [None] * len(self.non_terminals)
+        for nt, rule in bnf_grammar.rules.items():
+            productions = []
+            for choice in rule["choices"]:
+                symbols = [self.symbol_id(s["symbol"], s["type"] == "NT")
+                           for s in choice["choice"]]
+                productions.append((tuple(reversed(symbols)),
+                                    sum(s >= 0 for s in symbols)))
+            assert len(productions) == rule["no_choices"]
+            self.productions[self.non_terminal_ids[nt]] = tuple(productions)
+
+        self.start = self.symbol_id(bnf_grammar.start_rule["symbol"], True)
+
+    def symbol_id(self, symbol, non_terminal):
+        """
+        Returns the id of a symbol, numbers new terminals.
+
+        :param symbol: The string of the symbol.
+        :param non_terminal: Whether the symbol is a non-terminal.
+        :return: The id of the symbol.
+        """
+
+        if non_terminal:
+            return self.non_terminal_ids[symbol]
+
+        if symbol not in self.terminal_ids:
+            self.terminal_ids[symbol] = ~len(self.terminals)
+            self.terminals.append(symbol)
+        return self.terminal_ids[symbol]
+
+    def symbol(self, symbol_id):
+        """
+        Returns the string of a symbol.
+
+        :param symbol_id: The id of the symbol.
+        :return: The string of the symbol.
+        """
+
+        if symbol_id < 0:
+            return self.terminals[~symbol_id]
+        return self.non_terminals[symbol_id]
+
+    def map(self, genome):
+        """
+        Maps a genome like map_ind_from_genome().
+
+        :param genome: A genome to be mapped.
+        :return: The same as map_ind_from_genome().
+        """
+
+        return self.map_population([genome])[0]
+
+    def map_population(self, genomes):
+        """
+        Maps a batch of genomes.
+
+        :param genomes: A list of genomes to be mapped.
+        :return: A list of results of map_ind_from_genome() for the genomes.
+        """
+
+        max_tree_depth, max_wraps = params['MAX_TREE_DEPTH'], params['MAX_WRAPS']
+        productions, terminals, start = self.productions, self.terminals, \
+            self.start
+        results = []
+
+        for genome in genomes:
+            n_input = len(genome)
+            used_input, max_depth, nodes, wraps = 0, 1, 1, -1
+            output = []
+
+            # Flat stack of unexpanded symbols and their depths, the next
+            # symbol to expand is on top. nts counts non-terminals in it.
+            symbols, depths = [start], [1]
+            nts = 1 if start >= 0 else 0
+
+            while wraps < max_wraps and symbols:
+                if max_tree_depth and max_depth > max_tree_depth:
+                    break
+
+                if used_input % n_input == 0 and used_input > 0 and nts > 0:
+                    wraps += 1
+
+                symbol, depth = symbols.pop(), depths.pop()
+
+                if max_depth < depth:
+                    max_depth = depth
+
+                if symbol < 0:
+                    output.append(terminals[~symbol])
+
+                else:
+                    choices = productions[symbol]
+                    children, nt_count = \
+                        choices[genome[used_input % n_input] % len(choices)]
+                    used_input += 1
+
+                    symbols.extend(children)
+                    depths.extend([depth + 1] * len(children))
+                    nts += nt_count - 1
+                    nodes += nt_count if nt_count > 0 else 1
+
+            if symbols:
+                # All non-terminals have not been completely expanded,
+                # invalid solution.
+                results.append((None, genome, None, nodes, True, max_depth,
+                                used_input))
+
+            else:
+                results.append(("".join(output), genome, None, nodes, False,
+                                max_depth, used_input))
+
+        return results
+
+
+def get_table_mapper():
+    """
+    Returns the TableMapper of the grammar, compiles it on first use.
+
+    :return: The TableMapper of params['BNF_GRAMMAR'].
+    """
+
+    bnf_grammar = params['BNF_GRAMMAR']
+    if bnf_grammar.table_mapper is None:
+        bnf_grammar.table_mapper = TableMapper(bnf_grammar)
+    return bnf_grammar.table_mapper
+
+
 def map_tree_from_genome(genome):
     """
     Maps a full tree from a given genome.
@@ -307,3 +468,86 @@ def genome_tree_map(tree, genome, output, index, depth, max_depth, nodes,
             invalid = True
 
     return output, index, nodes, depth, max_depth, invalid
+
+
+def map_tree_info_from_genome(genome):
+    """
+    Maps a genome like map_tree_from_genome() without building the tree.
+
+    :param genome: A genome to be mapped.
+    :return: All components necessary for a fully mapped individual, the
+    tree is None.
+    """
+
+    output, used_codons, nodes, depth, max_depth, invalid = \
+        genome_tree_info(params['BNF_GRAMMAR'].start_rule["symbol"], genome,
+                         [], 0, 0, 0, 0)
+
+    if invalid:
+        # Return "None" phenotype if invalid
+        return None, genome, None, nodes, invalid, max_depth, used_codons
+
+    else:
+        return "".join(output), genome, None, nodes, invalid, max_depth, \
+            used_codons
+
+
+def genome_tree_info(root, genome, output, index, depth, max_depth, nodes,
+                     invalid=False):
+    """
+    Recursive function which follows genome_tree_map() for the root
+    non-terminal of a subtree without building the subtree.
+
+    :param root: The non-terminal at the root of the subtree.
+    :return: The same as genome_tree_map().
+    """
+
+    bnf_grammar = params['BNF_GRAMMAR']
+
+    if not invalid and index < len(genome) * (params['MAX_WRAPS'] + 1):
+        if params['MAX_TREE_DEPTH'] and (max_depth > params['MAX_TREE_DEPTH']):
+            # We have breached our maximum tree depth limit.
+            invalid = True
+
+        # Increment and set number of nodes and current depth.
+        nodes += 1
+        depth += 1
+
+        # Select the production from the current codon.
+        productions = bnf_grammar.rules[root]['choices']
+        chosen_prod = productions[genome[index % len(genome)] %
+                                  bnf_grammar.rules[root]['no_choices']]
+        index += 1
+
+        for symbol in chosen_prod['choice']:
+            if symbol["type"] == "T":
+                output.append(symbol["symbol"])
+
+            elif symbol["type"] == "NT":
+                output, index, nodes, d, max_depth, invalid = \
+                    genome_tree_info(symbol["symbol"], genome, output, index,
+                                     depth, max_depth, nodes, invalid=invalid)
+
+    else:
+        # Mapping incomplete, solution is invalid.
+        return output, index, nodes, depth, max_depth, True
+
+    if not any(symbol["symbol"] in bnf_grammar.non_terminals for symbol in
+               chosen_prod['choice']):
+        # There are no non-terminals in the chosen production choice, the
+        # branch terminates here.
+        depth += 1
+        nodes += 1
+
+    if not invalid:
+        # The solution is valid thus far.
+
+        if depth > max_depth:
+            # Set the new maximum depth.
+            max_depth = depth
+
+        if params['MAX_TREE_DEPTH'] and (max_depth > params['MAX_TREE_DEPTH']):
+            # If our maximum depth exceeds the limit, the solution is invalid.
+            invalid = True
+
+    return output, index, nodes, depth, max_depth, invalid
@@ -40,6 +40,11 @@ params = {
         # Mainly for use with the grammar analyser script.
         'PERMUTATION_RAMPS': 5,
 
+        # Set the directory of analysed grammars, which are loaded instead
+        # of parsing and analysing the grammar file again (None disables
+        # the cache).
+        'GRAMMAR_CACHE_DIR': path.join("..", "grammars", ".cache"),
+
         # Select error metric
         'ERROR_METRIC': None,
 
@@ -56,6 +61,19 @@ params = {
         'CODON_SIZE': 100000,
         'MAX_GENOME_LENGTH': None,
         'MAX_WRAPS': 0,
+        # Store derivation trees of individuals as arrays
+        # (representation.flat_tree.FlatTree).
+        'FLAT_TREES': False,
+        # Share unchanged subtrees between derivation trees of individuals
+        # instead of copying trees, subtree operators copy only the path to
+        # the changed node.
+        'PERSISTENT_TREES': False,
+        # Build derivation trees of individuals mapped from genomes when a
+        # tree-based operator uses them first.
+        'LAZY_TREES': True,
+        # Map genomes with production tables compiled from the grammar
+        # (algorithm.mapper.TableMapper) if the tree is not needed.
+        'TABLE_MAPPER': True,
 
         # INITIALISATION
         # Set initialisation operator.
@@ -81,6 +99,9 @@ params = {
         # Boolean flag for selecting whether or not mutation is confined to
         # within the used portion of the genome. Default set to True.
         'WITHIN_USED': True,
+        # Perform linear crossover and mutation on arrays of all genomes of
+        # a population.
+        'VECTORIZED_GENOME_OPERATORS': False,
 
         # CROSSOVER
         # Set crossover operator.
@@ -126,12 +147,28 @@ params = {
         # Save a plot of the evolution of the best fitness result for each
         # generation.
         'SAVE_PLOTS': True,
+        # Format of the stats file, "tsv" (stats.tsv) or "parquet"
+        # (stats.parquet, requires pyarrow).
+        'STATS_FORMAT': "tsv",
+        # Stats and best individuals are buffered and written to files at
+        # least every STATS_FLUSH_INTERVAL seconds, or once STATS_FLUSH_ROWS
+        # rows and files are buffered.
+        'STATS_FLUSH_INTERVAL': 30,
+        'STATS_FLUSH_ROWS': 100,
 
         # MULTIPROCESSING
         # Multi-core parallel processing of phenotype evaluations.
         'MULTICORE': False,
         # Set the number of cpus to be used for multiprocessing
         'CORES': cpu_count(),
+        # Send only phenotypes to the workers and collect fitnesses in order
+        # of completion, if the fitness function evaluates phenotypes only
+        # (base_ff.phenotype_only). Otherwise, whole individuals are sent and
+        # collected in order of submission.
+        'ASYNC_EVALUATION': True,
+        # Number of phenotypes sent to a worker at once by asynchronous
+        # evaluation. Chosen from the number of phenotypes and CORES if None.
+        'EVALUATION_CHUNKSIZE': None,
 
         # STATE SAVING/LOADING
         # Save the state of the evolutionary run every generation. You can
@@ -5,6 +5,7 @@ import sys
 from tempfile import mkstemp
 from traceback import format_tb
 import inspect
+from collections import OrderedDict
 
 import pandas as pd
 import numpy as np
@@ -14,7 +15,8 @@ from algorithm.parameters import params
 from fitness.base_ff_classes.base_ff import base_ff
 from representation.individual import Individual
 from stats.stats import stats as statistics
-from utilities.ZIMPLpy.interpreter import Interpreter
+from utilities.ZIMPLpy.compile_server import CompileServer
+from utilities.ZIMPLpy.interpreter import ConstraintCache, Interpreter
 from utilities.stats import file_io, trackers
 import pyximport
 
@@ -29,7 +31,11 @@ import fitness.helper as helper
 class ZIMPL(base_ff):
     debug = params["DEBUG"]
     maximise = True
+    phenotype_only = True
+    counters = ("semantic_cache_lookups", "semantic_cache_hits", "constraint_cache_hits", "constraint_cache_misses",
+                "precision_samples_reused", "precision_samples_drawn")
     database: Database = None
+    shard_filename: str = None
     experiment: Experiment = None
     prev_get_soo_stats = None
 
@@ -60,6 +66,15 @@ class ZIMPL(base_ff):
 
         self.default_fitness = 0.0
         self.tmp_file_handle, self.tmp_filename = mkstemp(".zpl")
+        # warm ZIMPL workers translate programs without launching ZIMPL from this process for each individual
+        self.compile_server = None
+        if params.get("COMPILE_SERVER", True):
+            if CompileServer.supported(Interpreter.zimpl_path):
+                self.compile_server = CompileServer(Interpreter.zimpl_path, cast_int(params.get("COMPILE_WORKERS", 1)))
+            else:
+                # ZIMPL built before server mode was added, translate each program by launching ZIMPL
+                print("ZIMPL at %s does not support server mode (-S), rebuild it from src/utilities/ZIMPL to enable "
+                      "COMPILE_SERVER." % Interpreter.zimpl_path, file=sys.stderr)
 
         statistics["GROUND_TRUTH_TRAINING_FITNESS"] = self.training_set.fitness(self.ground_truth_interpreter, self.ground_truth_phenotype)
         statistics["GROUND_TRUTH_TEST_FITNESS"] = self.test_set.fitness(self.ground_truth_interpreter, self.ground_truth_phenotype)
@@ -88,11 +103,13 @@ class ZIMPL(base_ff):
         program = self.format_program(ind.phenotype)
 
         try:
-            os.write(self.tmp_file_handle, program.encode("utf-8"))
-            # os.fsync(self.tmp_file_handle) # no buffering
+            if self.compile_server is None:
+                os.write(self.tmp_file_handle, program.encode("utf-8"))
+                # os.fsync(self.tmp_file_handle) # no buffering
 
-            with Interpreter(self.tmp_filename, not ZIMPL.debug) as interpreter:
-                return data.fitness(interpreter, program)
+            with Interpreter(self.tmp_filename, not ZIMPL.debug, program, self.compile_server) as interpreter:
+                # positive samples kept with individuals belong to the training set
+                return data.fitness(interpreter, program, ind if dist == "training" else None)
 
         except ValueError as e:
             # if "Error 168" in str(e):
@@ -150,7 +167,15 @@ class ZIMPL(base_ff):
     def init_experimentdatabase():
         if ZIMPL.database is not None:
             return
-        ZIMPL.database = Database(params["EXPERIMENT_DATABASE"])
+        # a file name with fields of params, e.g. ../results/shards/{TIME_STAMP}.sqlite, gives each run a private shard
+        # database, which is merged with scripts/merge.py. The shard is written as .part until the run finishes.
+        filename = params["EXPERIMENT_DATABASE"].format(**params)
+        if filename != params["EXPERIMENT_DATABASE"]:
+            ZIMPL.shard_filename = filename
+            filename += ".part"
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        # in write-behind mode, data sets are written by a background thread and saving never waits for the database
+        ZIMPL.database = Database(filename, params.get("EXPERIMENT_DATABASE_WRITE_BEHIND", True))
         ZIMPL.experiment = ZIMPL.database.new_experiment()
         ZIMPL.experiment["timestamp"] = str(datetime.datetime.now())
         ZIMPL.experiment["commandline"] = " ".join(sys.argv)
@@ -162,6 +187,8 @@ class ZIMPL(base_ff):
 
     @staticmethod
     def get_soo_stats(individuals, end):
+        lookups = statistics["semantic_cache_lookups"]  # counted by workers of MULTICORE evaluation
+        statistics["semantic_cache_hit_rate"] = statistics["semantic_cache_hits"] / lookups * 100 if lookups else 0
         ZIMPL.prev_get_soo_stats(individuals, end)  # calculate statistics
 
         generation = ZIMPL.experiment.new_child_data_set("generations")
@@ -170,10 +197,20 @@ class ZIMPL(base_ff):
         generation["test_fitness"] = params["FITNESS_FUNCTION"].evaluate(trackers.best_ever, dist="test")
         generation["validation_fitness"] = params["FITNESS_FUNCTION"].evaluate(trackers.best_ever, dist="validation")
         generation["end"] = end
+        if ZIMPL.database.write_behind:
+            # queue the generation now and release it, instead of saving all generations at the end
+            generation.__exit__(None, None, None)
         if end:
             ZIMPL.experiment.save(True)
             ZIMPL.experiment = None
-            ZIMPL.database.__exit__(None, None, None)
+            ZIMPL.close_experimentdatabase()
+
+    @staticmethod
+    def close_experimentdatabase():
+        ZIMPL.database.__exit__(None, None, None)
+        if ZIMPL.shard_filename is not None:
+            # the shard is complete and can be merged
+            os.replace(ZIMPL.shard_filename + ".part", ZIMPL.shard_filename)
 
     @staticmethod
     def except_hook(exctype, value, tb):
@@ -182,12 +219,35 @@ class ZIMPL(base_ff):
             ZIMPL.experiment["error_value"] = str(value)
             ZIMPL.experiment["error_tb"] = "".join(format_tb(tb))
             ZIMPL.experiment.save()
+            ZIMPL.experiment = None
+            ZIMPL.close_experimentdatabase()
         ZIMPL.prev_excepthook(exctype, value, tb)
 
 
 class Evaluator:
     def __init__(self, dataset_filename, size):
         self.data = self.load_dataset(dataset_filename, size)
+        self.precision_index = helper.PrecisionIndex(self.data.values)  # built once, reused for every individual
+        self.precision_threads = cast_int(params.get("PRECISION_THREADS", 1))
+        # LRU cache of F1 scores (None if recall is 0) and positive samples of models by their canonical hash, limited
+        # to SEMANTIC_CACHE_SIZE models; equal models get equal fitness. Each worker of MULTICORE evaluation keeps its
+        # own cache, the counters of the workers are added to the statistics of the parent (see ZIMPL.counters).
+        self.semantic_cache = OrderedDict() if params.get("SEMANTIC_CACHE", True) else None
+        self.semantic_cache_size = int(params.get("SEMANTIC_CACHE_SIZE", 10000))
+        for k in ("semantic_cache_lookups", "semantic_cache_hits", "semantic_cache_hit_rate"):
+            statistics.setdefault(k, 0)
+        # rows of the data satisfying each linear constraint, shared by models containing equal constraints
+        self.constraint_cache = None
+        if params.get("CONSTRAINT_CACHE", True):
+            self.constraint_cache = ConstraintCache(int(float(params.get("CONSTRAINT_CACHE_MB", 64)) * 2 ** 20))
+        for k in ("constraint_cache_hits", "constraint_cache_misses"):
+            statistics.setdefault(k, 0)
+        # positive samples inherited from the parent that satisfy the model of the offspring are reused; new samples
+        # are drawn if fewer than INCREMENTAL_PRECISION_MIN of them remain
+        self.incremental_precision = params.get("INCREMENTAL_PRECISION", False)
+        self.incremental_precision_min = float(params.get("INCREMENTAL_PRECISION_MIN", 0.5))
+        for k in ("precision_samples_reused", "precision_samples_drawn"):
+            statistics.setdefault(k, 0)
 
     def load_dataset(self, filename, size):
         set = pd.read_csv(filename, index_col=False, engine='c', na_filter=False, dtype=np.double)
@@ -196,24 +256,73 @@ class Evaluator:
             set.reset_index(inplace=True, drop=True)
         return set
 
-    def fitness(self, interpreter, phenotype):
+    def fitness(self, interpreter, phenotype, ind: Individual = None):
+        key = None
+        if self.semantic_cache is not None:
+            key = getattr(interpreter, "lp_interpreter", interpreter).canonical_hash()
+            statistics["semantic_cache_lookups"] += 1
+
+        if key is not None and key in self.semantic_cache:
+            statistics["semantic_cache_hits"] += 1
+            self.semantic_cache.move_to_end(key)
+            f1, samples = self.semantic_cache[key]
+            if samples is not None and self.incremental_precision and ind is not None:
+                # samples satisfying the model are inherited as if precision was computed
+                ind.samples = samples
+        else:
+            f1 = self.f1(interpreter, ind)
+            if key is not None:
+                samples = ind.samples if f1 is not None and self.incremental_precision and ind is not None else None
+                self.semantic_cache[key] = f1, samples
+                if len(self.semantic_cache) > self.semantic_cache_size:
+                    self.semantic_cache.popitem(last=False)
+
+        if f1 is None:
+            return 0.0
+        return f1 - 1e-6 * len(phenotype)
+
+    def f1(self, interpreter, ind: Individual = None):
         recall = self.recall(interpreter)
         if recall < 1e-6:
-            return 0.0
-        precision = self.precision(interpreter)
-        return 2 * recall * precision / (recall + precision) - 1e-6 * len(phenotype)
+            return None
+        precision = self.precision(interpreter, ind)
+        return 2 * recall * precision / (recall + precision)
 
     def recall(self, interpreter):
         assert "class" not in self.data.columns or self.data["class"].all(), self.data
-        tp = interpreter.is_satisfied(self.data).sum()
+        if self.constraint_cache is None:
+            tp = interpreter.is_satisfied(self.data).sum()
+        else:
+            hits, misses = self.constraint_cache.hits, self.constraint_cache.misses
+            tp = interpreter.is_satisfied(self.data, self.constraint_cache).sum()
+            statistics["constraint_cache_hits"] += self.constraint_cache.hits - hits
+            statistics["constraint_cache_misses"] += self.constraint_cache.misses - misses
         fn = self.data.shape[0] - tp
         assert 0 <= tp <= self.data.shape[0]
         assert 0 <= fn <= self.data.shape[0]
         return tp / (tp + fn)
 
-    def precision(self, interpreter):
+    def precision(self, interpreter, ind: Individual = None):
         assert "class" not in self.data.columns or self.data["class"].all(), self.data
-        P: pd.DataFrame = interpreter.sample_positive(self.data.shape[0], "har", 5 * self.data.shape[0], -13)  # fixed seed makes results repeatable
+        n = self.data.shape[0]
+        inherited = ind.samples if self.incremental_precision and ind is not None else None
+        if inherited is not None:
+            inherited = inherited[interpreter.is_satisfied(inherited).astype(np.bool_)]
+            statistics["precision_samples_reused"] += inherited.shape[0]
+        if inherited is not None and inherited.shape[0] >= self.incremental_precision_min * n:
+            P = inherited
+        else:
+            P = self.sample_positive(interpreter, n if inherited is None else n - inherited.shape[0])
+            statistics["precision_samples_drawn"] += P.shape[0]
+            if inherited is not None:
+                P = pd.concat([inherited, P], ignore_index=True)
+        if self.incremental_precision and ind is not None:
+            ind.samples = P
+        return self.precision_index.precision(P.values, self.precision_threads)
+
+    def sample_positive(self, interpreter, n):
+        """Returns n positive samples of interpreter with columns of the data set."""
+        P: pd.DataFrame = interpreter.sample_positive(n, "har", 5 * n, seed=-13)  # fixed seed makes results repeatable
         if P.shape[1] < self.data.shape[1]:
             for c in self.data.columns:
                 if c not in P.columns:
@@ -221,7 +330,7 @@ class Evaluator:
             P = P[self.data.columns]
         assert P.shape[1] == self.data.shape[1]
         assert all(a == b for a, b in zip(P.columns, self.data.columns))
-        return helper.precision(self.data.values, P.values)
+        return P
 
 
 def cast_int(x):
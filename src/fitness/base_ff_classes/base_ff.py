@@ -17,6 +17,17 @@ class base_ff:
     # Default fitness objective is to minimise fitness.
     maximise = False
 
+    # Fitness functions which only read the phenotype and samples of
+    # individuals, and only set their invalid, runtime_error and samples
+    # attributes, can be evaluated asynchronously from phenotypes alone (see
+    # fitness.evaluation.evaluate_async).
+    phenotype_only = False
+
+    # Keys of stats counted by the fitness function. Workers of multicore
+    # evaluation return their increments with each fitness, which are added
+    # to the stats of the main process (see fitness.evaluation).
+    counters = ()
+
     def __init__(self):
         pass
     
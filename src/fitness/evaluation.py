@@ -45,10 +45,14 @@ def evaluate_fitness(individuals):
         else:
             eval_ind = True
 
+            if params['CACHE']:
+                stats['phenotype_cache_lookups'] += 1
+
             # Valid individuals can be evaluated.
             if params['CACHE'] and ind.phenotype in cache:
                 # The individual has been encountered before in
                 # the utilities.trackers.cache.
+                stats['phenotype_cache_hits'] += 1
 
                 if params['LOOKUP_FITNESS']:
                     # Set the fitness as the previous fitness from the
@@ -75,10 +79,14 @@ def evaluate_fitness(individuals):
             if eval_ind:
                 results = eval_or_append(ind, results, pool)
 
-    if params['MULTICORE']:
+    if asynchronous():
+        evaluate_async(individuals, results, pool)
+
+    elif params['MULTICORE']:
         for result in results:
             # Execute all jobs in the pool.
-            ind = result.get()
+            ind, counts = result.get()
+            add_counts(counts)
 
             # Set the fitness of the evaluated individual by placing the
             # evaluated individual back into the population.
@@ -108,9 +116,14 @@ def eval_or_append(ind, results, pool):
     evaluated.
     """
 
-    if params['MULTICORE']:
+    if asynchronous():
+        # The individual is evaluated asynchronously by evaluate_async.
+        results.append(ind)
+        return results
+
+    elif params['MULTICORE']:
         # Add the individual to the pool of jobs.
-        results.append(pool.apply_async(ind.evaluate, ()))
+        results.append(pool.apply_async(evaluate_ind, (ind,)))
         return results
     
     else:
@@ -133,3 +146,127 @@ def eval_or_append(ind, results, pool):
                 
                 # All fitnesses are valid.
                 cache[ind.phenotype] = ind.fitness
+
+
+def asynchronous():
+    """
+    Tells whether individuals are evaluated asynchronously by evaluate_async.
+    Fitness functions which read or write other attributes of individuals
+    than phenotypes and samples are evaluated with whole individuals.
+
+    :return: True if individuals are evaluated asynchronously.
+    """
+
+    return params['MULTICORE'] and params['ASYNC_EVALUATION'] and \
+        getattr(params['FITNESS_FUNCTION'], 'phenotype_only', False)
+
+
+def evaluate_async(individuals, pending, pool):
+    """
+    Evaluates individuals by the multicore pool of workers. Only phenotypes
+    (and data inherited by offspring, see Individual.samples) are sent to the
+    workers, which return the fitness and error flags. Results are collected
+    in order of completion, so a slow evaluation does not stall the
+    collection of the others.
+
+    :param individuals: The population of individuals.
+    :param pending: The individuals of the population to be evaluated.
+    :param pool: A pool of workers for multicore evaluation.
+    :return: Nothing.
+    """
+
+    jobs = [(ind.name, ind.phenotype, ind.samples) for ind in pending]
+
+    chunksize = params['EVALUATION_CHUNKSIZE']
+    if not chunksize:
+        # Small chunks balance the load, large chunks save messages.
+        chunksize = max(1, len(jobs) // (4 * params['CORES']))
+
+    for name, fitness, invalid, runtime_error, samples, counts in \
+            pool.imap_unordered(evaluate_phenotype, jobs, chunksize):
+        add_counts(counts)
+        ind = individuals[name]
+        ind.fitness, ind.invalid = fitness, invalid
+        ind.runtime_error = runtime_error
+        if samples is not None:
+            ind.samples = samples
+
+        # Add the evaluated individual to the cache.
+        cache[ind.phenotype] = ind.fitness
+
+        # Check if individual had a runtime error.
+        if ind.runtime_error:
+            runtime_error_cache.append(ind.phenotype)
+
+
+class Phenotype:
+    """
+    The part of an individual evaluated by a worker of asynchronous
+    evaluation.
+    """
+
+    __slots__ = ('phenotype', 'samples', 'invalid', 'runtime_error')
+
+    def __init__(self, phenotype, samples):
+        self.phenotype, self.samples = phenotype, samples
+        self.invalid, self.runtime_error = False, False
+
+
+def evaluate_phenotype(job):
+    """
+    Evaluates a phenotype in a worker of asynchronous evaluation.
+
+    :param job: A tuple (name of the individual, phenotype, samples).
+    :return: A tuple (name, fitness, invalid, runtime error, samples,
+    counts) where samples are None if unchanged by the fitness function, and
+    counts are the increments of the counters of the fitness function.
+    """
+
+    name, phenotype, samples = job
+    ind = Phenotype(phenotype, samples)
+    before = get_counts()
+    fitness = params['FITNESS_FUNCTION'](ind)
+
+    return name, fitness, ind.invalid, ind.runtime_error, \
+        ind.samples if ind.samples is not samples else None, \
+        [n - b for n, b in zip(get_counts(), before)]
+
+
+def evaluate_ind(ind):
+    """
+    Evaluates an individual in a worker of multicore evaluation.
+
+    :param ind: An individual to be evaluated.
+    :return: The evaluated individual and the increments of the counters of
+    the fitness function.
+    """
+
+    before = get_counts()
+    ind.evaluate()
+
+    return ind, [n - b for n, b in zip(get_counts(), before)]
+
+
+def get_counts():
+    """
+    Reads the stats counted by the fitness function (see base_ff.counters).
+
+    :return: A list of the values of the counters.
+    """
+
+    return [stats.get(key, 0) for key in
+            getattr(params['FITNESS_FUNCTION'], 'counters', ())]
+
+
+def add_counts(counts):
+    """
+    Adds the increments of the counters of the fitness function returned by a
+    worker of multicore evaluation to the stats of the main process.
+
+    :param counts: A list of increments of the counters.
+    :return: Nothing.
+    """
+
+    for key, count in zip(getattr(params['FITNESS_FUNCTION'], 'counters', ()),
+                          counts):
+        stats[key] = stats.get(key, 0) + count
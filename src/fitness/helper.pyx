@@ -1,28 +1,180 @@
 from libc.math cimport fabs
 from libc.math cimport log
+from libc.stdlib cimport malloc, free
 cimport cython
+from cython.parallel cimport prange, threadid
+import numpy as np
 
 @cython.initializedcheck(False)
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.cdivision(True)
 @cython.embedsignature(True)
-def precision(const double[:, :] Xv, const double[:, :] Pv):
-    cdef double threshold = Xv.shape[1] / log(Xv.shape[0])
-    cdef int i, j, k
+def precision(const double[:, :] Xv, const double[:, :] Pv, int threads=1):
+    """Returns the ratio of rows of Pv within threshold of a row of Xv. Rows of Pv are processed by threads OpenMP
+    threads."""
+    cdef double threshold = _threshold(Xv)
+    cdef Py_ssize_t i, j
     cdef int tp = 0
-    cdef double denominator
-    cdef double sum
-    range_j = range(Xv.shape[0])
-    range_k = range(Xv.shape[1])
-    for i in range(Pv.shape[0]):
-        for j in range_j:
-            sum = 0.0
-            for k in range_k:
-                denominator = fabs(Pv[i, k]) + fabs(Xv[j, k])
-                if denominator > 1e-6:
-                    sum += fabs(Pv[i, k] - Xv[j, k]) / denominator
-            if sum <= threshold:
+    for i in prange(Pv.shape[0], nogil=True, num_threads=max(threads, 1), schedule="guided"):
+        for j in range(Xv.shape[0]):
+            if _within(Xv, j, Pv, i, threshold):
                 tp += 1
                 break
     return float(tp) / float(Pv.shape[0])
+
+
+@cython.cdivision(True)
+cdef inline double _threshold(const double[:, :] Xv):
+    return Xv.shape[1] / log(Xv.shape[0])
+
+
+@cython.initializedcheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline bint _within(const double[:, :] Xv, Py_ssize_t j, const double[:, :] Pv, Py_ssize_t i, double threshold) noexcept nogil:
+    """Returns whether the distance of row j of Xv and row i of Pv is at most threshold."""
+    cdef Py_ssize_t k
+    cdef double denominator
+    cdef double sum = 0.0
+    for k in range(Xv.shape[1]):
+        denominator = fabs(Pv[i, k]) + fabs(Xv[j, k])
+        if denominator > 1e-6:
+            sum += fabs(Pv[i, k] - Xv[j, k]) / denominator
+            if sum > threshold:  # terms are non-negative
+                return False
+    return sum <= threshold
+
+
+def _build_tree(X: np.ndarray, leaf_size: int):
+    """Builds k-d tree over rows of X. Returns (order of rows, start, end, left, right, lower bounds, upper bounds)
+    where start, end delimit the rows of each node in X[order], and left, right are children (-1 in leaves)."""
+    order = np.arange(X.shape[0])
+    start, end, left, right, lower, upper = [], [], [], [], [], []
+
+    def add_node(first, last):
+        rows = X[order[first:last]]
+        start.append(first)
+        end.append(last)
+        left.append(-1)
+        right.append(-1)
+        lower.append(rows.min(0))
+        upper.append(rows.max(0))
+        return len(start) - 1
+
+    stack = [add_node(0, X.shape[0])]
+    while len(stack) > 0:
+        node = stack.pop()
+        spread = upper[node] - lower[node]
+        dim = np.argmax(spread)
+        if end[node] - start[node] <= leaf_size or spread[dim] == 0.0:
+            continue
+        rows = order[start[node]:end[node]]
+        order[start[node]:end[node]] = rows[np.argsort(X[rows, dim], kind="stable")]
+        middle = (start[node] + end[node]) // 2
+        left[node] = add_node(start[node], middle)
+        right[node] = add_node(middle, end[node])
+        stack += [left[node], right[node]]
+
+    as_index = lambda a: np.array(a, dtype=np.intp)
+    return order, as_index(start), as_index(end), as_index(left), as_index(right), np.array(lower), np.array(upper)
+
+
+cdef class PrecisionIndex:
+    """k-d tree over the training rows Xv, built once per training set. precision(Pv) gives results identical to
+    precision(Xv, Pv): a node is skipped if a lower bound of the distance of its bounding box exceeds the threshold and
+    the search for a row of Pv terminates at the first training row within the threshold."""
+    cdef readonly double threshold
+    cdef double limit
+    cdef const double[:, :] Xv
+    cdef const Py_ssize_t[:] start, end, left, right
+    cdef const double[:, :] lower, upper
+
+    def __init__(self, Xv, int leaf_size=16):
+        X = np.ascontiguousarray(Xv, dtype=np.double)
+        self.threshold = _threshold(X) if X.shape[0] > 0 else 0.0
+        self.limit = self.threshold + 1e-9 * max(1.0, fabs(self.threshold))  # bounds may be rounded up
+        if X.shape[0] == 0:
+            self.Xv = X
+            return
+        order, self.start, self.end, self.left, self.right, self.lower, self.upper = _build_tree(X, leaf_size)
+        self.Xv = X[order]
+
+    @cython.initializedcheck(False)
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def precision(self, const double[:, :] Pv, int threads=1):
+        if self.Xv.shape[0] < 2 or Pv.shape[0] == 0:
+            return precision(self.Xv, Pv, threads)
+        threads = max(threads, 1)
+        cdef Py_ssize_t i
+        cdef Py_ssize_t nodes = self.start.shape[0]
+        cdef int tp = 0
+        cdef Py_ssize_t* stacks = <Py_ssize_t*> malloc(threads * nodes * sizeof(Py_ssize_t))  # a stack per thread
+        if stacks == NULL:
+            raise MemoryError()
+        try:
+            for i in prange(Pv.shape[0], nogil=True, num_threads=threads, schedule="guided"):
+                if self._covered(Pv, i, stacks + threadid() * nodes):
+                    tp += 1
+        finally:
+            free(stacks)
+        return float(tp) / float(Pv.shape[0])
+
+    @cython.initializedcheck(False)
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef bint _covered(self, const double[:, :] Pv, Py_ssize_t i, Py_ssize_t* stack) noexcept nogil:
+        """Returns whether row i of Pv is within threshold of a row of Xv. stack must hold a node per tree node."""
+        cdef Py_ssize_t node, j, near, far
+        cdef Py_ssize_t top = 1
+        cdef double near_bound, far_bound
+        stack[0] = 0
+        while top > 0:
+            top -= 1
+            node = stack[top]
+            if self.left[node] < 0:
+                for j in range(self.start[node], self.end[node]):
+                    if _within(self.Xv, j, Pv, i, self.threshold):
+                        return True
+                continue
+            near, far = self.left[node], self.right[node]
+            near_bound, far_bound = self._bound(near, Pv, i), self._bound(far, Pv, i)
+            if far_bound < near_bound:
+                near, far = far, near
+                near_bound, far_bound = far_bound, near_bound
+            if far_bound <= self.limit:
+                stack[top] = far
+                top += 1
+            if near_bound <= self.limit:
+                stack[top] = near
+                top += 1
+        return False
+
+    @cython.initializedcheck(False)
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.cdivision(True)
+    cdef double _bound(self, Py_ssize_t node, const double[:, :] Pv, Py_ssize_t i) noexcept nogil:
+        """Returns a lower bound of the distance of row i of Pv and rows in node. A term of the distance grows as x
+        moves away from p, thus it is minimal at the closest point of the bounding box."""
+        cdef Py_ssize_t k
+        cdef double p, x, lower, upper
+        cdef double bound = 0.0
+        for k in range(Pv.shape[1]):
+            p = Pv[i, k]
+            lower = self.lower[node, k]
+            upper = self.upper[node, k]
+            if p < lower:
+                x = lower
+            elif p > upper:
+                x = upper
+            else:
+                continue
+            if fabs(p) <= 1e-6 and lower <= 1e-6 and upper >= -1e-6:
+                continue  # the term may be skipped for small denominators
+            bound += fabs(p - x) / (fabs(p) + fabs(x))
+            if bound > self.limit:
+                break
+        return bound
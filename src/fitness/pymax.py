@@ -16,6 +16,7 @@ class pymax(base_ff):
     """
 
     maximise = True  # True as it ever was.
+    phenotype_only = True
     
     def __init__(self):
         # Initialise base fitness function class.
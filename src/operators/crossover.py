@@ -1,7 +1,10 @@
-from random import randint, random, sample, choice
+from random import randint, random, sample, choice, getrandbits
+
+import numpy as np
 
 from algorithm.parameters import params
-from representation import individual
+from representation import genome_array, individual
+from representation.flat_tree import FlatTree
 from representation.latent_tree import latent_tree_crossover, latent_tree_repair
 from utilities.representation.check_methods import check_ind
 
@@ -18,6 +21,11 @@ def crossover(parents):
     :return: A population of fully crossed over individuals.
     """
 
+    if params['VECTORIZED_GENOME_OPERATORS'] and \
+            hasattr(params['CROSSOVER'], "points"):
+        # Perform linear crossover on the entire population at once.
+        return crossover_population(parents)
+
     # Initialise an empty population.
     cross_pop = []
     
@@ -73,10 +81,98 @@ def crossover_inds(parent_0, parent_1):
         return None
 
     else:
+        # Each child inherits data of the fitness function from the parent
+        # whose start of genome (root of tree) it keeps.
+        for ind, parent in zip(inds, (parent_0, parent_1)):
+            ind.samples = parent.samples
+
         # Crossover was successful, return crossed-over individuals.
         return inds
 
 
+def crossover_population(parents):
+    """
+    Perform linear crossover on a population of individuals with operations
+    on arrays of all genomes. Parents and crossover points are drawn from
+    the same distributions as in crossover, but from a numpy generator
+    seeded by the random module.
+
+    :param parents: A population of parent individuals on which crossover is
+    to be performed.
+    :return: A population of fully crossed over individuals.
+    """
+
+    rng = np.random.default_rng(getrandbits(64))
+
+    genomes, lengths = genome_array.pack([ind.genome for ind in parents])
+    invalid = np.array([ind.invalid for ind in parents], dtype=bool)
+
+    if params['WITHIN_USED']:
+        # Get used codons range, or the entire genome of invalids.
+        used = np.array([ind.used_codons or 0 for ind in parents])
+        max_index = np.where(invalid, lengths, used)
+
+    else:
+        # Get length of entire genome.
+        max_index = lengths
+
+    # Initialise an empty population.
+    cross_pop = []
+
+    while len(cross_pop) < params['GENERATION_SIZE']:
+
+        # Randomly choose pairs of distinct parents.
+        pairs = -(-(params['GENERATION_SIZE'] - len(cross_pop)) // 2)
+        rows_0 = rng.integers(len(parents), size=pairs)
+        rows_1 = rng.integers(len(parents) - 1, size=pairs)
+        rows_1 += rows_1 >= rows_0
+
+        # Crossover cannot be performed on invalid individuals.
+        if not params['INVALID_SELECTION'] and \
+                (invalid[rows_0] | invalid[rows_1]).any():
+            s = "operators.crossover.crossover\nError: invalid individuals " \
+                "selected for crossover."
+            raise Exception(s)
+
+        # Select points on both genomes of each pair.
+        points_0, points_1 = params['CROSSOVER'].points(
+            rng, max_index[rows_0], max_index[rows_1], lengths[rows_0],
+            lengths[rows_1])
+
+        # Pairs without crossover copy their genomes.
+        copy = rng.random(pairs) >= params['CROSSOVER_PROBABILITY']
+        copy_0 = (lengths[rows_0], 0, 0, lengths[rows_0])
+        copy_1 = (lengths[rows_1], 0, 0, lengths[rows_1])
+
+        points = [np.concatenate((np.where(copy, c_0, p_0),
+                                  np.where(copy, c_1, p_1))) for
+                  p_0, p_1, c_0, c_1 in zip(points_0, points_1, copy_0,
+                                            copy_1)]
+
+        # Make new chromosomes of children 0 and then children 1.
+        children, child_lengths = genome_array.splice(
+            genomes, lengths, np.concatenate((rows_0, rows_1)),
+            np.concatenate((rows_1, rows_0)), *points)
+        children = genome_array.unpack(children, child_lengths)
+
+        for child_0, child_1, row_0, row_1 in zip(
+                children[:pairs], children[pairs:], rows_0.tolist(),
+                rows_1.tolist()):
+            inds = [individual.Individual(child_0, None),
+                    individual.Individual(child_1, None)]
+
+            if not any(check_ind(ind, "crossover") for ind in inds):
+                # Children inherit data of the fitness function from the
+                # parents whose start of genome they keep.
+                inds[0].samples = parents[row_0].samples
+                inds[1].samples = parents[row_1].samples
+
+                # Crossover was successful, extend the new population.
+                cross_pop.extend(inds)
+
+    return cross_pop
+
+
 def variable_onepoint(p_0, p_1):
     """
     Given two individuals, create two children using one-point crossover and
@@ -224,11 +320,72 @@ def variable_twopoint(p_0, p_1):
     return [ind_0, ind_1]
 
 
+def variable_onepoint_points(rng, max_p_0, max_p_1, len_0, len_1):
+    """
+    Selects points of variable_onepoint for pairs of genomes. Points of a
+    child are (a, b, c, d), such that the child is genome_0[:a] +
+    genome_1[b:c] + genome_0[d:], where genome_0 is the genome of the
+    parent with the same index.
+
+    :param rng: A numpy random generator.
+    :param max_p_0: The maximum indexes of genomes of parents 0.
+    :param max_p_1: The maximum indexes of genomes of parents 1.
+    :param len_0: The lengths of genomes of parents 0.
+    :param len_1: The lengths of genomes of parents 1.
+    :return: The points of children 0 and the points of children 1.
+    """
+
+    pt_0, pt_1 = rng.integers(1, max_p_0 + 1), rng.integers(1, max_p_1 + 1)
+
+    return (pt_0, pt_1, len_1, len_0), (pt_1, pt_0, len_0, len_1)
+
+
+def fixed_onepoint_points(rng, max_p_0, max_p_1, len_0, len_1):
+    """
+    Selects points of fixed_onepoint for pairs of genomes, see
+    variable_onepoint_points.
+    """
+
+    pt = rng.integers(1, np.minimum(max_p_0, max_p_1) + 1)
+
+    return (pt, pt, len_1, len_0), (pt, pt, len_0, len_1)
+
+
+def fixed_twopoint_points(rng, max_p_0, max_p_1, len_0, len_1):
+    """
+    Selects points of fixed_twopoint for pairs of genomes, see
+    variable_onepoint_points.
+    """
+
+    a, b = rng.integers(1, max_p_0 + 1), rng.integers(1, max_p_1 + 1)
+    pt_0, pt_1 = np.minimum(a, b), np.maximum(a, b)
+
+    return (pt_0, pt_0, pt_1, pt_1), (pt_0, pt_0, pt_1, pt_1)
+
+
+def variable_twopoint_points(rng, max_p_0, max_p_1, len_0, len_1):
+    """
+    Selects points of variable_twopoint for pairs of genomes, see
+    variable_onepoint_points.
+    """
+
+    a_0, b_0 = rng.integers(1, max_p_0 + 1), rng.integers(1, max_p_1 + 1)
+    a_1, b_1 = rng.integers(1, max_p_0 + 1), rng.integers(1, max_p_1 + 1)
+    pt_0, pt_1 = np.minimum(a_0, b_0), np.maximum(a_0, b_0)
+    pt_2, pt_3 = np.minimum(a_1, b_1), np.maximum(a_1, b_1)
+
+    return (pt_0, pt_2, pt_3, pt_1), (pt_2, pt_0, pt_1, pt_3)
+
+
 def subtree(p_0, p_1):
     """
     Given two individuals, create two children using subtree crossover and
     return them. Candidate subtrees are selected based on matching
-    non-terminal nodes rather than matching terminal nodes.
+    non-terminal nodes rather than matching terminal nodes. Crossover points
+    are drawn regardless of the limits on tree depth, tree nodes and genome
+    length, crossover_inds rejects children which exceed them. Picking only
+    legal points from indexes of subtree sizes was measured to be slower, as
+    few children are rejected.
     
     :param p_0: Parent 0.
     :param p_1: Parent 1.
@@ -253,6 +410,14 @@ def subtree(p_0, p_1):
         # Randomly choose a non-terminal from the set of permissible
         # intersecting non-terminals.
         crossover_choice = choice(shared_nodes)
+
+        if params['PERSISTENT_TREES'] and not isinstance(tree0, FlatTree):
+            # Nodes are paths in the indexes of both trees, copy only the
+            # paths to the swapped subtrees. Flat trees are spliced below.
+            t0 = choice(tree0.get_index()[0][crossover_choice])
+            t1 = choice(tree1.get_index()[0][crossover_choice])
+            return tree0.replace(t0, tree1.get_node(t1)), \
+                tree1.replace(t1, tree0.get_node(t0))
     
         # Find all nodes in both trees that match the chosen crossover node.
         nodes_0 = tree0.get_target_nodes([], target=[crossover_choice])
@@ -261,6 +426,10 @@ def subtree(p_0, p_1):
         # Randomly pick a node.
         t0, t1 = choice(nodes_0), choice(nodes_1)
 
+        if isinstance(tree0, FlatTree):
+            # Nodes are indexes, swap slices of both trees.
+            return tree0.splice(t0, tree1, t1), tree1.splice(t1, tree0, t0)
+
         # Check the parents of both chosen subtrees.
         p0 = t0.parent
         p1 = t1.parent
@@ -363,9 +532,15 @@ def subtree(p_0, p_1):
             # Save tail of each genome.
             tail_1 = p_1.genome[p_1.used_codons:]
         
-        # Get the set of labels of non terminals for each tree.
-        labels1 = p_0.tree.get_node_labels(set())
-        labels2 = p_1.tree.get_node_labels(set())
+        if params['PERSISTENT_TREES'] and not isinstance(p_0.tree, FlatTree):
+            # Get the non terminals in the index of each tree.
+            labels1 = set(p_0.tree.get_index()[0])
+            labels2 = set(p_1.tree.get_index()[0])
+
+        else:
+            # Get the set of labels of non terminals for each tree.
+            labels1 = p_0.tree.get_node_labels(set())
+            labels2 = p_1.tree.get_node_labels(set())
 
         # Find overlapping non-terminals across both trees.
         shared_nodes = intersect(labels1, labels2)
@@ -384,8 +559,8 @@ def subtree(p_0, p_1):
         ind1 = individual.Individual(None, ret_tree1)
 
         # Preserve tails.
-        ind0.genome = ind0.genome + tail_0
-        ind1.genome = ind1.genome + tail_1
+        ind0.genome.extend(tail_0)
+        ind1.genome.extend(tail_1)
 
     return [ind0, ind1]
 
@@ -470,3 +645,9 @@ variable_twopoint.representation = "linear"
 fixed_twopoint.representation = "linear"
 subtree.representation = "subtree"
 LTGE_crossover.representation = "latent tree"
+
+# Set crossover points of linear operators for crossover_population.
+variable_onepoint.points = variable_onepoint_points
+fixed_onepoint.points = fixed_onepoint_points
+variable_twopoint.points = variable_twopoint_points
+fixed_twopoint.points = fixed_twopoint_points
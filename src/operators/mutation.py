@@ -1,8 +1,12 @@
-from random import randint, random, choice
+from random import randint, random, choice, getrandbits
+
+import numpy as np
 
 from algorithm.parameters import params
-from representation import individual
+from representation import genome_array, individual
 from representation.derivation import generate_tree
+from representation.flat_tree import FlatTree
+from representation.tree import Tree
 from representation.latent_tree import latent_tree_mutate, latent_tree_repair
 from utilities.representation.check_methods import check_ind
 
@@ -16,11 +20,43 @@ def mutation(pop):
     :return: A fully mutated population.
     """
 
+    if params['VECTORIZED_GENOME_OPERATORS'] and \
+            hasattr(params['MUTATION'], "population"):
+        # Perform linear mutation on the entire population at once.
+        return mutation_population(pop)
+
     # Initialise empty pop for mutated individuals.
     new_pop = []
 
     # Iterate over entire population.
     for ind in pop:
+        new_pop.append(mutation_ind(ind))
+
+    return new_pop
+
+
+def mutation_ind(ind):
+    """
+    Perform mutation on an individual until the mutated individual does not
+    violate specified limits.
+
+    :param ind: An individual to be mutated.
+    :return: A mutated individual.
+    """
+
+    # If individual has no genome, default to subtree mutation.
+    if not ind.genome and params['NO_MUTATION_INVALIDS']:
+        new_ind = subtree(ind)
+
+    else:
+        # Perform mutation.
+        new_ind = params['MUTATION'](ind)
+
+    # Check ind does not violate specified limits.
+    check = check_ind(new_ind, "mutation")
+
+    while check:
+        # Perform mutation until the individual passes all tests.
 
         # If individual has no genome, default to subtree mutation.
         if not ind.genome and params['NO_MUTATION_INVALIDS']:
@@ -33,22 +69,69 @@ def mutation(pop):
         # Check ind does not violate specified limits.
         check = check_ind(new_ind, "mutation")
 
-        while check:
-            # Perform mutation until the individual passes all tests.
+    # Mutated individual inherits data of the fitness function.
+    new_ind.samples = ind.samples
 
-            # If individual has no genome, default to subtree mutation.
-            if not ind.genome and params['NO_MUTATION_INVALIDS']:
-                new_ind = subtree(ind)
+    return new_ind
 
-            else:
-                # Perform mutation.
-                new_ind = params['MUTATION'](ind)
+
+def mutation_population(pop):
+    """
+    Perform linear mutation on a population of individuals with operations
+    on an array of all genomes. Mutations are drawn from the same
+    distributions as in mutation, but from a numpy generator seeded by the
+    random module. As in mutation, individuals violating specified limits
+    are mutated again, and individuals without genomes are mutated by
+    mutation_ind.
+
+    :param pop: A population of individuals to be mutated.
+    :return: A fully mutated population.
+    """
+
+    rng = np.random.default_rng(getrandbits(64))
+
+    # Initialise pop for mutated individuals.
+    new_pop = list(pop)
+
+    # Individuals with genomes are mutated on the array.
+    rows = [i for i, ind in enumerate(pop) if ind.genome]
+    for i in range(len(pop)):
+        if not pop[i].genome:
+            new_pop[i] = mutation_ind(pop[i])
+
+    genomes, lengths = genome_array.pack([pop[i].genome for i in rows])
+
+    # Set effective genome lengths over which mutation will be performed.
+    invalid = np.array([pop[i].invalid for i in rows], dtype=bool)
+    if params['WITHIN_USED']:
+        used = np.array([pop[i].used_codons or 0 for i in rows])
+        eff_lengths = np.where(invalid, lengths, np.minimum(lengths, used))
+
+    else:
+        eff_lengths = lengths
+
+    mutated = np.arange(len(rows))
+
+    while len(mutated):
+        # Perform mutation. Genomes stay mutated if they are mutated again.
+        params['MUTATION'].population(rng, genomes, mutated,
+                                      eff_lengths[mutated])
+
+        failed = []
+        for row, genome in zip(mutated.tolist(), genome_array.unpack(
+                genomes[mutated], lengths[mutated])):
+            new_ind = individual.Individual(genome, None)
 
             # Check ind does not violate specified limits.
-            check = check_ind(new_ind, "mutation")
+            if check_ind(new_ind, "mutation"):
+                failed.append(row)
 
-        # Append mutated individual to population.
-        new_pop.append(new_ind)
+            else:
+                # Mutated individual inherits data of the fitness function.
+                new_ind.samples = pop[rows[row]].samples
+                new_pop[rows[row]] = new_ind
+
+        mutated = np.array(failed, dtype=np.int64)
 
     return new_pop
 
@@ -126,11 +209,65 @@ def int_flip_per_ind(ind):
     return new_ind
 
 
+def int_flip_per_codon_population(rng, genomes, rows, eff_lengths):
+    """
+    Mutate rows of an array of genomes like int_flip_per_codon.
+
+    :param rng: A numpy random generator.
+    :param genomes: The array of genomes, which is mutated in place.
+    :param rows: The rows to be mutated.
+    :param eff_lengths: The effective lengths of genomes of the rows.
+    :return: Nothing.
+    """
+
+    # Set mutation probability. Default is 1 over the length of the genome.
+    if params['MUTATION_PROBABILITY'] and params['MUTATION_EVENTS'] == 1:
+        p_mut = np.full(len(rows), params['MUTATION_PROBABILITY'])
+    elif params['MUTATION_PROBABILITY'] and params['MUTATION_EVENTS'] > 1:
+        s = "operators.mutation.int_flip_per_codon\n" \
+            "Error: mutually exclusive parameters for 'MUTATION_PROBABILITY'" \
+            "and 'MUTATION_EVENTS' have been explicitly set.\n" \
+            "       Only one of these parameters can be used at a time with" \
+            "int_flip_per_codon mutation."
+        raise Exception(s)
+    else:
+        p_mut = params['MUTATION_EVENTS'] / np.maximum(eff_lengths, 1)
+
+    # Mutation probability works per-codon over the effective lengths.
+    columns = np.arange(genomes.shape[1])
+    mask = (columns < eff_lengths[:, None]) & \
+        (rng.random((len(rows), genomes.shape[1])) < p_mut[:, None])
+
+    mutated = genomes[rows]
+    mutated[mask] = rng.integers(0, params['CODON_SIZE'] + 1,
+                                 size=int(mask.sum()))
+    genomes[rows] = mutated
+
+
+def int_flip_per_ind_population(rng, genomes, rows, eff_lengths):
+    """
+    Mutate rows of an array of genomes like int_flip_per_ind, see
+    int_flip_per_codon_population.
+    """
+
+    # Rows without effective length are not mutated.
+    rows, eff_lengths = rows[eff_lengths > 0], eff_lengths[eff_lengths > 0]
+    events = (len(rows), params['MUTATION_EVENTS'])
+
+    # Repeated indexes keep a single new codon, as in int_flip_per_ind.
+    indexes = rng.integers(0, eff_lengths[:, None], size=events)
+    genomes[rows[:, None], indexes] = rng.integers(
+        0, params['CODON_SIZE'] + 1, size=events)
+
+
 def subtree(ind):
     """
     Mutate the individual by replacing a randomly selected subtree with a
     new randomly generated subtree. Guaranteed one event per individual, unless
-    params['MUTATION_EVENTS'] is specified as a higher number.
+    params['MUTATION_EVENTS'] is specified as a higher number. The depth of
+    the new subtree is limited by generate_tree, mutation_ind rejects
+    children which exceed other limits, as the size of a random subtree is
+    not known before it is generated.
 
     :param ind: An individual to be mutated.
     :return: A mutated individual.
@@ -146,17 +283,35 @@ def subtree(ind):
         :return: The full mutated tree and the associated genome.
         """
 
-        # Find the list of nodes we can mutate from.
-        targets = ind_tree.get_target_nodes([], target=params[
-                                          'BNF_GRAMMAR'].non_terminals)
+        if params['PERSISTENT_TREES'] and not isinstance(ind_tree, FlatTree):
+            # Find the list of paths to nodes in the index of the tree.
+            targets = ind_tree.get_index()[1]
+
+        else:
+            # Find the list of nodes we can mutate from.
+            targets = ind_tree.get_target_nodes([], target=params[
+                                              'BNF_GRAMMAR'].non_terminals)
 
         # Pick a node.
         new_tree = choice(targets)
 
+        if isinstance(ind_tree, FlatTree):
+            # The node is an index, generate the new subtree separately.
+            index, depth = new_tree, int(ind_tree.depths[new_tree])
+            new_tree = Tree(ind_tree.root(index), None)
+
+        elif params['PERSISTENT_TREES']:
+            # The node is a path, generate the new subtree separately.
+            path, depth = new_tree, len(new_tree) + 1
+            new_tree = Tree(ind_tree.get_node(path).root, None)
+
+        else:
+            depth = new_tree.depth
+
         # Set the depth limits for the new subtree.
         if params['MAX_TREE_DEPTH']:
             # Set the limit to the tree depth.
-            max_depth = params['MAX_TREE_DEPTH'] - new_tree.depth
+            max_depth = params['MAX_TREE_DEPTH'] - depth
 
         else:
             # There is no limit to tree depth.
@@ -165,6 +320,14 @@ def subtree(ind):
         # Mutate a new subtree.
         generate_tree(new_tree, [], [], "random", 0, 0, 0, max_depth)
 
+        if isinstance(ind_tree, FlatTree):
+            # Splice the new subtree into the tree.
+            return ind_tree.splice(index, FlatTree.from_tree(new_tree), 0)
+
+        elif params['PERSISTENT_TREES']:
+            # Copy only the path to the new subtree.
+            return ind_tree.replace(path, new_tree)
+
         return ind_tree
 
     if ind.invalid:
@@ -183,7 +346,7 @@ def subtree(ind):
     ind = individual.Individual(None, ind.tree)
 
     # Add in the previous tail.
-    ind.genome = ind.genome + tail
+    ind.genome.extend(tail)
 
     return ind
 
@@ -243,3 +406,7 @@ int_flip_per_codon.representation = "linear"
 int_flip_per_ind.representation = "linear"
 subtree.representation = "subtree"
 LTGE_mutation.representation = "latent tree"
+
+# Set population mutations of linear operators for mutation_population.
+int_flip_per_codon.population = int_flip_per_codon_population
+int_flip_per_ind.population = int_flip_per_ind_population
@@ -0,0 +1,152 @@
+import os, sys
+import random
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.parameters import params, set_params
+from operators import crossover, mutation
+from representation import genome_array
+from representation.individual import Individual
+from stats.stats import stats
+
+
+def random_individual():
+    """An individual mapped from a random genome of random length."""
+    length = random.randint(20, 150)
+    return Individual([random.randint(0, params['CODON_SIZE']) for _ in range(length)], None)
+
+
+def drawn(values):
+    """A replacement of random.randint or random.random returning the given values in turn."""
+    values = iter(values.tolist())
+    return lambda *args: next(values)
+
+
+class GenomeOperatorTests(unittest.TestCase):
+    """Operators on arrays of genomes make the same children as the operators on individuals, if both draw the same
+    numbers from numpy generators with the same seed."""
+
+    @classmethod
+    def setUpClass(cls):
+        # set_params removes stats and cannot run twice, parameters are restored for each test
+        cls._params, cls._stats = dict(params), dict(stats)
+        set_params(["--parameters", "pymax.txt", "--random_seed", "1"], create_files=False)
+        cls._pymax_params = dict(params)
+
+    @classmethod
+    def tearDownClass(cls):
+        params.clear()
+        params.update(cls._params)
+        stats.update(cls._stats)
+
+    def setUp(self):
+        params.clear()
+        params.update(self._pymax_params)
+        random.seed(1)
+
+    def assertCrossover(self, operator, crossed=True):
+        for seed in range(50):
+            p_0, p_1 = random_individual(), random_individual()
+            max_p_0, max_p_1 = crossover.get_max_genome_index(p_0, p_1)
+
+            # Points are drawn like randint(a, b), crossover happens if random() is below the probability.
+            rng = np.random.default_rng(seed)
+            with patch.object(crossover, "randint", lambda a, b: int(rng.integers(a, b + 1))), \
+                    patch.object(crossover, "random", lambda: 0.0 if crossed else 1.0):
+                expected = [list(ind.genome) for ind in operator(p_0, p_1)]
+
+            genomes, lengths = genome_array.pack([p_0.genome, p_1.genome])
+            if crossed:
+                points_0, points_1 = operator.points(np.random.default_rng(seed), np.array([max_p_0]),
+                                                     np.array([max_p_1]), lengths[:1], lengths[1:])
+            else:
+                # Points of crossover_population for pairs without crossover.
+                zero = np.zeros(1, dtype=np.int64)
+                points_0, points_1 = (lengths[:1], zero, zero, lengths[:1]), (lengths[1:], zero, zero, lengths[1:])
+            points = [np.concatenate((pt_0, pt_1)) for pt_0, pt_1 in zip(points_0, points_1)]
+            children, child_lengths = genome_array.splice(genomes, lengths, np.array([0, 1]), np.array([1, 0]),
+                                                          *points)
+
+            self.assertEqual([list(genome) for genome in genome_array.unpack(children, child_lengths)], expected)
+
+    def test_crossover_samples(self):
+        # Children inherit the samples of the parent whose start of genome they keep.
+        parents = [ind for ind in (random_individual() for _ in range(30)) if not ind.invalid][:10]
+        for i, ind in enumerate(parents):
+            ind.samples = i
+        params['GENERATION_SIZE'] = 10
+        params['CROSSOVER'] = crossover.fixed_onepoint
+        for cross_pop in (crossover.crossover(parents), crossover.crossover_population(parents)):
+            for ind in cross_pop:
+                self.assertEqual(ind.genome[:1], parents[ind.samples].genome[:1])
+
+    def test_pack_unpack(self):
+        genomes = [random_individual().genome for _ in range(10)] + [[]]
+        self.assertEqual([list(genome) for genome in genome_array.unpack(*genome_array.pack(genomes))],
+                         [list(genome) for genome in genomes])
+
+    def test_variable_onepoint(self):
+        self.assertCrossover(crossover.variable_onepoint)
+
+    def test_fixed_onepoint(self):
+        self.assertCrossover(crossover.fixed_onepoint)
+
+    def test_variable_twopoint(self):
+        self.assertCrossover(crossover.variable_twopoint)
+
+    def test_fixed_twopoint(self):
+        self.assertCrossover(crossover.fixed_twopoint)
+
+    def test_crossover_whole_genomes(self):
+        params['WITHIN_USED'] = False
+        self.assertCrossover(crossover.variable_twopoint)
+
+    def test_no_crossover(self):
+        self.assertCrossover(crossover.variable_twopoint, crossed=False)
+
+    def assertMutation(self, operator, draw):
+        """draw(rng, width, eff_length) returns the numbers drawn by random() and randint() of operator, in the order
+        of the operator on arrays of genomes of the given width."""
+        for seed in range(50):
+            ind = random_individual()
+            eff_length = mutation.get_effective_length(ind)
+
+            genomes, lengths = genome_array.pack([ind.genome])
+            operator.population(np.random.default_rng(seed), genomes, np.arange(1), np.array([eff_length]))
+
+            randoms, ints = draw(np.random.default_rng(seed), genomes.shape[1], eff_length)
+            with patch.object(mutation, "random", drawn(randoms)), patch.object(mutation, "randint", drawn(ints)):
+                expected = list(operator(ind.deep_copy()).genome)
+
+            self.assertEqual(list(genome_array.unpack(genomes, lengths)[0]), expected)
+
+    def test_int_flip_per_codon(self):
+        params['MUTATION_PROBABILITY'] = 0.05
+
+        def draw(rng, width, eff_length):
+            randoms = rng.random(width)[:eff_length]
+            return randoms, rng.integers(0, params['CODON_SIZE'] + 1, size=int((randoms < 0.05).sum()))
+
+        self.assertMutation(mutation.int_flip_per_codon, draw)
+
+    def test_int_flip_per_ind(self):
+        params['MUTATION_EVENTS'] = 3
+
+        def draw(rng, width, eff_length):
+            # int_flip_per_ind draws an index and a codon for each event.
+            indexes = rng.integers(0, eff_length, size=3)
+            codons = rng.integers(0, params['CODON_SIZE'] + 1, size=3)
+            return np.array([]), np.stack((indexes, codons), axis=1).ravel()
+
+        self.assertMutation(mutation.int_flip_per_ind, draw)
+
+    def test_mutation_whole_genomes(self):
+        params['WITHIN_USED'] = False
+        self.test_int_flip_per_ind()
+
+
+if __name__ == '__main__':
+    unittest.main()
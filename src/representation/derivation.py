@@ -8,7 +8,9 @@ from representation.tree import Tree
 def generate_tree(tree, genome, output, method, nodes, depth, max_depth,
                   depth_limit):
     """
-    Recursive function to derive a tree using a given method.
+    Derives a tree using a given method. Nodes are derived in the order of a
+    recursive derivation from an explicit stack, deep trees do not exceed the
+    recursion limit.
     
     :param tree: An instance of the Tree class.
     :param genome: The list of all codons in a tree.
@@ -17,79 +19,90 @@ def generate_tree(tree, genome, output, method, nodes, depth, max_depth,
     :param method: A string of the desired tree derivation method,
     e.g. "full" or "random".
     :param nodes: The total number of nodes in the tree.
-    :param depth: The depth of the current node.
+    :param depth: The depth of the parent of the current node.
     :param max_depth: The maximum depth of any node in the tree.
     :param depth_limit: The maximum depth the tree can expand to.
     :return: genome, output, nodes, depth, max_depth.
     """
-        
-    # Increment nodes and depth, set depth of current node.
-    nodes += 1
-    depth += 1
-    tree.depth = depth
 
-    # Find the productions possible from the current root.
-    productions = params['BNF_GRAMMAR'].rules[tree.root]
+    grammar = params['BNF_GRAMMAR']
+    root_depth = None
 
-    if depth_limit:
-        # Set remaining depth.
-        remaining_depth = depth_limit - depth
-    
-    else:
-        remaining_depth = depth_limit
-    
-    # Find which productions can be used based on the derivation method.
-    available = legal_productions(method, remaining_depth, tree.root,
-                                  productions['choices'])
-    
-    # Randomly pick a production choice.
-    chosen_prod = choice(available)
-
-    # Find the index of the chosen production and set a matching codon based
-    # on that index.
-    prod_index = productions['choices'].index(chosen_prod)
-    codon = randrange(productions['no_choices'],
-                      params['BNF_GRAMMAR'].codon_size,
-                      productions['no_choices']) + prod_index
-    
-    # Set the codon for the current node and append codon to the genome.
-    tree.codon = codon
-    genome.append(codon)
-    
-    # Initialise empty list of children for current node.
-    tree.children = []
-
-    for symbol in chosen_prod['choice']:
-        # Iterate over all symbols in the chosen production.
-        if symbol["type"] == "T":
-            # The symbol is a terminal. Append new node to children.
-            tree.children.append(Tree(symbol["symbol"], tree))
-            
-            # Append the terminal to the output list.
-            output.append(symbol["symbol"])
-        
-        elif symbol["type"] == "NT":
-            # The symbol is a non-terminal. Append new node to children.
-            tree.children.append(Tree(symbol["symbol"], tree))
-            
-            # recurse on the new node.
-            genome, output, nodes, d, max_depth = \
-                generate_tree(tree.children[-1], genome, output, method,
-                              nodes, depth, max_depth, depth_limit)
-
-    NT_kids = [kid for kid in tree.children if kid.root in
-               params['BNF_GRAMMAR'].non_terminals]
-
-    if not NT_kids:
-        # Then the branch terminates here
-        depth += 1
-        nodes += 1
-
-    if depth > max_depth:
-        # Set new maximum depth
-        max_depth = depth
-    
-    return genome, output, nodes, depth, max_depth
+    # Each entry of the stack is an iterator over pairs of nodes and symbols
+    # of a production, and the depth of the nodes.
+    stack = [(iter(((tree, None),)), depth + 1)]
+
+    while stack:
+        children, depth = stack[-1]
+
+        for node, symbol in children:
+            if symbol and symbol["type"] == "T":
+                # Append the terminal to the output list.
+                output.append(symbol["symbol"])
+                continue
+
+            # Increment nodes, set depth of current node.
+            nodes += 1
+            node.depth = depth
+
+            # Find the productions possible from the current root.
+            productions = grammar.rules[node.root]
+
+            if depth_limit:
+                # Set remaining depth.
+                remaining_depth = depth_limit - depth
+
+            else:
+                remaining_depth = depth_limit
+
+            # Find the indexes of productions which can be used based on the
+            # derivation method.
+            available = legal_production_indexes(method, remaining_depth,
+                                                 node.root)
+
+            # Randomly pick a production choice and set a matching codon based
+            # on its index.
+            prod_index = choice(available)
+            chosen_prod = productions['choices'][prod_index]
+            codon = randrange(productions['no_choices'], grammar.codon_size,
+                              productions['no_choices']) + prod_index
+
+            # Set the codon for the current node and append codon to the
+            # genome.
+            node.codon = codon
+            genome.append(codon)
+
+            # Initialise list of children for current node, one for each
+            # symbol in the chosen production.
+            node.children = [Tree(sym["symbol"], node) for sym in
+                             chosen_prod['choice']]
+
+            # Terminals of a production without non-terminals increase the
+            # depth of the branch by one.
+            branch_depth = depth if chosen_prod['NT_kids'] else depth + 1
+
+            if not chosen_prod['NT_kids']:
+                # Then the branch terminates here
+                nodes += 1
+
+            if branch_depth > max_depth:
+                # Set new maximum depth
+                max_depth = branch_depth
+
+            if root_depth is None:
+                # The depth of the root is returned.
+                root_depth = branch_depth
+
+            # Derive the children of the current node before its siblings.
+            stack.append((iter(zip(node.children, chosen_prod['choice'])),
+                          depth + 1))
+            break
+
+        else:
+            # All children of the iterator have been derived.
+            stack.pop()
+
+    return genome, output, nodes, root_depth, max_depth
 
 
 def legal_productions(method, depth_limit, root, productions):
@@ -179,6 +192,43 @@ def legal_productions(method, depth_limit, root, productions):
     return available
 
 
+def legal_production_indexes(method, depth_limit, root):
+    """
+    Returns the indexes of the production choices of legal_productions in
+    the production choices of a root. Indexes are kept in a table of the
+    grammar by derivation method, depth limit and root.
+
+    :param method: A string specifying the desired tree derivation method.
+    Current methods are "random" or "full".
+    :param depth_limit: The overall depth limit of the desired tree from the
+    current node.
+    :param root: The root of the current node.
+    :return: The list of indexes of available production choices based on
+    the specified derivation method.
+    """
+
+    grammar = params['BNF_GRAMMAR']
+
+    if depth_limit and depth_limit > grammar.max_arity + 1:
+        # All depth limits greater than the maximum arity of the grammar + 1
+        # have the same production choices.
+        depth_limit = grammar.max_arity + 2
+
+    try:
+        return grammar.production_tables[method][root][depth_limit]
+
+    except KeyError:
+        # Find the index of each production choice. Equal production choices
+        # have the index of the first one.
+        choices = grammar.rules[root]['choices']
+        indexes = [choices.index(prod) for prod in
+                   legal_productions(method, depth_limit, root, choices)]
+        grammar.production_tables.setdefault(method, {}).setdefault(
+            root, {})[depth_limit] = indexes
+
+        return indexes
+
+
 def pi_random_derivation(tree, max_depth):
     """
     Randomly builds a tree from a given root node up to a maximum given
@@ -219,16 +269,15 @@ def pi_random_derivation(tree, max_depth):
         # Set remaining depth.
         remaining_depth = max_depth - node.depth
 
-        # Find which productions can be used based on the derivation method.
-        available = legal_productions("random", remaining_depth, node.root,
-                                      productions['choices'])
+        # Find the indexes of productions which can be used based on the
+        # derivation method.
+        available = legal_production_indexes("random", remaining_depth,
+                                             node.root)
 
-        # Randomly pick a production choice.
-        chosen_prod = choice(available)
-
-        # Find the index of the chosen production and set a matching codon
-        # based on that index.
-        prod_index = productions['choices'].index(chosen_prod)
+        # Randomly pick a production choice and set a matching codon based
+        # on its index.
+        prod_index = choice(available)
+        chosen_prod = productions['choices'][prod_index]
         codon = randrange(productions['no_choices'],
                           params['BNF_GRAMMAR'].codon_size,
                           productions['no_choices']) + prod_index
@@ -321,21 +370,19 @@ def pi_grow(tree, max_depth):
             # choices.
 
             # Find which productions can be used based on the derivation method.
-            available = legal_productions("full", remaining_depth, node.root,
-                                          productions['choices'])
+            available = legal_production_indexes("full", remaining_depth,
+                                                 node.root)
         else:
             # Any production choices can be made.
             
             # Find which productions can be used based on the derivation method.
-            available = legal_productions("random", remaining_depth, node.root,
-                                          productions['choices'])
+            available = legal_production_indexes("random", remaining_depth,
+                                                 node.root)
         
-        # Randomly pick a production choice.
-        chosen_prod = choice(available)
-
-        # Find the index of the chosen production and set a matching codon
-        # based on that index.
-        prod_index = productions['choices'].index(chosen_prod)
+        # Randomly pick a production choice and set a matching codon based
+        # on its index.
+        prod_index = choice(available)
+        chosen_prod = productions['choices'][prod_index]
         codon = randrange(productions['no_choices'],
                           params['BNF_GRAMMAR'].codon_size,
                           productions['no_choices']) + prod_index
@@ -0,0 +1,221 @@
+import numpy as np
+
+from algorithm.mapper import get_table_mapper
+from representation.tree import Tree
+
+
+class FlatTree:
+    """
+    A derivation tree stored as arrays over its nodes in preorder: symbol ids
+    of algorithm.mapper.TableMapper (non-terminals >= 0, terminals < 0),
+    subtree sizes, depths, codons (-1 if none) and parent indexes (-1 for
+    the root). The arrays are never modified, so copies of a tree share them
+    and operators build new trees by splicing slices of arrays.
+    """
+
+    __slots__ = ('symbols', 'sizes', 'depths', 'codons', 'parents')
+
+    def __init__(self, symbols, sizes, depths, codons, parents):
+        """
+        Initialise an instance of the flat tree class.
+
+        :param symbols: Array of symbol ids of nodes.
+        :param sizes: Array of numbers of nodes in subtrees of nodes.
+        :param depths: Array of depths of nodes, 1 for the root.
+        :param codons: Array of codons of nodes, -1 for nodes without codon.
+        :param parents: Array of indexes of parents of nodes, -1 for the root.
+        """
+
+        self.symbols, self.sizes, self.depths, self.codons, self.parents = \
+            symbols, sizes, depths, codons, parents
+        for array in (symbols, sizes, depths, codons, parents):
+            array.flags.writeable = False
+
+    @staticmethod
+    def from_tree(tree):
+        """
+        Flattens an instance of the representation.tree.Tree class.
+
+        :param tree: A derivation tree.
+        :return: The equivalent flat tree.
+        """
+
+        table_mapper = get_table_mapper()
+        non_terminals = table_mapper.non_terminal_ids
+        symbols, sizes, depths, codons, parents = [], [], [], [], []
+
+        stack = [(tree, -1, 1)]
+        while stack:
+            node, parent, depth = stack.pop()
+            i = len(symbols)
+            symbols.append(table_mapper.symbol_id(node.root, node.root in
+                                                  non_terminals))
+            sizes.append(1)
+            depths.append(depth)
+            codons.append(-1 if node.codon is None else node.codon)
+            parents.append(parent)
+            stack.extend((child, i, depth + 1) for child in
+                         reversed(node.children))
+
+        # Nodes of a subtree follow their root in preorder, thus adding sizes
+        # in reverse order completes the sizes of all subtrees.
+        for i in range(len(symbols) - 1, 0, -1):
+            sizes[parents[i]] += sizes[i]
+
+        return FlatTree(np.array(symbols, dtype=np.int32),
+                        np.array(sizes, dtype=np.int32),
+                        np.array(depths, dtype=np.int32),
+                        np.array(codons, dtype=np.int32),
+                        np.array(parents, dtype=np.int32))
+
+    def to_tree(self):
+        """
+        Builds the equivalent instance of the representation.tree.Tree class.
+
+        :return: A derivation tree.
+        """
+
+        table_mapper = get_table_mapper()
+        nodes = []
+        for i, (symbol, depth, codon, parent) in enumerate(zip(
+                self.symbols.tolist(), self.depths.tolist(),
+                self.codons.tolist(), self.parents.tolist())):
+            node = Tree(table_mapper.symbol(symbol),
+                        nodes[parent] if parent >= 0 else None)
+            node.depth, node.codon = depth, None if codon < 0 else codon
+            if parent >= 0:
+                nodes[parent].children.append(node)
+            nodes.append(node)
+
+        return nodes[0]
+
+    def __str__(self):
+        return str(self.to_tree())
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __copy__(self):
+        """
+        Creates a copy of self, which shares the arrays of self.
+
+        :return: A copy of self.
+        """
+
+        return FlatTree(self.symbols, self.sizes, self.depths, self.codons,
+                        self.parents)
+
+    def root(self, i):
+        """
+        Returns the string of the symbol of a node.
+
+        :param i: The index of the node.
+        :return: The string of the symbol.
+        """
+
+        return get_table_mapper().symbol(int(self.symbols[i]))
+
+    def splice(self, i, other, j):
+        """
+        Returns a new tree, in which the subtree of node i is replaced with
+        the subtree of node j of another tree.
+
+        :param i: The index of the replaced node in self.
+        :param other: Another flat tree.
+        :param j: The index of the inserted node in other.
+        :return: A new flat tree.
+        """
+
+        end, other_end = i + self.sizes[i], j + other.sizes[j]
+        delta = (other_end - j) - (end - i)
+
+        # Ancestors of node i contain the size difference.
+        sizes = self.sizes[:i].copy()
+        sizes[np.arange(i) + sizes > i] += delta
+
+        # Parents of nodes after the subtree move by the size difference.
+        tail_parents = self.parents[end:]
+        tail_parents = np.where(tail_parents > i, tail_parents + delta,
+                                tail_parents)
+
+        parents = other.parents[j:other_end] + (i - j)
+        parents[0] = self.parents[i]
+
+        splice = lambda head, middle, tail: np.concatenate((head, middle,
+                                                            tail))
+        return FlatTree(
+            splice(self.symbols[:i], other.symbols[j:other_end],
+                   self.symbols[end:]),
+            splice(sizes, other.sizes[j:other_end], self.sizes[end:]),
+            splice(self.depths[:i], other.depths[j:other_end] +
+                   (self.depths[i] - other.depths[j]), self.depths[end:]),
+            splice(self.codons[:i], other.codons[j:other_end],
+                   self.codons[end:]),
+            splice(self.parents[:i], parents, tail_parents))
+
+    def get_target_nodes(self, array, target=None):
+        """
+        Returns indexes of all NT nodes which match the target NT list in
+        preorder.
+
+        :param array: The array of indexes of all nodes that match the
+        target.
+        :param target: The target nodes to match.
+        :return: The array of indexes of all nodes that match the target.
+        """
+
+        table_mapper = get_table_mapper()
+        ids = [table_mapper.non_terminal_ids[t] for t in target if t in
+               table_mapper.non_terminal_ids]
+        array.extend(np.flatnonzero(np.isin(self.symbols, ids)).tolist())
+        return array
+
+    def get_node_labels(self, labels):
+        """
+        Adds all node roots to a set.
+
+        :param labels: The set of roots of all nodes in the tree.
+        :return: The set of roots of all nodes in the tree.
+        """
+
+        table_mapper = get_table_mapper()
+        labels.update(table_mapper.symbol(s) for s in
+                      np.unique(self.symbols).tolist())
+        return labels
+
+    def get_tree_info(self, nt_keys, genome, output, invalid=False,
+                      max_depth=0, nodes=0):
+        """
+        Returns all necessary information on a tree required to generate an
+        individual, identical to Tree.get_tree_info(). Non-terminals are
+        known from symbol ids, thus nt_keys is not used.
+
+        :return: genome, output, invalid, max_depth, nodes.
+        """
+
+        table_mapper = get_table_mapper()
+
+        # Nodes with children and the root are expanded.
+        expanded = self.sizes > 1
+        expanded[0] = True
+        non_terminal = self.symbols >= 0
+
+        # Expanded nodes with only terminal children count twice and
+        # increase the depth by one.
+        nt_children = np.bincount(self.parents[1:][non_terminal[1:]],
+                                  minlength=len(self.symbols))
+        terminating = expanded & (nt_children == 0)
+
+        nodes += int(expanded.sum() + terminating.sum())
+        max_depth = max(max_depth, int(self.depths[expanded].max()))
+        if terminating.any():
+            max_depth = max(max_depth, int(self.depths[terminating].max()) + 1)
+
+        genome.extend(self.codons[expanded & (self.codons > 0)].tolist())
+        output.extend(table_mapper.symbol(s) for s in
+                      self.symbols[~expanded].tolist())
+
+        # Non-terminals without children are unexpanded.
+        invalid = invalid or bool((non_terminal & (self.sizes == 1)).any())
+
+        return genome, output, invalid, max_depth, nodes
@@ -0,0 +1,85 @@
+from array import array
+
+import numpy as np
+
+# Codons are stored as the item type of genomes of individuals ('I').
+CODON_DTYPE = np.uintc
+
+
+def pack(genomes):
+    """
+    Stores genomes in a 2-D array padded with zeros.
+
+    :param genomes: A list of genomes.
+    :return: The array of genomes and the array of their lengths.
+    """
+
+    lengths = np.fromiter((len(genome) for genome in genomes), dtype=np.int64,
+                          count=len(genomes))
+    packed = np.zeros((len(genomes), max(lengths.max(initial=0), 1)),
+                      dtype=CODON_DTYPE)
+
+    for row, genome in zip(packed, genomes):
+        if isinstance(genome, array):
+            # Copy the buffer of the genome.
+            genome = np.frombuffer(genome, dtype=CODON_DTYPE)
+        row[:len(genome)] = genome
+
+    return packed, lengths
+
+
+def unpack(genomes, lengths):
+    """
+    Returns the genomes of a padded 2-D array.
+
+    :param genomes: The array of genomes.
+    :param lengths: The array of lengths of genomes.
+    :return: A list of genomes.
+    """
+
+    unpacked = []
+    for row, length in zip(genomes, lengths.tolist()):
+        genome = array('I')
+        genome.frombytes(row[:length].tobytes())
+        unpacked.append(genome)
+
+    return unpacked
+
+
+def splice(genomes, lengths, rows_0, rows_1, a, b, c, d):
+    """
+    Builds new genomes of the form genome_0[:a] + genome_1[b:c] +
+    genome_0[d:], where genome_0 and genome_1 are rows of a padded 2-D
+    array. Indexes are clipped like slices of lists.
+
+    :param genomes: The array of genomes.
+    :param lengths: The array of lengths of genomes.
+    :param rows_0: The rows of genome_0 of all new genomes.
+    :param rows_1: The rows of genome_1 of all new genomes.
+    :param a: The end of the head of genome_0 of all new genomes.
+    :param b: The start of the part of genome_1 of all new genomes.
+    :param c: The end of the part of genome_1 of all new genomes.
+    :param d: The start of the tail of genome_0 of all new genomes.
+    :return: The array of new genomes and the array of their lengths.
+    """
+
+    length_0, length_1 = lengths[rows_0], lengths[rows_1]
+    a, d = np.minimum(a, length_0), np.minimum(d, length_0)
+    b, c = np.minimum(b, length_1), np.minimum(c, length_1)
+    middle = np.maximum(c - b, 0)
+    new_lengths = a + middle + (length_0 - d)
+
+    # Take each column of the new genomes from the part it falls into.
+    columns = np.arange(max(new_lengths.max(initial=0), 1))
+    in_head = columns < a[:, None]
+    in_middle = ~in_head & (columns < (a + middle)[:, None])
+    source = np.where(in_middle, columns - a[:, None] + b[:, None],
+                      columns - (a + middle)[:, None] + d[:, None])
+    source = np.where(in_head, columns, source)
+    source = np.clip(source, 0, genomes.shape[1] - 1)
+
+    new_genomes = np.where(in_middle, genomes[rows_1[:, None], source],
+                           genomes[rows_0[:, None], source])
+    new_genomes[columns >= new_lengths[:, None]] = 0
+
+    return new_genomes, new_lengths
@@ -1,10 +1,19 @@
-from math import floor
+import pickle
+from hashlib import sha256
+from math import floor, prod
+from os import makedirs, path, replace, unlink
 from re import match, finditer, DOTALL, MULTILINE
 from sys import maxsize
+from tempfile import mkstemp
 
 from algorithm.parameters import params
 
 
+# Version of analysed grammars in params['GRAMMAR_CACHE_DIR']. Increase it
+# when the analysis changes.
+CACHE_VERSION = 2
+
+
 class Grammar(object):
     """
     Parser for Backus-Naur Form (BNF) Context-Free Grammars.
@@ -33,37 +42,63 @@ class Grammar(object):
         # each derivation tree depth.
         self.rules, self.permutations = {}, {}
 
+        # Tables for counting permutations, built by
+        # check_all_permutations().
+        self.permutation_counts = None
+
         # Initialise dicts for terminals and non terminals, set params.
         self.non_terminals, self.terminals = {}, {}
         self.start_rule, self.codon_size = None, params['CODON_SIZE']
         self.min_path, self.max_arity, self.min_ramp = None, None, None
 
+        # Integer-indexed production tables of the grammar, compiled by
+        # algorithm.mapper.TableMapper on first use.
+        self.table_mapper = None
+
+        # Indexes of legal production choices by derivation method, depth
+        # limit and root, built by
+        # representation.derivation.legal_production_indexes.
+        self.production_tables = {}
+
         # Set regular expressions for parsing BNF grammar.
         self.ruleregex = '(?P<rulename><\S+>)\s*::=\s*(?P<production>(?:(?=\#)\#[^\r\n]*|(?!<\S+>\s*::=).+?)+)'
         self.productionregex = '(?=\#)(?:\#.*$)|(?!\#)\s*(?P<production>(?:[^\'\"\|\#]+|\'.*?\'|".*?")+)'
         self.productionpartsregex = '\ *([\r\n]+)\ *|([^\'"<\r\n]+)|\'(.*?)\'|"(.*?)"|(?P<subrule><[^>|\s]+>)|([<]+)'
 
-        # Read in BNF grammar, set production rules, terminals and
-        # non-terminals.
-        self.read_bnf_file(file_name)
+        if params['GRAMMAR_CACHE_DIR']:
+            # Analysed grammars are cached by grammar and parameters.
+            cache_file = self.get_cache_file(file_name)
 
-        # Check the minimum depths of all non-terminals in the grammar.
-        self.check_depths()
+        else:
+            cache_file = None
+
+        if not cache_file or not self.load_cache(cache_file):
+            # Read in BNF grammar, set production rules, terminals and
+            # non-terminals.
+            self.read_bnf_file(file_name)
+
+            # Check the minimum depths of all non-terminals in the grammar.
+            self.check_depths()
 
-        # Check which non-terminals are recursive.
-        self.check_recursion(self.start_rule["symbol"], [])
+            # Check which non-terminals are recursive.
+            self.check_recursion(self.start_rule["symbol"], [])
 
-        # Set the minimum path and maximum arity of the grammar.
-        self.set_arity()
+            # Set the minimum path and maximum arity of the grammar.
+            self.set_arity()
 
-        # Generate lists of recursive production choices and shortest
-        # terminating path production choices for each NT in the grammar.
-        # Enables faster tree operations.
-        self.set_grammar_properties()
+            # Generate lists of recursive production choices and shortest
+            # terminating path production choices for each NT in the grammar.
+            # Enables faster tree operations.
+            self.set_grammar_properties()
 
-        # Calculate the total number of derivation tree permutations and
-        # combinations that can be created by a grammar at a range of depths.
-        self.check_permutations()
+            # Calculate the total number of derivation tree permutations and
+            # combinations that can be created by a grammar at a range of
+            # depths.
+            self.check_permutations()
+
+            if cache_file:
+                # Save the analysed grammar for later runs.
+                self.save_cache(cache_file)
 
         if params['MIN_INIT_TREE_DEPTH']:
             # Set the minimum ramping tree depth from the command line.
@@ -82,6 +117,76 @@ class Grammar(object):
             # subtrees.
             self.find_concatenation_NTs()
 
+    def get_cache_file(self, file_name):
+        """
+        Returns the name of the cache file of a grammar file, which depends
+        on the content of the grammar file and all parameters used to
+        analyse the grammar.
+
+        :param file_name: A specified BNF grammar file.
+        :return: The name of the cache file.
+        """
+
+        with open(file_name, 'rb') as bnf:
+            content = bnf.read()
+
+        # Ranges of GE_RANGE:dataset_n_vars, dataset_n_is and dataset_n_os.
+        ranges = [getattr(params['FITNESS_FUNCTION'], n, None) for n in
+                  ("n_vars", "n_is", "n_os")] if b"GE_RANGE:" in content \
+            else []
+
+        key = sha256(content)
+        key.update(repr((CACHE_VERSION, self.python_mode, self.codon_size,
+                         params['PERMUTATION_RAMPS'], ranges)).encode())
+
+        return path.join(params['GRAMMAR_CACHE_DIR'], key.hexdigest() +
+                         ".pickle")
+
+    def load_cache(self, cache_file):
+        """
+        Loads an analysed grammar from a cache file.
+
+        :param cache_file: The name of the cache file.
+        :return: True if the grammar was loaded, False if the cache file
+        does not exist or cannot be read.
+        """
+
+        try:
+            with open(cache_file, 'rb') as cache:
+                self.__dict__.update(pickle.load(cache))
+
+        except Exception:
+            # The file is missing, partial or from another version.
+            return False
+
+        return True
+
+    def save_cache(self, cache_file):
+        """
+        Saves the analysed grammar to a cache file. The file is replaced
+        atomically, thus concurrent runs never read a partial file. Errors
+        are ignored, the grammar is analysed again in later runs.
+
+        :param cache_file: The name of the cache file.
+        :return: Nothing.
+        """
+
+        try:
+            makedirs(path.dirname(cache_file), exist_ok=True)
+            fd, tmp_file = mkstemp(dir=path.dirname(cache_file))
+
+            try:
+                with open(fd, 'wb') as cache:
+                    pickle.dump(vars(self), cache, pickle.HIGHEST_PROTOCOL)
+                replace(tmp_file, cache_file)
+
+            except BaseException:
+                unlink(tmp_file)
+                raise
+
+        except OSError:
+            pass
+
     def read_bnf_file(self, file_name):
         """
         Read a grammar file in BNF format. Parses the grammar and saves a
@@ -462,85 +567,66 @@ class Grammar(object):
             # depth.
             return self.permutations[depth]
 
-        else:
-            # Calculate permutations at the requested depth.
-            # Initialise empty data arrays.
-            pos, depth_per_symbol_trees, productions = 0, {}, []
+        if self.permutation_counts is None:
+            # Number production choices which contain non-terminal choices
+            # by their symbols, and non-terminals by their order.
+            production_ids, nt_ids = {}, {NT: i for i, NT in
+                                          enumerate(self.non_terminals)}
+            productions, terminal_choices, nt_productions = [], [], []
 
             for NT in self.non_terminals:
-                # Iterate over all non-terminals to fill out list of
-                # productions which contain non-terminal choices.
-                a = self.non_terminals[NT]
-
-                for rule in self.rules[a['id']]['choices']:
-                    if rule['NT_kids']:
-                        productions.append(rule)
-
-            # Get list of all production choices from the start symbol.
-            start_symbols = self.rules[self.start_rule["symbol"]]['choices']
-
-            for choice in productions:
-                # Generate a list of the symbols of each production choice
-                key = str([sym['symbol'] for sym in choice['choice']])
-
-                # Initialise permutations dictionary with the list
-                depth_per_symbol_trees[key] = {}
-
-            for i in range(2, depth + 1):
-                # Find all the possible permutations from depth of min_path up
-                # to a specified depth
-
-                for choice in productions:
-                    # Iterate over all production choices
-                    sym_pos = 1
-
-                    for j in choice['choice']:
-                        # Iterate over all symbols in a production choice.
-                        symbol_arity_pos = 0
-
-                        if j["type"] is "NT":
-                            # We are only interested in non-terminal symbols
-                            for child in self.rules[j["symbol"]]['choices']:
-                                # Iterate over all production choices for
-                                # each NT symbol in the original choice.
-
-                                if len(child['choice']) == 1 and \
-                                   child['choice'][0]["type"] == "T":
-                                    # If the child choice leads directly to
-                                    # a single terminal, increment the
-                                    # permutation count.
-                                    symbol_arity_pos += 1
-
-                                else:
-                                    # The child choice does not lead
-                                    # directly to a single terminal.
-                                    # Generate a key for the permutations
-                                    # dictionary and increment the
-                                    # permutations count there.
-                                    key = [sym['symbol'] for sym in child['choice']]
-                                    if (i - 1) in depth_per_symbol_trees[str(key)].keys():
-                                        symbol_arity_pos += depth_per_symbol_trees[str(key)][i - 1]
-
-                            # Multiply original count by new count.
-                            sym_pos *= symbol_arity_pos
-
-                    # Generate new key for the current production choice and
-                    # set the new value in the permutations dictionary.
-                    key = [sym['symbol'] for sym in choice['choice']]
-                    depth_per_symbol_trees[str(key)][i] = sym_pos
-
-            # Calculate permutations for the start symbol.
-            for sy in start_symbols:
-                key = [sym['symbol'] for sym in sy['choice']]
-                if str(key) in depth_per_symbol_trees:
-                    pos += depth_per_symbol_trees[str(key)][depth] if depth in depth_per_symbol_trees[str(key)] else 0
-                else:
-                    pos += 1
-
-            # Set the overall permutations dictionary for the current depth.
-            self.permutations[depth] = pos
+                # Count the production choices of each non-terminal which
+                # lead directly to terminals, and find the others.
+                terminal_choices.append(0)
+                nt_productions.append([])
+
+                for choice in self.rules[NT]['choices']:
+                    if not choice['NT_kids']:
+                        terminal_choices[-1] += 1
+                        continue
 
-            return pos
+                    key = tuple(sym['symbol'] for sym in choice['choice'])
+                    if key not in production_ids:
+                        production_ids[key] = len(productions)
+                        productions.append([nt_ids[sym['symbol']] for sym in
+                                            choice['choice'] if
+                                            sym['type'] == "NT"])
+                    nt_productions[-1].append(production_ids[key])
+
+            # Permutations of the start symbol sum over its choices.
+            start = [production_ids.get(tuple(
+                sym['symbol'] for sym in choice['choice'])) for choice in
+                self.rules[self.start_rule["symbol"]]['choices']]
+
+            # Permutations of each production choice by depth, starting with
+            # no permutations at depth 1.
+            self.permutation_counts = {
+                'productions': productions,
+                'terminal_choices': terminal_choices,
+                'nt_productions': nt_productions,
+                'start': start,
+                'depths': [[0] * len(productions)]}
+
+        counts = self.permutation_counts
+        depths = counts['depths']
+
+        while len(depths) < depth:
+            # Permutations of a production choice at the next depth multiply
+            # the permutations of its non-terminals at the current depth.
+            nt_counts = [terminals + sum(depths[-1][i] for i in choices) for
+                         terminals, choices in zip(counts['terminal_choices'],
+                                                   counts['nt_productions'])]
+            depths.append([prod(nt_counts[i] for i in production) for
+                           production in counts['productions']])
+
+        # Calculate permutations for the start symbol.
+        pos = sum(1 if i is None else depths[depth - 1][i] for i in
+                  counts['start'])
+
+        # Set the overall permutations dictionary for the current depth.
+        self.permutations[depth] = pos
+
+        return pos
 
     def get_min_ramp_depth(self):
         """
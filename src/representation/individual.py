@@ -1,7 +1,12 @@
+from array import array
+from copy import copy
+
 import numpy as np
 
-from algorithm.mapper import mapper
+from algorithm.mapper import mapper, map_tree_from_genome
 from algorithm.parameters import params
+from representation.flat_tree import FlatTree
+from representation.tree import Tree
 
 
 class Individual(object):
@@ -9,6 +14,12 @@ class Individual(object):
     A GE individual.
     """
 
+    # Attributes set only by some fitness functions and statistics (e.g.,
+    # training_fitness) are kept in __dict__, which is created on demand.
+    __slots__ = ('phenotype', '_genome', '_tree', 'nodes', 'invalid', 'depth',
+                 'used_codons', 'fitness', 'runtime_error', 'name', 'samples',
+                 '__dict__')
+
     def __init__(self, genome, ind_tree, map_ind=True):
         """
         Initialise an instance of the individual class (i.e. create a new
@@ -27,13 +38,59 @@ class Individual(object):
             self.phenotype, self.genome, self.tree, self.nodes, self.invalid, \
                 self.depth, self.used_codons = mapper(genome, ind_tree)
 
+            if self._tree is None and not params['GENOME_OPERATIONS']:
+                # The tree is built from the genome on first use
+                # (params['LAZY_TREES']).
+                self._tree = _UNMAPPED
+
         else:
             # The individual does not need to be mapped.
             self.genome, self.tree = genome, ind_tree
 
+        if params['FLAT_TREES'] and isinstance(self._tree, Tree):
+            # Store the derivation tree as arrays.
+            self._tree = FlatTree.from_tree(self._tree)
+
         self.fitness = params['FITNESS_FUNCTION'].default_fitness
         self.runtime_error = False
         self.name = None
+        # Data of the fitness function inherited by offspring (e.g.,
+        # positive samples of the ZIMPL fitness function).
+        self.samples = None
+
+    @property
+    def genome(self):
+        """
+        The genome of the individual. Linear genomes are stored as
+        array('I').
+        """
+
+        return self._genome
+
+    @genome.setter
+    def genome(self, genome):
+        self._genome = array('I', genome) if isinstance(genome, list) else \
+            genome
+
+    @property
+    def tree(self):
+        """
+        The derivation tree of the individual. If the individual was mapped
+        from its genome without a tree, the tree is built on first use.
+        """
+
+        if self._tree is _UNMAPPED:
+            self._tree = map_tree_from_genome(list(self._genome))[2]
+
+            if params['FLAT_TREES']:
+                # Store the derivation tree as arrays.
+                self._tree = FlatTree.from_tree(self._tree)
+
+        return self._tree
+
+    @tree.setter
+    def tree(self, tree):
+        self._tree = tree
 
     def __lt__(self, other):
         """
@@ -88,15 +145,23 @@ class Individual(object):
         :return: A unique copy of the individual.
         """
 
-        if not params['GENOME_OPERATIONS']:
-            # Create a new unique copy of the tree.
-            new_tree = self.tree.__copy__()
+        if params['GENOME_OPERATIONS'] or self._tree is _UNMAPPED:
+            new_tree = None
+
+        elif params['PERSISTENT_TREES']:
+            # Trees are not modified in place, share the tree.
+            new_tree = self.tree
 
         else:
-            new_tree = None
+            # Create a new unique copy of the tree.
+            new_tree = self.tree.__copy__()
 
         # Create a copy of self by initialising a new individual.
-        new_ind = Individual(self.genome.copy(), new_tree, map_ind=False)
+        new_ind = Individual(copy(self.genome), new_tree, map_ind=False)
+
+        if self._tree is _UNMAPPED:
+            # The copy builds its tree on first use, too.
+            new_ind._tree = _UNMAPPED
 
         # Set new individual parameters (no need to map genome to new
         # individual).
@@ -104,6 +169,7 @@ class Individual(object):
         new_ind.depth, new_ind.nodes = self.depth, self.nodes
         new_ind.used_codons = self.used_codons
         new_ind.runtime_error = self.runtime_error
+        new_ind.samples = self.samples
 
         return new_ind
 
@@ -123,3 +189,19 @@ class Individual(object):
 
         if params['MULTICORE']:
             return self
+
+
+class _Unmapped(object):
+    """
+    Marks trees of individuals to be built from the genome on first use.
+    Pickled by reference, so that unpickled individuals (e.g., of multicore
+    evaluation or saved states) still build their trees.
+    """
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return '_UNMAPPED'
+
+
+_UNMAPPED = _Unmapped()
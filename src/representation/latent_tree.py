@@ -29,7 +29,7 @@ derivation trees.
 
 
 from algorithm.parameters import params
-from representation.derivation import legal_productions
+from representation.derivation import legal_production_indexes
 import random
 
 
@@ -74,9 +74,9 @@ def latent_tree_random_ind(grammar, maxdepth, old_genome=None):
             # finish recursion is less than or equal to max depth
             # minus our current depth).
             productions = params['BNF_GRAMMAR'].rules[s]
-            available = legal_productions("random", depth, s, productions['choices'])
-            prod = random.choice(available) # choose production
-            gi = productions['choices'].index(prod) # find its index
+            available = legal_production_indexes("random", depth, s)
+            gi = random.choice(available) # choose index of production
+            prod = productions['choices'][gi]
             
         genome[name] = gi
 
@@ -0,0 +1,82 @@
+import os, sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.parameters import params
+from representation.grammar import Grammar
+
+grammar_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "grammars")
+
+# Grammars whose analysis does not finish (check_depths, check_recursion) or fails before permutations are counted.
+broken_grammars = {"LP.bnf", "QP.bnf", "ZIMPL.bnf", "ZIMPL-dedicated.bnf", "ZIMPL-full-incomplete.bnf"}
+
+
+class RangeFitness:
+    """Fitness function providing ranges of GE_RANGE:dataset_n_vars, dataset_n_is and dataset_n_os."""
+    n_vars, n_is, n_os = 3, 2, 1
+
+
+def reference_permutations(grammar: Grammar, depth: int) -> int:
+    """The former Grammar.check_all_permutations, which rebuilds the counts of all productions up to depth."""
+    pos, depth_per_symbol_trees, productions = 0, {}, []
+    for NT in grammar.non_terminals:
+        for rule in grammar.rules[grammar.non_terminals[NT]['id']]['choices']:
+            if rule['NT_kids']:
+                productions.append(rule)
+    start_symbols = grammar.rules[grammar.start_rule["symbol"]]['choices']
+    for choice in productions:
+        depth_per_symbol_trees[str([sym['symbol'] for sym in choice['choice']])] = {}
+    for i in range(2, depth + 1):
+        for choice in productions:
+            sym_pos = 1
+            for j in choice['choice']:
+                symbol_arity_pos = 0
+                if j["type"] == "NT":
+                    for child in grammar.rules[j["symbol"]]['choices']:
+                        if len(child['choice']) == 1 and child['choice'][0]["type"] == "T":
+                            symbol_arity_pos += 1
+                        else:
+                            key = str([sym['symbol'] for sym in child['choice']])
+                            if (i - 1) in depth_per_symbol_trees[key]:
+                                symbol_arity_pos += depth_per_symbol_trees[key][i - 1]
+                    sym_pos *= symbol_arity_pos
+            depth_per_symbol_trees[str([sym['symbol'] for sym in choice['choice']])][i] = sym_pos
+    for sy in start_symbols:
+        key = str([sym['symbol'] for sym in sy['choice']])
+        if key in depth_per_symbol_trees:
+            pos += depth_per_symbol_trees[key].get(depth, 0)
+        else:
+            pos += 1
+    return pos
+
+
+class PermutationTests(unittest.TestCase):
+    def setUp(self):
+        self._params = dict(params)
+        params["GRAMMAR_CACHE_DIR"] = None
+        params["FITNESS_FUNCTION"] = RangeFitness()
+
+    def tearDown(self):
+        params.clear()
+        params.update(self._params)
+
+    def test_permutations_match_reference(self):
+        files = sorted(os.path.relpath(os.path.join(root, f), grammar_dir)
+                       for root, _, names in os.walk(grammar_dir) for f in names if f.endswith("bnf"))
+        self.assertTrue(files)
+        for file in files:
+            if file in broken_grammars:
+                continue
+            with self.subTest(grammar=file):
+                grammar = Grammar(os.path.join(grammar_dir, file))
+                depths = sorted(grammar.permutations)
+                self.assertTrue(depths)
+
+                # check_permutations keeps the permutations of each depth less those of smaller depths, count again.
+                grammar.permutations = {}
+                for depth in depths:
+                    self.assertEqual(grammar.check_all_permutations(depth), reference_permutations(grammar, depth))
+
+
+if __name__ == '__main__':
+    unittest.main()
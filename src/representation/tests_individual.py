@@ -0,0 +1,95 @@
+import os, sys
+import pickle
+import random
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.mapper import map_tree_from_genome
+from algorithm.parameters import params, set_params
+from representation import individual
+from representation.individual import Individual
+from stats.stats import stats
+from utilities.representation.check_methods import check_genome_mapping
+
+
+def random_individual(length=100):
+    """A valid individual mapped from a random genome."""
+    while True:
+        ind = Individual([random.randint(0, params['CODON_SIZE']) for _ in range(length)], None)
+        if not ind.invalid:
+            return ind
+
+
+class IndividualTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # set_params removes stats and cannot run twice, parameters are restored for each test
+        cls._params, cls._stats = dict(params), dict(stats)
+        set_params(["--parameters", "pymax.txt", "--random_seed", "1"], create_files=False)
+        cls._pymax_params = dict(params)
+
+    @classmethod
+    def tearDownClass(cls):
+        params.clear()
+        params.update(cls._params)
+        stats.update(cls._stats)
+
+    def setUp(self):
+        params.clear()
+        params.update(self._pymax_params)
+        # subtree operators, trees are built from genomes on first use
+        params['GENOME_OPERATIONS'] = False
+        params['LAZY_TREES'] = True
+        random.seed(1)
+
+    def test_lazy_tree(self):
+        ind = random_individual()
+        self.assertIs(ind._tree, individual._UNMAPPED)
+        self.assertEqual(ind.tree, map_tree_from_genome(list(ind.genome))[2])
+        self.assertIsNot(ind._tree, individual._UNMAPPED)
+
+    def test_pickle_unmapped(self):
+        ind = random_individual()
+        ind.fitness = 1.5
+        clone = pickle.loads(pickle.dumps(ind))
+        self.assertIs(clone._tree, individual._UNMAPPED)
+        self.assertEqual((clone.phenotype, clone.genome, clone.fitness, clone.nodes, clone.depth),
+                         (ind.phenotype, ind.genome, ind.fitness, ind.nodes, ind.depth))
+        self.assertEqual(clone.tree, ind.tree)
+        self.assertEqual(clone.deep_copy().tree, ind.tree)
+
+    def test_deep_copy_unmapped(self):
+        ind = random_individual()
+        clone = ind.deep_copy()
+        self.assertIs(clone._tree, individual._UNMAPPED)
+        self.assertIsNot(clone.genome, ind.genome)
+        self.assertEqual(clone.genome, ind.genome)
+        self.assertEqual(clone.tree, ind.tree)
+        clone.genome[0] += 1
+        self.assertNotEqual(clone.genome, ind.genome)
+
+    def test_deep_copy_mapped(self):
+        ind = random_individual()
+        ind.tree
+        clone = ind.deep_copy()
+        self.assertIsNot(clone._tree, ind._tree)
+        self.assertEqual(clone.tree, ind.tree)
+
+    def test_check_genome_mapping(self):
+        ind = random_individual()
+        check_genome_mapping(ind)
+        ind.tree
+        check_genome_mapping(ind)
+
+        ind.phenotype += " "
+        self.assertRaises(Exception, check_genome_mapping, ind)
+
+    def test_check_genome_mapping_genome_operations(self):
+        params['GENOME_OPERATIONS'] = True
+        ind = random_individual()
+        self.assertIsNone(ind._tree)
+        check_genome_mapping(ind)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os, sys
+import random
+import unittest
+from copy import copy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.parameters import params, set_params
+from operators import crossover, mutation
+from representation.individual import Individual
+from stats.stats import stats
+from utilities.representation.check_methods import get_output
+
+
+def random_individual(length=100):
+    """A valid individual mapped from a random genome, with its tree built."""
+    while True:
+        ind = Individual([random.randint(0, params['CODON_SIZE']) for _ in range(length)], None)
+        if not ind.invalid:
+            ind.tree
+            return ind
+
+
+def replaced_in_place(tree, path, subtree):
+    """The result of Tree.replace, computed by modifying a copy of tree."""
+    tree, subtree = copy(tree), copy(subtree)
+    if not path:
+        subtree.parent = None
+        return subtree
+    parent = tree.get_node(path[:-1])
+    parent.children[path[-1]] = subtree
+    subtree.parent = parent
+    return tree
+
+
+class TreeTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # set_params removes stats and cannot run twice, parameters are restored for each test
+        cls._params, cls._stats = dict(params), dict(stats)
+        set_params(["--parameters", "pymax.txt", "--random_seed", "1"], create_files=False)
+        cls._pymax_params = dict(params)
+
+    @classmethod
+    def tearDownClass(cls):
+        params.clear()
+        params.update(cls._params)
+        stats.update(cls._stats)
+
+    def setUp(self):
+        params.clear()
+        params.update(self._pymax_params)
+        params['GENOME_OPERATIONS'] = False
+        params['CROSSOVER'] = crossover.subtree
+        params['MUTATION'] = mutation.subtree
+        random.seed(1)
+
+    def test_replace(self):
+        for _ in range(20):
+            tree_0, tree_1 = random_individual().tree, random_individual().tree
+            before_0, before_1 = copy(tree_0), copy(tree_1)
+            path = random.choice(tree_0.get_index()[1])
+            subtree = tree_1.get_node(random.choice(tree_1.get_index()[1]))
+
+            new_tree = tree_0.replace(path, subtree)
+
+            # Both trees are unchanged, the new tree shares the subtree.
+            self.assertEqual(tree_0, before_0)
+            self.assertEqual(tree_1, before_1)
+            self.assertIs(new_tree.get_node(path).children, subtree.children)
+            self.assertEqual(get_output(new_tree), get_output(replaced_in_place(tree_0, path, subtree)))
+
+    def test_replace_root(self):
+        tree_0, tree_1 = random_individual().tree, random_individual().tree
+        new_tree = tree_0.replace((), tree_1)
+        self.assertIsNone(new_tree.parent)
+        self.assertEqual(get_output(new_tree), get_output(tree_1))
+
+    def test_persistent_operators(self):
+        parents = [random_individual() for _ in range(20)]
+        offspring = {}
+        for persistent in (False, True):
+            params['PERSISTENT_TREES'] = persistent
+            snapshots = [(ind.phenotype, copy(ind.tree)) for ind in parents]
+            random.seed(2)
+            inds = []
+            for i in range(0, len(parents), 2):
+                inds += crossover.crossover_inds(parents[i], parents[i + 1]) or []
+            inds += [mutation.mutation_ind(ind.deep_copy()) for ind in parents]
+
+            # Parents share their trees with offspring, but are unchanged.
+            self.assertEqual([(ind.phenotype, ind.tree) for ind in parents], snapshots)
+            offspring[persistent] = [ind.phenotype for ind in inds]
+
+        # Both modes make the same picks.
+        self.assertEqual(offspring[True], offspring[False])
+
+    def test_persistent_flat_trees(self):
+        # Flat trees are spliced, persistent trees do not change their operators.
+        params['FLAT_TREES'] = True
+        parents = [random_individual() for _ in range(20)]
+        offspring = {}
+        for persistent in (False, True):
+            params['PERSISTENT_TREES'] = persistent
+            random.seed(2)
+            inds = []
+            for i in range(0, len(parents), 2):
+                inds += crossover.crossover_inds(parents[i], parents[i + 1]) or []
+            inds += [mutation.mutation_ind(ind.deep_copy()) for ind in parents]
+            offspring[persistent] = [ind.phenotype for ind in inds]
+
+        self.assertEqual(offspring[True], offspring[False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,6 +19,9 @@ class Tree:
         self.children = []
         self.snippet = None
 
+        # Paths of non-terminal nodes, built by get_index().
+        self.index = None
+
     def __str__(self):
         """
         Builds a string of the current tree.
@@ -56,21 +59,34 @@ class Tree:
 
         # Copy current tree by initialising a new instance of the tree class.
         tree_copy = Tree(self.root, self.parent)
-        
+
         # Set node parameters.
         tree_copy.codon, tree_copy.depth = self.codon, self.depth
 
         tree_copy.snippet = self.snippet
 
-        for child in self.children:
-            # Recurse through all children.
-            new_child = child.__copy__()
-            
-            # Set the parent of the copied child as the copied parent.
-            new_child.parent = tree_copy
-            
-            # Append the copied child to the copied parent.
-            tree_copy.children.append(new_child)
+        # Copy nodes with children from an explicit stack of pairs of original
+        # and copied nodes, deep trees do not exceed the recursion limit.
+        stack = [(self, tree_copy)]
+
+        while stack:
+            node, node_copy = stack.pop()
+
+            for child in node.children:
+                # Set the parent of the copied child as the copied parent.
+                new_child = Tree(child.root, node_copy)
+
+                # Set node parameters.
+                new_child.codon, new_child.depth = child.codon, child.depth
+
+                new_child.snippet = child.snippet
+
+                # Append the copied child to the copied parent.
+                node_copy.children.append(new_child)
+
+                if child.children:
+                    # Copy the children of the child later.
+                    stack.append((child, new_child))
 
         return tree_copy
 
@@ -87,7 +103,7 @@ class Tree:
         a_self, a_other = vars(self), vars(other)
                 
         # Don't look at the children as they are class instances themselves.
-        taboo = ["parent", "children", "snippet", "id"]
+        taboo = ["parent", "children", "snippet", "id", "index"]
         self_no_kids = {k: v for k, v in a_self.items() if k not in taboo}
         other_no_kids = {k: v for k, v in a_other.items() if k not in taboo}
                 
@@ -142,6 +158,92 @@ class Tree:
         
         return array
 
+    def get_index(self):
+        """
+        Returns the index of non-terminal nodes of the tree, which is built
+        once and kept with the tree. Nodes are identified by their path,
+        i.e. a tuple of indexes of children from the root. The index must
+        not be used after the tree was modified, trees are not modified in
+        place with params['PERSISTENT_TREES'].
+
+        :return: A tuple of a dict of lists of paths of nodes by
+        non-terminal and a list of paths of all non-terminal nodes, both in
+        the order of get_target_nodes().
+        """
+
+        if self.index is None:
+            non_terminals = params['BNF_GRAMMAR'].non_terminals
+            by_nt, paths = {}, []
+            stack = [(self, ())]
+
+            while stack:
+                node, path = stack.pop()
+
+                if node.root in non_terminals:
+                    by_nt.setdefault(node.root, []).append(path)
+                    paths.append(path)
+
+                    # Push children in reverse order to visit them in order.
+                    stack.extend((node.children[i], path + (i,)) for i in
+                                 range(len(node.children) - 1, -1, -1))
+
+            self.index = by_nt, paths
+
+        return self.index
+
+    def get_node(self, path):
+        """
+        Returns the node at the end of a path from the current node.
+
+        :param path: A tuple of indexes of children.
+        :return: The node.
+        """
+
+        node = self
+        for i in path:
+            node = node.children[i]
+        return node
+
+    def replace(self, path, subtree):
+        """
+        Returns a new tree, in which the node at the end of a path is
+        replaced with subtree. Only the nodes on the path are copied, the new
+        tree shares all other nodes with self and subtree. Parents of shared
+        nodes are not changed.
+
+        :param path: A tuple of indexes of children.
+        :param subtree: The inserted tree.
+        :return: The root of the new tree.
+        """
+
+        if not path:
+            # The subtree becomes a whole tree.
+            new_root = Tree(subtree.root, None)
+            new_root.codon, new_root.depth = subtree.codon, subtree.depth
+            new_root.snippet, new_root.children = subtree.snippet, \
+                subtree.children
+            return new_root
+
+        new_tree = Tree(self.root, self.parent)
+        new_tree.codon, new_tree.depth = self.codon, self.depth
+        new_tree.snippet, new_tree.children = self.snippet, \
+            list(self.children)
+
+        # Copy the path below the current node.
+        node = new_tree
+        for i in path[:-1]:
+            child = node.children[i]
+            new_child = Tree(child.root, node)
+            new_child.codon, new_child.depth = child.codon, child.depth
+            new_child.snippet, new_child.children = child.snippet, \
+                list(child.children)
+            node.children[i] = new_child
+            node = new_child
+
+        node.children[path[-1]] = subtree
+
+        return new_tree
+
     def get_node_labels(self, labels):
         """
         Recurses through a tree and appends all node roots to a set.
@@ -160,10 +262,11 @@ class Tree:
         return labels
 
     def get_tree_info(self, nt_keys, genome, output, invalid=False,
-                      max_depth=0, nodes=0):
+                      max_depth=0, nodes=0, depth=None):
         """
-        Recurses through a tree and returns all necessary information on a
-        tree required to generate an individual.
+        Traverses a tree and returns all necessary information on a tree
+        required to generate an individual. Nodes are visited from an
+        explicit stack, deep trees do not exceed the recursion limit.
         
         :param genome: The list of all codons in a subtree.
         :param output: The list of all terminal nodes in a subtree. This is
@@ -173,65 +276,78 @@ class Tree:
         :param nt_keys: The list of all non-terminals in the grammar.
         :param nodes: the number of nodes in a tree.
         :param max_depth: The maximum depth of any node in the tree.
+        :param depth: The depth of the current node. If None, the depth is
+        computed from the parent.
         :return: genome, output, invalid, max_depth, nodes.
         """
 
-        # Increment number of nodes in tree and set current node id.
-        nodes += 1
-        
-        if self.parent:
-            # If current node has a parent, increment current depth from
-            # parent depth.
-            self.depth = self.parent.depth + 1
-        
-        else:
-            # Current node is tree root, set depth to 1.
-            self.depth = 1
-        
-        if self.depth > max_depth:
-            # Set new max tree depth.
-            max_depth = self.depth
+        if depth is None:
+            # Compute the depth of the current node from its parent.
+            depth = self.parent.depth + 1 if self.parent else 1
 
-        if self.codon:
-            # If the current node has a codon, append it to the genome.
-            genome.append(self.codon)
+        # Each entry of the stack is an iterator over nodes to visit and their
+        # depth. The current node is always expanded, its descendants are
+        # expanded if they have children.
+        stack = [(iter((self,)), depth)]
 
-        # Find all non-terminal children of current node.
-        NT_children = [child for child in self.children if child.root in
-                       nt_keys]
-        
-        if not NT_children:
-            # The current node has only terminal children, increment number
-            # of tree nodes.
-            nodes += 1
+        while stack:
+            children, depth = stack[-1]
 
-            # Terminal children increase the current node depth by one.
-            # Check the recorded max_depth.
-            if self.depth + 1 > max_depth:
-                # Set new max tree depth.
-                max_depth = self.depth + 1
+            for node in children:
+                if not node.children and node is not self:
+                    # If the current child has no children it is a terminal.
+                    # Append it to the phenotype output.
+                    output.append(node.root)
 
-        if self.root in nt_keys and not self.children:
-            # Current NT has no children. Invalid tree.
-            invalid = True
+                    if node.root in nt_keys:
+                        # Current non-terminal node has no children; invalid
+                        # tree.
+                        invalid = True
 
-        for child in self.children:
-            # Recurse on all children.
+                    continue
 
-            if not child.children:
-                # If the current child has no children it is a terminal.
-                # Append it to the phenotype output.
-                output.append(child.root)
-                
-                if child.root in nt_keys:
-                    # Current non-terminal node has no children; invalid tree.
+                # Increment number of nodes in tree.
+                nodes += 1
+
+                if not params['PERSISTENT_TREES']:
+                    # Set current node depth. Persistent trees share nodes at
+                    # different depths, their depths are lengths of paths.
+                    node.depth = depth
+
+                if depth > max_depth:
+                    # Set new max tree depth.
+                    max_depth = depth
+
+                if node.codon:
+                    # If the current node has a codon, append it to the genome.
+                    genome.append(node.codon)
+
+                # Find all non-terminal children of current node.
+                NT_children = [child for child in node.children if
+                               child.root in nt_keys]
+
+                if not NT_children:
+                    # The current node has only terminal children, increment
+                    # number of tree nodes.
+                    nodes += 1
+
+                    # Terminal children increase the current node depth by
+                    # one. Check the recorded max_depth.
+                    if depth + 1 > max_depth:
+                        # Set new max tree depth.
+                        max_depth = depth + 1
+
+                if node.root in nt_keys and not node.children:
+                    # Current NT has no children. Invalid tree.
                     invalid = True
-            
+
+                # Visit the children of the current node before its siblings.
+                stack.append((iter(node.children), depth + 1))
+                break
+
             else:
-                # The current child has children, recurse.
-                genome, output, invalid, max_depth, nodes = \
-                    child.get_tree_info(nt_keys, genome, output, invalid,
-                                        max_depth, nodes)
+                # All nodes of the iterator have been visited.
+                stack.pop()
 
         return genome, output, invalid, max_depth, nodes
 
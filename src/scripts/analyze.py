@@ -11,9 +11,10 @@ import numpy
 import sys
 import time
 import functools
-from subprocess import Popen
+import subprocess
 import multiprocessing
-from db import prepare_connection
+from concurrent.futures import ThreadPoolExecutor
+from db import prepare_connection, prepare_readonly_connection
 
 __author__ = 'Tomasz Pawlak'
 
@@ -22,9 +23,51 @@ __author__ = 'Tomasz Pawlak'
 # Database part
 #
 
+# Queries read materialized copies of these views, see materialize()
+materialized_views = OrderedDict([
+    ("experimentStat",
+     r'''SELECT *,
+         CASE WHEN p.problem LIKE '%\_%' ESCAPE '\' THEN substr(p.problem, 0, length(rtrim(p.problem, '0123456789')) - 1) ELSE p.problem END AS problem,
+         total_time / 60.0 AS total_time_min,
+         p.max_genome_length AS p_max_genome_length,
+         p.max_tree_depth AS p_max_tree_depth,
+         p.max_tree_nodes AS p_max_tree_nodes
+         FROM experiments e 
+         LEFT JOIN generations g ON e.id = g.parent
+         LEFT JOIN parameters p ON e.id = p.parent
+         WHERE g.end = 0 
+         AND e.error_exctype IS NULL'''),
+    ("experimentFinalStat",
+     r'''SELECT * ,
+         CASE WHEN p.problem LIKE '%\_%' ESCAPE '\' THEN substr(p.problem, 0, length(rtrim(p.problem, '0123456789')) - 1) ELSE p.problem END AS problem,
+         total_time / 60.0 AS total_time_min
+         FROM experiments e 
+         LEFT JOIN parameters p ON e.id = p.parent
+         LEFT JOIN generations g ON e.id = g.parent
+         WHERE g.end = 1 
+         AND e.error_exctype IS NULL'''),
+])
+
+# Indexes of the materialized views for the queries below, columns missing in the database are skipped
+materialized_indexes = {
+    "experimentStat": [["EXPERIMENT_NAME", "PROBLEM", "TRAINING_SIZE", "TOTAL_TIME"], ["PROBLEM", "TRAINING_SIZE"], ["id"]],
+    "experimentFinalStat": [["PROBLEM", "EXPERIMENT_NAME", "TRAINING_SIZE"], ["id"]],
+}
+
+
+def get_watermark(db):
+    """Returns the id of experiments up to which all views are materialized."""
+    cursor = db.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS materialization(name TEXT NOT NULL PRIMARY KEY, watermark INTEGER NOT NULL, columns TEXT NOT NULL)")
+    cursor.execute("SELECT name, watermark FROM materialization")
+    watermarks = dict(cursor.fetchall())
+    return min(watermarks.get(name, 0) for name in materialized_views)
+
+
 def normalize_data(db):
     cursor = db.cursor()
 
+    # mappings of materialized experiments take effect after deleting the materialization table
     problem_mapping = {}
 
     for (_from, _to) in problem_mapping.items():
@@ -40,7 +83,14 @@ def normalize_data(db):
         cursor.execute("ALTER TABLE parameters ADD COLUMN TRAINING_SIZE NUMERIC NULL")
     except:
         pass
-    cursor.execute("SELECT id, EXTRA_PARAMETERS FROM parameters WHERE PROBLEM IS NULL OR TRAINING_SIZE IS NULL")
+    try:
+        # the column is only created by the first failed experiment
+        cursor.execute("ALTER TABLE experiments ADD COLUMN error_exctype NUMERIC NULL")
+    except:
+        pass
+    # parameters of materialized experiments are normalized already
+    cursor.execute("SELECT id, EXTRA_PARAMETERS FROM parameters WHERE (PROBLEM IS NULL OR TRAINING_SIZE IS NULL) AND parent > ?",
+                   (get_watermark(db),))
     extra_params_parser = re.compile(r"(?P<param>[a-zA-Z0-9_]+)='?(?P<value>[a-zA-Z0-9_]+)'?")
     for row in cursor.fetchall():
         params = dict(extra_params_parser.findall(row[1]))
@@ -51,44 +101,90 @@ def normalize_data(db):
     except:
         pass
 
-    cursor.execute(r'''CREATE TEMP VIEW IF NOT EXISTS experimentStat AS
-                       SELECT *,
-                       CASE WHEN p.problem LIKE '%\_%' ESCAPE '\' THEN substr(p.problem, 0, length(rtrim(p.problem, '0123456789')) - 1) ELSE p.problem END AS problem,
-                       total_time / 60.0 AS total_time_min,
-                       p.max_genome_length AS p_max_genome_length,
-                       p.max_tree_depth AS p_max_tree_depth,
-                       p.max_tree_nodes AS p_max_tree_nodes
-                       FROM experiments e 
-                       LEFT JOIN generations g ON e.id = g.parent
-                       LEFT JOIN parameters p ON e.id = p.parent
-                       WHERE g.end = 0 
-                       AND e.error_exctype IS NULL''')
-
-    cursor.execute(r'''CREATE TEMP VIEW IF NOT EXISTS experimentFinalStat AS
-                   SELECT * ,
-                   CASE WHEN p.problem LIKE '%\_%' ESCAPE '\' THEN substr(p.problem, 0, length(rtrim(p.problem, '0123456789')) - 1) ELSE p.problem END AS problem,
-                   total_time / 60.0 AS total_time_min
-                   FROM experiments e 
-                   LEFT JOIN parameters p ON e.id = p.parent
-                   LEFT JOIN generations g ON e.id = g.parent
-                   WHERE g.end = 1 
-                   AND e.error_exctype IS NULL''')
-
-
-def prepare_indexes(db):
+    for (name, query) in materialized_views.items():
+        cursor.execute("CREATE TEMP VIEW IF NOT EXISTS `%sView` AS %s" % (name, query))
+
+
+def materialize(db) -> int:
+    """Copies rows of finished experiments from the views to tables of the same names. Experiments up to the watermark
+    in the materialization table are kept, later ones are copied again (all experiments if the columns of a view
+    changed). Returns the number of copied rows."""
+    cursor = db.cursor()
+    watermark = get_watermark(db)
+
+    # experiments up to the new watermark are finished, later ones may still be running
+    cursor.execute('''SELECT MIN(id) - 1 FROM experiments
+                      WHERE id > ? AND error_exctype IS NULL AND id NOT IN (SELECT parent FROM generations WHERE end = 1)''',
+                   (watermark,))
+    new_watermark = cursor.fetchone()[0]
+    if new_watermark is None:
+        cursor.execute("SELECT MAX(id) FROM experiments")
+        new_watermark = cursor.fetchone()[0] or 0
+
+    rows = 0
+    for name in materialized_views:
+        cursor.execute("PRAGMA temp.table_info(`%sView`)" % name)
+        columns = ",".join(row[1] for row in cursor.fetchall())
+        cursor.execute("SELECT watermark, columns FROM materialization WHERE name=?", (name,))
+        row = cursor.fetchone()
+        if row is not None and row[1] == columns:
+            start = row[0]
+            cursor.execute("DELETE FROM main.`%s` WHERE id > ?" % name, (start,))
+        else:
+            # duplicate column names are suffixed like in the view, e.g. id:1 for the id of generations
+            start = 0
+            cursor.execute("DROP TABLE IF EXISTS main.`%s`" % name)
+            cursor.execute("CREATE TABLE main.`%s` AS SELECT * FROM `%sView` WHERE 0" % (name, name))
+
+        cursor.execute('''INSERT INTO main.`%s` SELECT * FROM `%sView`
+                          WHERE id > ? AND id IN (SELECT parent FROM generations WHERE end = 1)''' % (name, name),
+                       (start,))
+        rows += cursor.rowcount
+        cursor.execute("INSERT OR REPLACE INTO materialization(name, watermark, columns) VALUES (?, ?, ?)",
+                       (name, new_watermark, columns))
+    db.commit()
+    return rows
+
+
+def prepare_indexes(db, analyze=True):
     cursor = db.cursor()
     cursor.execute("CREATE INDEX IF NOT EXISTS parametersParentNameProblemTrainingSize ON parameters(parent, EXPERIMENT_NAME, PROBLEM, TRAINING_SIZE)")
     cursor.execute("CREATE INDEX IF NOT EXISTS generationsParentEnd ON generations(parent, end)")
     cursor.execute("CREATE INDEX IF NOT EXISTS generationsParentEndTotalTime ON generations(parent, end, TOTAL_TIME)")
-    cursor.execute("ANALYZE")
+    if analyze:
+        cursor.execute("ANALYZE")
+
+
+def prepare_materialized_indexes(db, analyze=True):
+    cursor = db.cursor()
+    for (name, indexes) in materialized_indexes.items():
+        cursor.execute("PRAGMA main.table_info(`%s`)" % name)
+        table_columns = {row[1].casefold() for row in cursor.fetchall()}
+        for columns in indexes:
+            columns = [column for column in columns if column.casefold() in table_columns]
+            if columns:
+                cursor.execute("CREATE INDEX IF NOT EXISTS `%s` ON `%s`(%s)" % (
+                    name + "".join(column.title().replace("_", "") for column in columns), name,
+                    ", ".join("`%s`" % column for column in columns)))
+    if analyze:
+        for name in materialized_views:
+            cursor.execute("ANALYZE main.`%s`" % name)
 
 
 def prepare_db(filename="../results/results.sqlite") -> sqlite3.Connection:
     start = time.time()
     db = prepare_connection(filename)
+    # the whole database is analyzed on the first run and again whenever rows of new experiments are copied
+    cursor = db.cursor()
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'")
+    analyzed = cursor.fetchone()[0] > 0
     normalize_data(db)
-    prepare_indexes(db)
-    print("Database prepared in %.2fs" % (time.time() - start))
+    prepare_indexes(db, not analyzed)
+    rows = materialize(db)
+    prepare_materialized_indexes(db, not analyzed)
+    if analyzed and rows > 0:
+        cursor.execute("ANALYZE")
+    print("Database prepared in %.2fs (%d new rows of materialized views)" % (time.time() - start, rows))
     return db
 
 
@@ -384,9 +480,10 @@ class Statistics:
     __metaclass__ = abc.ABCMeta
 
     def __init__(self, db, query, query_params, stat_params, plot_ids, series, name_template="%(query)s_%(params)s_%(series)s"):
-        """query - query name, query_params - dict, series - list"""
+        """query - query name, query_params - dict, series - list, db - connection or None to query later by execute()"""
         self.db = db
         self.query = queries[query]
+        self.query_params = query_params
         self.params = stat_params
         self.plots = OrderedDict([(k, None) for k in plot_ids])
         self.series = series
@@ -396,7 +493,12 @@ class Statistics:
                                              sorted(query_params.items())),
                                          series="_".join(str(v)[:20] for v in series))
         self.name = self.name[:120]
+        self.queried = False
+
+        if db is not None:
+            self.execute(db)
 
+    def execute(self, db):
         params = expand(defaults, self.params)
 
         start = time.time()
@@ -404,7 +506,7 @@ class Statistics:
 
         # execute queries, obtain data
         for plot_id in self.plots:
-            p = copy.deepcopy(query_params)
+            p = copy.deepcopy(self.query_params)
             p.update({"plot_id": plot_id})
             self.plots[plot_id] = OrderedDict()
             for series in self.series:
@@ -427,6 +529,7 @@ class Statistics:
                     print("Query returned null for plot_id/series: %s/%s" % (plot_id, series))
 
         print("%.2fs" % (time.time() - start))
+        self.queried = True
 
     @abc.abstractmethod
     def get_full_document(self):
@@ -965,8 +1068,12 @@ class RTable(Statistics):
 
 
 class Runner:
-    def __init__(self, statistics):
+    def __init__(self, statistics, filename=None, processes=1):
+        """statistics not queried yet are queried from database filename, processes - number of worker processes which
+        query and save statistics, each with its own read-only connection"""
         self.statistics = statistics
+        self.filename = filename
+        self.processes = processes
         self.processors = {
             "tex": {
                 "command": None,
@@ -985,29 +1092,59 @@ class Runner:
             }
         }
 
-    def run(self):
-        processes = []
+    def render(self, index, db=None):
+        """Queries (if needed) and saves a statistic, returns the command line of its processor or None"""
+        stat = self.statistics[index]
+        if not stat.queried:
+            stat.execute(db)
 
-        for stat in self.statistics:
-            params = self.processors[stat.get_processor()]
+        params = self.processors[stat.get_processor()]
 
-            filename = stat.get_name() + params["extension"]
-            filepath = "../output/" + filename
-            stat.save(filepath)
-            if params["command"] is not None:
-                command_line = [params["command"]] + params["arguments"] + [filename]
-                processes.append(Popen(command_line, cwd="../output"))
+        filename = stat.get_name() + params["extension"]
+        filepath = "../output/" + filename
+        stat.save(filepath)
+        if params["command"] is not None:
+            return [params["command"]] + params["arguments"] + [filename]
+        return None
+
+    def run(self):
+        # each thread waits for one process, at most as many processes as CPUs run at once
+        futures = []
+        with ThreadPoolExecutor(multiprocessing.cpu_count()) as processes:
+            def call(command_line):
+                if command_line is not None:
+                    futures.append(processes.submit(subprocess.call, command_line, cwd="../output"))
+
+            if self.processes > 1:
+                # workers are forked, statistics (and lambdas in their parameters) are not pickled
+                with multiprocessing.get_context("fork").Pool(self.processes, Runner.init_worker, (self,)) as pool:
+                    for command_line in pool.imap_unordered(Runner.render_in_worker, range(len(self.statistics))):
+                        call(command_line)
+            else:
+                db = None
+                if not all(stat.queried for stat in self.statistics):
+                    db = prepare_readonly_connection(self.filename)
+                try:
+                    for index in range(len(self.statistics)):
+                        call(self.render(index, db))
+                finally:
+                    if db is not None:
+                        db.close()
+
+        for future in futures:
+            future.result()
+
+    # runner and read-only connection of a worker process
+    worker = None
 
-                # Wait for running processes (prevent creating too many processes at once)
-                while len(processes) >= multiprocessing.cpu_count():
-                    time.sleep(0.1)
-                    for p in processes:
-                        p.poll()
-                        if p.returncode is not None:
-                            processes.remove(p)
+    @staticmethod
+    def init_worker(runner):
+        Runner.worker = (runner, prepare_readonly_connection(runner.filename))
 
-        for p in processes:
-            p.wait()
+    @staticmethod
+    def render_in_worker(index):
+        (runner, db) = Runner.worker
+        return runner.render(index, db)
 
 
 queries = {
@@ -1160,7 +1297,10 @@ queries = {
 
 
 def main():
-    db = prepare_db("../results/results.sqlite")
+    filename = "../results/results.sqlite"
+    prepare_db(filename).close()
+    # statistics are queried by workers of the runner, the database must not be modified until they finish
+    db = None
 
     problems = ["acube32", "acube52", "asimplex32", "asimplex52",
                 "gdiet", "gfacility", "gnetflow", "gsudoku", "gworkforce1",
@@ -1449,8 +1589,7 @@ def main():
     plots.append(Table(db, "final_avg_fixed", {"criterion": "test_fitness"}, p_table_cmp, problems, ["GECS", "OCCALS_1_500", "ESOCCS"]))
     plots.append(Table(db, "final_frac_fixed", {"criterion": "optimal_`:series`_match=1", "experiment_name": "V1I"}, p_table_opt, problems, ["Value", "Solution"], "final_frac_fixed_optimal"))
 
-    db.close()
-    runner = Runner(plots)
+    runner = Runner(plots, filename, multiprocessing.cpu_count())
     runner.run()
 
 
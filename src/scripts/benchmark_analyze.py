@@ -0,0 +1,91 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import analyze
+from utilities.stats.experimentdatabase import Database
+
+problems = ["zdiet", "zfacility", "ztsp", "gsudoku"]
+names = ["V1I", "V1S", "750_40x3"]
+training_sizes = [100, 200, 300]
+
+
+def add_experiments(filename: str, experiments: int, generations: int):
+    """Adds finished experiments like fitness.ZIMPL does: an experiment, its parameters and generations."""
+    with Database(filename) as db:
+        for i in range(experiments):
+            experiment = db.new_experiment()
+            experiment["timestamp"] = "2020-01-01 00:00:00"
+            parameters = experiment.new_child_data_set("parameters")
+            parameters.update({"EXPERIMENT_NAME": random.choice(names), "MAX_GENOME_LENGTH": "500",
+                               "MAX_TREE_DEPTH": "90", "MAX_TREE_NODES": "None",
+                               "EXTRA_PARAMETERS": "PROBLEM='%s' TRAINING_SIZE=%d" % (
+                                   random.choice(problems), random.choice(training_sizes))})
+            for gen in range(generations + 1):
+                generation = experiment.new_child_data_set("generations")
+                generation.update({"gen": gen, "best_fitness": random.random() / (gen + 1),
+                                   "test_fitness": random.random(), "validation_fitness": random.random(),
+                                   "total_time": 10.0 * gen + random.random(), "runtime_error": 0,
+                                   "best_phenotype": "x%d" % random.randrange(5), "end": int(gen == generations)})
+            experiment.save(True)
+
+
+def run_queries(db, views=False):
+    """Runs queries of analyze.main on materialized views or on the views, returns their results and the time taken."""
+    results = []
+    start = time.perf_counter()
+    for (query, series, plot_ids) in (("generational_avg", names, problems), ("time_avg", names, problems),
+                                      ("final_avg", training_sizes, problems), ("optimal_gen", training_sizes, problems),
+                                      ("profile", problems, [""])):
+        for plot_id in plot_ids:
+            for s in series:
+                q = analyze.queries[query].replace("`:criterion`", "best_fitness")
+                if views:
+                    for name in analyze.materialized_views:
+                        q = q.replace(name + " ", name + "View ").replace(name + "\n", name + "View\n")
+                results.append(db.execute(q, {"plot_id": plot_id, "series": s}).fetchall())
+    return results, time.perf_counter() - start
+
+
+def rounded(results):
+    return [[tuple(float("%.9g" % value) if isinstance(value, float) else value for value in row) for row in result]
+            for result in results]
+
+
+def main(experiments=400, new_experiments=40, generations=60):
+    """Times the preparation of the database by analyze.prepare_db when all experiments are new, when none are and after
+    adding new_experiments experiments, and queries on the views and on the materialized views."""
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "results.sqlite")
+        add_experiments(filename, experiments, generations)
+
+        timings = []
+        for added in (0, 0, new_experiments):
+            add_experiments(filename, added, generations)
+            start = time.perf_counter()
+            db = analyze.prepare_db(filename)
+            timings.append(time.perf_counter() - start)
+            db.close()
+
+        db = analyze.prepare_db(filename)
+        view_results, view_time = run_queries(db, True)
+        results, materialized_time = run_queries(db)
+        db.close()
+
+    print("%-34s %10s" % ("step", "time [s]"))
+    print("%-34s %10.2f" % ("prepare_db (%d new experiments)" % experiments, timings[0]))
+    print("%-34s %10.2f" % ("prepare_db (no new experiments)", timings[1]))
+    print("%-34s %10.2f" % ("prepare_db (%d new experiments)" % new_experiments, timings[2]))
+    print("%-34s %10.2f" % ("queries on views", view_time))
+    print("%-34s %10.2f" % ("queries on materialized views", materialized_time))
+    # averages differ in the last digits, rows are summed in another order
+    print("same results: %s" % (rounded(view_results) == rounded(results)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
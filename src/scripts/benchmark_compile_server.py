@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utilities.ZIMPLpy.compile_server import CompileServer
+from utilities.ZIMPLpy.interpreter import Interpreter
+
+dataset_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "datasets", "ZIMPL")
+
+
+def evaluations_per_second(sources: list, repeats: int, compile_server: CompileServer = None):
+    fd, zpl_filename = tempfile.mkstemp(".zpl")
+    try:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for source in sources:
+                # mimics fitness.ZIMPL.ZIMPL.evaluate
+                if compile_server is None:
+                    os.write(fd, source.encode("utf-8"))
+                with Interpreter(zpl_filename, True, source, compile_server):
+                    pass
+                os.lseek(fd, 0, 0)
+                os.ftruncate(fd, 0)
+        return repeats * len(sources) / (time.perf_counter() - start)
+    finally:
+        os.close(fd)
+        os.unlink(zpl_filename)
+
+
+def main(repeats=20):
+    """Compares the throughput of translating ZIMPL programs by launching ZIMPL per call with the compile server."""
+    problems = sorted(f[:-4] for f in os.listdir(dataset_dir) if f.endswith(".zpl"))
+    print("%-16s %12s %12s %8s" % ("problem", "Popen [1/s]", "server [1/s]", "speedup"))
+    with CompileServer(Interpreter.zimpl_path) as compile_server:
+        for problem in problems:
+            with open(os.path.join(dataset_dir, problem + ".zpl"), "rt") as f:
+                sources = [f.read()]
+            popen = evaluations_per_second(sources, repeats)
+            server = evaluations_per_second(sources, repeats, compile_server)
+            print("%-16s %12.1f %12.1f %7.2fx" % (problem, popen, server, server / popen))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
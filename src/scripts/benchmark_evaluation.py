@@ -0,0 +1,52 @@
+import os
+import pickle
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.parameters import params, set_params
+from fitness.evaluation import evaluate_fitness
+from operators.initialisation import initialisation
+from utilities.algorithm.initialise_run import pool_init
+from utilities.stats import trackers
+
+
+def ipc_bytes(individuals, asynchronous: bool):
+    """Returns the number of pickled bytes exchanged with the workers to evaluate valid individuals."""
+    total = 0
+    for ind in individuals:
+        if ind.invalid:
+            continue
+        if asynchronous:
+            total += len(pickle.dumps((ind.name, ind.phenotype, ind.samples)))
+            total += len(pickle.dumps((ind.name, ind.fitness, ind.invalid, ind.runtime_error, None, [])))
+        else:
+            total += 2 * len(pickle.dumps(ind))  # ind is sent to evaluate_ind and returned
+    return total
+
+
+def main(repeats=3):
+    """Compares the time and the IPC bytes of evaluating a population by the ordered (apply_async) and the asynchronous
+    (imap_unordered) engine. Command line arguments are PonyGE2 arguments (default: --parameters pymax.txt)."""
+    for engine, asynchronous in (("ordered", False), ("async", True)):
+        params["ASYNC_EVALUATION"] = asynchronous
+        params["POOL"] = Pool(processes=params["CORES"], initializer=pool_init, initargs=(params,))
+        try:
+            elapsed, bytes = 0.0, 0
+            for _ in range(repeats):
+                individuals = initialisation(params["POPULATION_SIZE"])
+                trackers.cache.clear()
+                start = time.perf_counter()
+                individuals = evaluate_fitness(individuals)
+                elapsed += time.perf_counter() - start
+                bytes += ipc_bytes(individuals, asynchronous)
+            print("%-8s %10.3f s/population %12d IPC bytes/population" % (engine, elapsed / repeats, bytes // repeats))
+        finally:
+            params["POOL"].close()
+            params["POOL"].join()
+
+
+if __name__ == '__main__':
+    set_params((sys.argv[1:] or ["--parameters", "pymax.txt"]) + ["--multicore"], create_files=False)
+    main()
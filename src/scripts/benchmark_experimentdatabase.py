@@ -0,0 +1,55 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utilities.stats.experimentdatabase import Database
+
+
+def run(filename: str, write_behind: bool, save_each: bool, generations: int, columns: int, lock: float = 0):
+    """Saves generations of an experiment like fitness.ZIMPL, each right away (save_each) or all at the end, while
+    another writer holds the write lock of the file for the first lock seconds. Returns the time spent in the loop and
+    the total time until the database is closed."""
+    db = Database(filename, write_behind)
+    if lock:
+        other = sqlite3.connect(filename, isolation_level=None, check_same_thread=False)
+        other.execute("BEGIN IMMEDIATE")
+        threading.Timer(lock, other.commit).start()
+    start = time.perf_counter()
+    experiment = db.new_experiment()
+    experiment["in_runnerId"] = 0
+    loop = 0
+    for gen in range(generations):
+        loop_start = time.perf_counter()
+        generation = experiment.new_child_data_set("generations")
+        generation.update({"stat_%d" % i: gen * i / 7 for i in range(columns)})
+        if save_each:
+            generation.__exit__(None, None, None)
+        loop += time.perf_counter() - loop_start
+    loop_start = time.perf_counter()
+    experiment.save(True)
+    loop += time.perf_counter() - loop_start
+    db.__exit__(None, None, None)
+    return loop, time.perf_counter() - start
+
+
+def main(generations=1000, columns=40, lock=1.0):
+    """Compares the time spent saving generations of an experiment (utilities.stats.experimentdatabase) in the loop and
+    in total, with synchronous and write-behind saves, without and with another writer holding the write lock of the
+    file for lock seconds."""
+    print("%-14s %-8s %10s %10s %12s %12s" % ("mode", "save", "loop [s]", "total [s]", "locked loop", "locked total"))
+    for write_behind, save_each in ((False, False), (False, True), (True, True)):
+        times = []
+        for lock_time in (0, lock):
+            with tempfile.TemporaryDirectory() as directory:
+                times += run(os.path.join(directory, "results.sqlite"), write_behind, save_each, generations, columns,
+                             lock_time)
+        print("%-14s %-8s %10.3f %10.3f %12.3f %12.3f" % (("write-behind" if write_behind else "synchronous",
+                                                          "each" if save_each else "at end") + tuple(times)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.parameters import params, set_params
+from operators.crossover import crossover
+from operators.initialisation import initialisation
+from operators.mutation import mutation
+
+
+def main(size=1000, generations=10):
+    """Compares the throughput of linear crossover and mutation of individuals (VECTORIZED_GENOME_OPERATORS off and
+    on). Offspring are mapped in both modes, thus the difference is the time of the operators. Command line arguments
+    are PonyGE2 arguments (default: --parameters pymax.txt)."""
+    params["GENERATION_SIZE"] = size
+    random.seed(0)
+    individuals = initialisation(size)
+    print("%-12s %12s %12s" % ("vectorized", "crossover/s", "mutation/s"))
+    for vectorized in (False, True):
+        params["VECTORIZED_GENOME_OPERATORS"] = vectorized
+        random.seed(1)
+        crossover_time = mutation_time = 0
+        for _ in range(generations):
+            start = time.perf_counter()
+            children = crossover(individuals)
+            crossover_time += time.perf_counter() - start
+            start = time.perf_counter()
+            mutation(children)
+            mutation_time += time.perf_counter() - start
+        print("%-12s %12.0f %12.0f" % (vectorized, size * generations / crossover_time,
+                                        size * generations / mutation_time))
+
+
+if __name__ == '__main__':
+    set_params(sys.argv[1:] or ["--parameters", "pymax.txt"], create_files=False)
+    main()
@@ -0,0 +1,54 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.mapper import TableMapper, map_ind_from_genome
+from algorithm.parameters import params, set_params
+from representation.grammar import Grammar
+from utilities.ZIMPLpy.interpreter import Interpreter
+
+dataset_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "datasets", "ZIMPL")
+
+
+def dedicated_grammar(problem: str) -> Grammar:
+    """Returns the ZIMPL-dedicated grammar of a problem."""
+    with Interpreter(os.path.join(dataset_dir, problem + ".zpl")) as interpreter:
+        grammar = interpreter.generate_grammar()
+    fd, filename = tempfile.mkstemp(".bnf")
+    try:
+        os.write(fd, grammar.encode("utf-8"))
+        os.close(fd)
+        return Grammar(filename)
+    finally:
+        os.unlink(filename)
+
+
+def main(genomes=2000, genome_length=200, max_wraps=0):
+    """Compares the throughput of map_ind_from_genome with TableMapper on the ZIMPL-dedicated grammars and checks that
+    both give identical results."""
+    set_params(["--parameters", "pymax.txt", "--max_tree_depth", "13"], create_files=False)  # depth limit of ZIMPL.txt
+    params["MAX_WRAPS"] = max_wraps
+    problems = sorted(f[:-4] for f in os.listdir(dataset_dir) if f.endswith(".zpl"))
+    print("%-16s %12s %12s %8s" % ("problem", "dict [1/s]", "table [1/s]", "speedup"))
+    for problem in problems:
+        params["BNF_GRAMMAR"] = dedicated_grammar(problem)
+        rng = random.Random(0)
+        population = [[rng.randint(0, params["CODON_SIZE"]) for _ in range(genome_length)] for _ in range(genomes)]
+
+        start = time.perf_counter()
+        expected = [map_ind_from_genome(genome) for genome in population]
+        dict_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = TableMapper(params["BNF_GRAMMAR"]).map_population(population)
+        table_time = time.perf_counter() - start
+
+        assert actual == expected, problem
+        print("%-16s %12.0f %12.0f %7.2fx" % (problem, genomes / dict_time, genomes / table_time, dict_time / table_time))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
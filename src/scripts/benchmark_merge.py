@@ -0,0 +1,61 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import merge
+from utilities.stats.experimentdatabase import Database
+
+
+def create_shard(filename: str, generations: int, columns: int):
+    """Creates a shard database of a run like fitness.ZIMPL does: an experiment, its parameters and generations."""
+    with Database(filename) as db:
+        experiment = db.new_experiment()
+        experiment["timestamp"] = "2020-01-01 00:00:00"
+        parameters = experiment.new_child_data_set("parameters")
+        parameters.update({"PARAMETER_%d" % i: str(i) for i in range(columns)})
+        for gen in range(generations):
+            generation = experiment.new_child_data_set("generations")
+            generation.update({"stat_%d" % i: gen * i / 7 for i in range(columns)})
+        experiment.save(True)
+
+
+def main(shards=10000, old_shards=100, generations=60, columns=40):
+    """Merges copies of a shard database with merge.merge_shards (all shards) and with the pairwise merge of merge.main
+    (old_shards shards), and reports the time per shard."""
+    with tempfile.TemporaryDirectory() as directory:
+        template = os.path.join(directory, "template.sqlite")
+        create_shard(template, generations, columns)
+        shard_directory = os.path.join(directory, "shards")
+        os.makedirs(shard_directory)
+        for i in range(shards):
+            shutil.copyfile(template, os.path.join(shard_directory, "%05d.sqlite" % i))
+        files = merge.shard_files([shard_directory])
+
+        start = time.perf_counter()
+        merge.merge_shards(os.path.join(directory, "merged.sqlite"), [shard_directory])
+        new_time = time.perf_counter() - start
+
+        base = os.path.join(directory, "old.sqlite")
+        shutil.copyfile(template, base)
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        start = time.perf_counter()
+        try:
+            for file in files[:old_shards]:
+                sys.argv = ["merge.py", base, file]
+                merge.main()
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        old_time = time.perf_counter() - start
+
+    print("%-16s %8s %10s %14s" % ("merge", "shards", "time [s]", "per shard [ms]"))
+    print("%-16s %8d %10.2f %14.2f" % ("pairwise UPDATE", old_shards, old_time, 1000 * old_time / old_shards))
+    print("%-16s %8d %10.2f %14.2f" % ("INSERT SELECT", shards, new_time, 1000 * new_time / shards))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
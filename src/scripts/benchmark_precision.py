@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pyximport
+
+pyximport.install(language_level=3, inplace=True)
+import fitness.helper as helper
+from utilities.ZIMPLpy.interpreter import Interpreter
+
+dataset_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "datasets", "ZIMPL")
+
+
+def seconds(f, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        f()
+    return (time.perf_counter() - start) / repeats
+
+
+def main(n=2000, repeats=5, *problems):
+    """Measures helper.precision and helper.PrecisionIndex for increasing numbers of OpenMP threads on points sampled
+    from the datasets/ZIMPL problems. Half of the sampled points are shifted to be negative."""
+    if len(problems) == 0:
+        problems = sorted(f[:-4] for f in os.listdir(dataset_dir) if f.endswith(".zpl"))
+    threads = [t for t in (1, 2, 4, 8, 16, 32, 64) if t <= os.cpu_count()]
+    print("%-16s %6s %8s %14s %14s" % ("problem", "rows", "threads", "brute [ms]", "index [ms]"))
+    for problem in problems:
+        with Interpreter(os.path.join(dataset_dir, problem + ".zpl")) as interpreter:
+            X = interpreter.sample_positive(n, "har", 2 * n, seed=1).values
+            P = interpreter.sample_positive(n, "har", 2 * n, seed=2).values
+        P[::2] += 1.0
+        index = helper.PrecisionIndex(X)
+        for t in threads:
+            brute = seconds(lambda: helper.precision(X, P, t), repeats)
+            indexed = seconds(lambda: index.precision(P, t), repeats)
+            print("%-16s %6d %8d %14.2f %14.2f" % (problem, X.shape[0], t, 1000 * brute, 1000 * indexed))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:3]], *sys.argv[3:])
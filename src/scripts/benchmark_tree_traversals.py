@@ -0,0 +1,45 @@
+import os
+import random
+import sys
+import time
+from copy import copy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.parameters import params, set_params
+from representation.derivation import generate_tree
+from representation.tree import Tree
+from utilities.representation.check_methods import get_nodes_and_depth, get_output
+
+
+def timed(function, trees, repeat=5):
+    """Returns the number of trees per second function processes (best of repeat runs)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tree in trees:
+            function(tree)
+        best = min(best, time.perf_counter() - start)
+    return len(trees) / best
+
+
+def main(size=100, depths=range(13, 21)):
+    """Measures the throughput of derivation (derivation.generate_tree), traversal (Tree.get_tree_info), copying
+    (Tree.__copy__), output (check_methods.get_output) and counting of nodes (check_methods.get_nodes_and_depth) of
+    full trees of each depth. Command line arguments are PonyGE2 arguments (default: --parameters pymax.txt)."""
+    grammar = params["BNF_GRAMMAR"]
+    nt_keys = grammar.non_terminals
+    print("%-6s %8s %10s %10s %10s %10s %10s" % ("depth", "nodes", "derive/s", "info/s", "copy/s", "output/s",
+                                                   "count/s"))
+    for depth in depths:
+        random.seed(depth)
+        trees = [Tree(str(grammar.start_rule["symbol"]), None) for _ in range(size)]
+        derive = timed(lambda tree: generate_tree(tree, [], [], "full", 0, 0, 0, depth), trees, 1)
+        nodes = sum(get_nodes_and_depth(tree)[0] for tree in trees) / size
+        print("%-6d %8.0f %10.0f %10.0f %10.0f %10.0f %10.0f" % (
+            depth, nodes, derive, timed(lambda tree: tree.get_tree_info(nt_keys, [], []), trees), timed(copy, trees),
+            timed(get_output, trees), timed(get_nodes_and_depth, trees)))
+
+
+if __name__ == '__main__':
+    set_params(sys.argv[1:] or ["--parameters", "pymax.txt"], create_files=False)
+    main()
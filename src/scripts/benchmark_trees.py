@@ -0,0 +1,42 @@
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm.parameters import params, set_params
+from operators.crossover import crossover
+from operators.initialisation import initialisation
+from operators.mutation import mutation
+
+
+def population(size: int, flat: bool, persistent: bool):
+    """Returns a population and the number of bytes allocated for it."""
+    params["FLAT_TREES"], params["PERSISTENT_TREES"] = flat, persistent
+    random.seed(0)
+    tracemalloc.start()
+    individuals = initialisation(size)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return individuals, allocated
+
+
+def main(size=500, generations=10):
+    """Compares memory per individual and throughput of subtree crossover and mutation of derivation trees
+    (representation.tree.Tree), flat trees (representation.flat_tree.FlatTree) and derivation trees sharing subtrees
+    (PERSISTENT_TREES). Command line arguments are PonyGE2 arguments (default: --parameters pymax.txt)."""
+    print("%-6s %14s %12s" % ("trees", "bytes/ind", "inds/s"))
+    for name, flat, persistent in (("tree", False, False), ("flat", True, False), ("shared", False, True)):
+        individuals, allocated = population(size, flat, persistent)
+        start = time.perf_counter()
+        for _ in range(generations):
+            individuals = mutation(crossover(individuals))[:size]
+        throughput = size * generations / (time.perf_counter() - start)
+        print("%-6s %14.0f %12.0f" % (name, allocated / size, throughput))
+
+
+if __name__ == '__main__':
+    set_params((sys.argv[1:] or ["--parameters", "pymax.txt"]) + ["--crossover", "subtree", "--mutation", "subtree"],
+               create_files=False)
+    main()
@@ -1,7 +1,9 @@
+import os
 import sqlite3
 import numpy
 import math
 import scipy
+from urllib.request import pathname2url
 
 __author__ = 'Tomasz Pawlak'
 
@@ -284,5 +286,14 @@ def prepare_connection(filename: str) -> sqlite3.Connection:
     cursor.execute("PRAGMA journal_mode=TRUNCATE")
     cursor.execute("PRAGMA page_size=" + str(1 << 15))
     cursor.execute("PRAGMA threads=3")
+    # functions cannot be (re)defined while a statement is active, e.g. PRAGMA journal_mode returning a row
+    cursor.close()
+    register_aggregates(db)
+    return db
+
+
+def prepare_readonly_connection(filename: str) -> sqlite3.Connection:
+    """Opens a database which is not modified while the connection is open, e.g. in workers of analyze.Runner"""
+    db = sqlite3.connect("file:%s?mode=ro&immutable=1" % pathname2url(os.path.abspath(filename)), 3600.0, uri=True)
     register_aggregates(db)
     return db
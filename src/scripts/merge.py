@@ -1,6 +1,10 @@
+import os
 import sys
 import sqlite3
 
+# Tables derived from the experiments by analyze.py, which updates them after merging
+derived_tables = {"experimentstat", "experimentfinalstat", "materialization"}
+
 
 class Descriptor:
     def __init__(self, path):
@@ -83,7 +87,127 @@ class Descriptor:
         self.db.commit()
 
 
+class ShardMerger:
+    """Merges shard databases, e.g. the private databases of runs, into a base database. Each shard is attached and copied
+    with a single INSERT ... SELECT per table in its own transaction, ids are shifted by the largest ids of the base
+    database."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.cursor = self.db.cursor()
+        self.cursor.execute("PRAGMA busy_timeout=%d" % (1 << 30))
+        self.cursor.execute("PRAGMA synchronous=OFF")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        self.cursor.execute("PRAGMA journal_mode=TRUNCATE")
+        self.cursor.execute("PRAGMA page_size=" + str(1 << 15))
+        # offsets are computed from sqlite_sequence, make sure it exists
+        self.cursor.execute("CREATE TABLE IF NOT EXISTS experiments(id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT)")
+
+    def columns(self, schema, table):
+        self.cursor.execute("PRAGMA %s.table_info(`%s`)" % (schema, table))
+        return [row[1] for row in self.cursor.fetchall()]
+
+    def tables(self):
+        """Returns tables of the attached shard with their parent tables, parents first. Derived tables are skipped."""
+        self.cursor.execute("SELECT name, sql FROM shard.sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+        tables = {}
+        for (table, sql) in self.cursor.fetchall():
+            if table.casefold() in derived_tables:
+                continue
+            self.cursor.execute("PRAGMA shard.foreign_key_list(`%s`)" % table)
+            parents = [row[2] for row in self.cursor.fetchall() if row[3] == "parent"]
+            tables[table] = (sql, parents[0] if parents else None)
+
+        ordered = []
+        while len(ordered) < len(tables):
+            ready = [table for table, (sql, parent) in tables.items() if table not in ordered and
+                     (parent is None or parent in ordered or parent not in tables or parent == table)]
+            # tables in a cycle of parents are appended in any order
+            ordered += ready or [table for table in tables if table not in ordered]
+        return [(table, tables[table][0], tables[table][1]) for table in ordered]
+
+    def max_id(self, table):
+        self.cursor.execute("SELECT max(id) FROM main.`%s`" % table)
+        max_id = self.cursor.fetchone()[0] or 0
+        self.cursor.execute("SELECT seq FROM main.sqlite_sequence WHERE name=?", (table,))
+        for (seq,) in self.cursor.fetchall():
+            max_id = max(max_id, int(seq))
+        return max_id
+
+    def merge(self, path):
+        self.cursor.execute("ATTACH DATABASE ? AS shard", (path,))
+        try:
+            self.cursor.execute("BEGIN IMMEDIATE TRANSACTION")
+            try:
+                tables = self.tables()
+
+                # create missing tables and columns
+                for (table, sql, parent) in tables:
+                    # sqlite_master keeps CREATE statements without IF NOT EXISTS
+                    self.cursor.execute(sql.replace("CREATE TABLE ", "CREATE TABLE IF NOT EXISTS ", 1))
+                    base_columns = {column.casefold() for column in self.columns("main", table)}
+                    for column in self.columns("shard", table):
+                        if column.casefold() not in base_columns:
+                            self.cursor.execute("ALTER TABLE main.`%s` ADD COLUMN `%s` NUMERIC NULL" % (table, column))
+
+                offsets = {table: self.max_id(table) for (table, sql, parent) in tables}
+
+                for (table, sql, parent) in tables:
+                    columns = self.columns("shard", table)
+                    values = []
+                    for column in columns:
+                        if column.casefold() == "id":
+                            values.append("`id`+%d" % offsets[table])
+                        elif column.casefold() == "parent" and parent in offsets:
+                            values.append("`parent`+%d" % offsets[parent])
+                        else:
+                            values.append("`%s`" % column)
+                    self.cursor.execute("INSERT INTO main.`%s`(%s) SELECT %s FROM shard.`%s`" % (
+                        table, ",".join("`%s`" % column for column in columns), ",".join(values), table))
+
+                self.cursor.execute("COMMIT")
+            except Exception:
+                self.cursor.execute("ROLLBACK")
+                raise
+        finally:
+            self.cursor.execute("DETACH DATABASE shard")
+
+    def close(self):
+        self.db.close()
+
+
+def shard_files(paths):
+    """Returns the .sqlite files of given files and folders."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, file) for file in os.listdir(path) if file.endswith(".sqlite"))
+        else:
+            files.append(path)
+    return files
+
+
+def merge_shards(base_path, paths, remove=False):
+    """Merges shard databases (files or folders of .sqlite files) into the base database, optionally removing merged
+    shards. Returns the number of merged shards."""
+    files = shard_files(paths)
+    merger = ShardMerger(base_path)
+    try:
+        for file in files:
+            merger.merge(file)
+            if remove:
+                os.remove(file)
+    finally:
+        merger.close()
+    return len(files)
+
+
 def main():
+    if sys.argv[1] == "--shards":
+        # merge.py --shards BASE SHARD... merges shard databases or folders of shards into BASE
+        print("Merged %d shards" % merge_shards(sys.argv[2], sys.argv[3:]))
+        return
+
     basePath = sys.argv[1]
     otherPath = sys.argv[2]
 
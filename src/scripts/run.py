@@ -7,6 +7,7 @@ import psutil
 import sys
 import pyximport
 import db
+from merge import merge_shards
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 pyximport.install(language_level=3, inplace=True)
@@ -136,6 +137,10 @@ def main():
     problems['scaling'].update(
        {p + "_" + str(t): "--grammar ZIMPL-dedicated-%s.bnf --extra_parameters PROBLEM='%s', TRAINING_SIZE=%d" % (p, p, t) for p in prob for t in training_sizes[p] if t != min(400, max(training_sizes[p]))})
 
+    # runs write private shard databases (see ZIMPL-experiment.txt), merge shards of completed runs first
+    if os.path.isdir("../results/shards"):
+        print("Merged shards: %d" % merge_shards("../results/results.sqlite", ["../results/shards"], remove=True))
+
     # pool = ProcessPool()
     pool = SlurmPool()
     detector = CompleteDetector()
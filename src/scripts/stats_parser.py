@@ -5,13 +5,14 @@ from utilities.algorithm.general import check_python_version
 
 check_python_version()
 
+from utilities.stats.stats_sink import read_stats
+
 import getopt
 import sys
 from os import getcwd, listdir, path, sep
 import matplotlib
 import numpy as np
 np.seterr(all="raise")
-import pandas as pd
 
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
@@ -139,12 +140,12 @@ def parse_stats_from_runs(experiment_name):
     # Array to store all stats
     full_stats = []
 
-    # Get list of all stats to parse. Check stats file of first run from
-    # runs folder.
-    ping_file = path.join(file_path, str(runs[0]), "stats.tsv")
+    # Load in the stats file of each run once.
+    run_stats = {run: read_stats(path.join(file_path, str(run))) for run in
+                 runs}
 
-    # Load in data and get the names of all stats.
-    stats = list(pd.read_csv(ping_file, sep="\t"))
+    # Get list of all stats to parse from the first run.
+    stats = list(run_stats[runs[0]])
     
     # Make list of stats we do not wish to parse.
     no_parse_list = ["gen", "total_inds", "time_adjust"]
@@ -157,11 +158,8 @@ def parse_stats_from_runs(experiment_name):
 
         # Iterate over all runs
         for run in runs:
-            # Get file name
-            file_name = path.join(file_path, str(run), "stats.tsv")
-
-            # Load in data
-            data = pd.read_csv(file_name, sep="\t")
+            # Get loaded data
+            data = run_stats[run]
 
             try:
                 # Try to extract specific stat from the data.
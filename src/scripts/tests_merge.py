@@ -0,0 +1,45 @@
+import os, sys
+import random
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import analyze
+import merge
+from benchmark_analyze import add_experiments
+
+
+class MergeTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def views(self, filename):
+        """Rows of the materialized views of a database prepared by analyze."""
+        db = analyze.prepare_db(filename)
+        try:
+            return {name: sorted(map(repr, db.execute("SELECT * FROM `%s`" % name))) for name in
+                    analyze.materialized_views}
+        finally:
+            db.close()
+
+    def test_merge_prepared_shard(self):
+        base, shard, whole = (os.path.join(self.dir.name, name) for name in ("base.sqlite", "shard.sqlite",
+                                                                              "whole.sqlite"))
+        for seed, filenames in ((0, (base, whole)), (1, (shard, whole))):
+            for filename in filenames:
+                random.seed(seed)
+                add_experiments(filename, 4, 3)
+
+        # Both databases have derived tables of analyze, they are updated after merging.
+        self.views(base)
+        self.views(shard)
+        self.assertEqual(merge.merge_shards(base, [shard]), 1)
+        self.assertEqual(self.views(base), self.views(whole))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+from array import array
 from copy import copy
 from sys import stdout
 from time import time
@@ -10,7 +11,7 @@ from utilities.stats import trackers
 from utilities.stats.save_plots import save_plot_from_data, \
     save_pareto_fitness_plot
 from utilities.stats.file_io import save_stats_to_file, save_stats_headers, \
-    save_best_ind_to_file, save_first_front_to_file
+    save_best_ind_to_file, save_first_front_to_file, close_stats_sink
 
 
 """Algorithm statistics"""
@@ -22,6 +23,9 @@ stats = {
         "runtime_error": 0,
         "unique_inds": len(trackers.cache),
         "unused_search": 0,
+        "phenotype_cache_lookups": 0,
+        "phenotype_cache_hits": 0,
+        "phenotype_cache_hit_rate": 0,
         "ave_genome_length": 0,
         "max_genome_length": 0,
         "min_genome_length": 0,
@@ -146,6 +150,10 @@ def get_soo_stats(individuals, end):
         elif params['VERBOSE'] or end:
             save_best_ind_to_file(stats, trackers.best_ever, end)
 
+        if end:
+            # Write all buffered stats and close the stats file.
+            close_stats_sink()
+
     if end and not params['SILENT']:
         print_final_stats()
 
@@ -274,6 +282,10 @@ def get_moo_stats(individuals, end):
         elif params['VERBOSE'] or end:
             save_first_front_to_file(stats, end)
 
+        if end:
+            # Write all buffered stats and close the stats file.
+            close_stats_sink()
+
     if end and not params['SILENT']:
         print_final_moo_stats()
 
@@ -302,6 +314,10 @@ def update_stats(individuals, end):
         stats['unique_inds'] = len(trackers.cache)
         stats['unused_search'] = 100 - stats['unique_inds'] / \
                                        stats['total_inds'] * 100
+        if stats['phenotype_cache_lookups'] > 0:
+            stats['phenotype_cache_hit_rate'] = \
+                stats['phenotype_cache_hits'] / \
+                stats['phenotype_cache_lookups'] * 100
 
     # Genome Stats
     genome_lengths = [len(i.genome) for i in individuals]
@@ -374,7 +390,8 @@ def print_final_stats():
         print("\n\nBest:\n  Fitness:\t", trackers.best_ever.fitness)
 
     print("  Phenotype:", trackers.best_ever.phenotype)
-    print("  Genome:", trackers.best_ever.genome)
+    genome = trackers.best_ever.genome
+    print("  Genome:", list(genome) if isinstance(genome, array) else genome)
     print_generation_stats()
 
 
@@ -74,6 +74,8 @@ typedef enum   lps_hash_type    LpsHashType;
 struct lps_hash_element
 {
    LpsHElem* next;
+   LpsHElem* prev_elem; /* list of all elements, avoids scanning the buckets */
+   LpsHElem* next_elem;
    union
    {
       Con* con;
@@ -88,6 +90,7 @@ struct lps_hash
    int          elems;
    LpsHashType  type;
    LpsHElem**   bucket;
+   LpsHElem*    first;
 };
 
 static void hash_statist(FILE* fp, const LpsHash* hash); //lint !e528 not referenced
@@ -136,7 +139,6 @@ static void lps_hash_free(LpsHash* hash)
 {
    LpsHElem*    he;
    LpsHElem*    hq;
-   unsigned int i;
       
    assert(hash_valid(hash));
 
@@ -145,13 +147,10 @@ static void lps_hash_free(LpsHash* hash)
    hash_statist(stdout, hash);
 #endif
 #endif
-   for(i = 0; i < hash->size; i++)
+   for(he = hash->first; he != NULL; he = hq)
    {
-      for(he = hash->bucket[i]; he != NULL; he = hq)
-      {
-         hq = he->next;
-         free(he);
-      }
+      hq = he->next_elem;
+      free(he);
    }
    free(hash->bucket);
    free(hash);
@@ -217,6 +216,31 @@ static Sos* hash_lookup_sos(const LpsHash* hash, const char* name)
    return (he == NULL) ? (Sos*)0 : he->value.sos;
 }
 
+static void hash_link_elem(LpsHash* hash, LpsHElem* he)
+{
+   he->prev_elem = NULL;
+   he->next_elem = hash->first;
+
+   if (hash->first != NULL)
+      hash->first->prev_elem = he;
+
+   hash->first = he;
+   hash->elems++;
+}
+
+static void hash_unlink_elem(LpsHash* hash, LpsHElem* he)
+{
+   if (he->prev_elem == NULL)
+      hash->first = he->next_elem;
+   else
+      he->prev_elem->next_elem = he->next_elem;
+
+   if (he->next_elem != NULL)
+      he->next_elem->prev_elem = he->prev_elem;
+
+   hash->elems--;
+}
+
 static void hash_add_var(LpsHash* hash, Var* var)
 {
    LpsHElem*    he = calloc(1, sizeof(*he));
@@ -231,7 +255,7 @@ static void hash_add_var(LpsHash* hash, Var* var)
    he->value.var       = var;
    he->next            = hash->bucket[hcode];
    hash->bucket[hcode] = he;
-   hash->elems++;
+   hash_link_elem(hash, he);
 
    assert(hash_lookup_var(hash, var->name) == var);
 }
@@ -259,7 +283,7 @@ static void hash_del_var(LpsHash* hash, const Var* var)
    else
       next->next = he->next;
 
-   hash->elems--;
+   hash_unlink_elem(hash, he);
 
    free(he);
 
@@ -280,7 +304,7 @@ static void hash_add_con(LpsHash* hash, Con* con)
    he->value.con       = con;
    he->next            = hash->bucket[hcode];
    hash->bucket[hcode] = he;
-   hash->elems++;
+   hash_link_elem(hash, he);
 
    assert(hash_lookup_con(hash, con->name) == con);
 }
@@ -299,7 +323,7 @@ static void hash_add_sos(LpsHash* hash, Sos* sos)
    he->value.sos       = sos;
    he->next            = hash->bucket[hcode];
    hash->bucket[hcode] = he;
-   hash->elems++;
+   hash_link_elem(hash, he);
 
    assert(hash_lookup_sos(hash, sos->name) == sos);
 }
@@ -327,7 +351,7 @@ static void hash_del_con(LpsHash* hash, const Con* con)
    else
       next->next = he->next;
 
-   hash->elems--;
+   hash_unlink_elem(hash, he);
 
    free(he);
 
@@ -65,7 +65,13 @@
 extern int yydebug;
 extern int yy_flex_debug;
 
-static const char* const options = "bD:fF:hl:mn:o:OP:rs:t:v:V";
+#ifdef _WIN32
+#define NULL_DEVICE "NUL"
+#else
+#define NULL_DEVICE "/dev/null"
+#endif
+
+static const char* const options = "bD:fF:hl:mn:o:OP:rSs:t:v:V";
 static const char* const usage   = "usage: %s [options] file ...\n";
 static const char* const title   = "This file was automatically generated by Zimpl";
 
@@ -83,6 +89,9 @@ static const char* const help =
 "                 the input file without extension.\n" \
 "  -P cmd         Pipe input through command, e.g. \"cpp -DONLY_X %%s\"\n" \
 "  -r             write CPLEX branching order file.\n" \
+"  -S             server mode: read names of ZPL files from stdin, one per line,\n" \
+"                 and translate each to both PY and LP format. Error messages\n" \
+"                 go to a file with .err extension, the exit code to stdout.\n" \
 "  -s seed        random number generator seed.\n" \
 "  -t lp|mps|hum|rlp|pip|py  select output format. Either LP (default), MPS format,\n" \
 "                 human readable HUM, randomly permuted LP, PIP polynomial IP, or PY for Python script.\n" \
@@ -174,6 +183,158 @@ static void check_write_ok(FILE* fp, const char* filename)
    }
 }
 
+typedef struct translation
+{
+   const char* filename;
+   const char* basefile;
+   int         name_length;
+   Prog*       prog;
+   void*       lp;
+} Translation;
+
+static void write_output(Translation* t, const char* extension, LpFormat format)
+{
+   char* outfile   = add_extention(t->basefile, extension);
+   char* prog_text = prog_tostr(t->prog, "\\ ", title, 128);
+   FILE* fp;
+
+   if (NULL == (fp = fopen(outfile, "w")))
+   {
+      fprintf(stderr, "*** Error 104: File open failed ");
+      perror(outfile);
+      free(prog_text);
+      free(outfile);
+      zpl_exit(EXIT_FAILURE);
+   }
+   zlp_write(t->lp, fp, format, prog_text);
+
+   check_write_ok(fp, outfile);
+
+   (void)fclose(fp);
+
+   free(prog_text);
+   free(outfile);
+}
+
+static void translate(void* data)
+{
+   Translation* t = data;
+   Set*         set;
+
+   /* Make symbol to hold entries of internal variables
+    */
+   set = set_pseudo_new();
+   (void)symbol_new(SYMBOL_NAME_INTERNAL, SYM_VAR, set, 100, ENTRY_NULL);
+   set_free(set);
+
+   t->prog = prog_new();
+
+   prog_load(t->prog, NULL, t->filename);
+
+   if (prog_is_empty(t->prog))
+   {
+      fprintf(stderr, "*** Error 168: No program statements to execute\n");
+      zpl_exit(EXIT_FAILURE);
+   }
+   t->lp = xlp_alloc(t->filename, false, NULL);
+   zlp_setnamelen(t->lp, t->name_length);
+
+   prog_execute(t->prog, t->lp);
+
+   /* Both outputs come from a single execution of the program.
+    * LP goes first, as the PY writer strips the extension from the name.
+    */
+   write_output(t, ".lp", LP_FORM_LPF);
+   write_output(t, ".py", LP_FORM_PY);
+}
+
+/* Server mode: translates ZPL files named on stdin until EOF. An empty line
+ * is answered immediately, so clients can check that the server is alive.
+ */
+static int serve(int name_length, unsigned long seed)
+{
+   char        line[4096];
+   char*       errfile;
+   Translation t;
+   bool        ok;
+   FILE*       out;
+
+   /* stdout is reserved for the exit codes; anything else printed is dropped.
+    */
+   if (NULL == (out = fdopen(dup(fileno(stdout)), "w")) || NULL == freopen(NULL_DEVICE, "w", stdout))
+   {
+      perror("server");
+      return EXIT_FAILURE;
+   }
+   while(NULL != fgets(line, (int)sizeof(line), stdin))
+   {
+      line[strcspn(line, "\r\n")] = '\0';
+
+      if (strlen(line) == 0)
+      {
+         fprintf(out, "%d\n", EXIT_SUCCESS);
+         fflush(out);
+         continue;
+      }
+      t.filename    = line;
+      t.basefile    = strip_extension(strdup(line));
+      t.name_length = name_length;
+      t.prog        = NULL;
+      t.lp          = NULL;
+
+      errfile = add_extention(t.basefile, ".err");
+
+      if (NULL == freopen(errfile, "w", stderr))
+      {
+         perror(errfile);
+         exit(EXIT_FAILURE);
+      }
+      stkchk_init();
+
+      blk_init();
+      str_init();
+      rand_init(seed);
+      numb_init(true);
+      elem_init();
+      set_init();
+      mio_init();
+      interns_init();
+      local_init();
+
+      ok = zpl_protected_call(translate, &t);
+
+      if (t.lp != NULL)
+         xlp_free(t.lp);
+
+      if (t.prog != NULL)
+         prog_free(t.prog);
+
+      local_exit();
+      interns_exit();
+      mio_exit();
+      symbol_exit();
+      define_exit();
+      set_exit();
+      elem_exit();
+      numb_exit();
+      str_exit();
+      blk_exit();
+
+      fflush(stderr);
+
+      fflush(stdout);
+
+      fprintf(out, "%d\n", ok ? EXIT_SUCCESS : EXIT_FAILURE);
+      fflush(out);
+
+      free(errfile);
+      free((char*)t.basefile);
+   }
+   (void)fclose(out);
+
+   return EXIT_SUCCESS;
+}
+
 int main(int argc, char* const* argv)
 {
    Prog*         prog;
@@ -193,6 +354,7 @@ int main(int argc, char* const* argv)
    bool          write_order = false;
    bool          write_mst   = false;
    bool          presolve    = false;
+   bool          server      = false;
    int           name_length = 0;
    char*         prog_text;
    unsigned long seed = 13021967UL;
@@ -281,6 +443,9 @@ int main(int argc, char* const* argv)
       case 'r' :
          write_order = true;
          break;
+      case 'S' :
+         server = true;
+         break;
       case 't' :
          switch(tolower(*optarg))
          {
@@ -324,6 +489,9 @@ int main(int argc, char* const* argv)
          abort();
       }
    }
+   if (server)
+      return serve(name_length, seed);
+
    if ((argc - optind) < 1)
    {
       fprintf(stderr, usage, argv[0]);      
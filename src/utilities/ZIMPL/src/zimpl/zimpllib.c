@@ -207,6 +207,28 @@ void zpl_add_parameter(const char* def)
    free(name); 
 }
 
+/* Calls callback(data). Errors reported by zpl_exit() return to here,
+ * instead of terminating the process. Returns false in case of an error.
+ */
+bool zpl_protected_call(void (*callback)(void*), void* data)
+{
+   volatile bool ret = false;
+
+   assert(callback != NULL);
+
+   if (0 == setjmp(zpl_read_env))
+   {
+      is_longjmp_ok = true;
+
+      callback(data);
+
+      ret = true;
+   }
+   is_longjmp_ok = false;
+
+   return ret;
+}
+
 bool zpl_read(const char* filename, bool with_management, void* user_data)
 {
    Prog*       prog = NULL;
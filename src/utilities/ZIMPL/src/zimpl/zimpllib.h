@@ -37,6 +37,8 @@ extern void         zpl_var_print(FILE* fp, const Var* var);
 /*lint -sem(        zpl_print_banner, 1p == 1) */
 extern void         zpl_print_banner(FILE* fp, bool with_license);
 
+/*lint -sem(        zpl_protected_call, 1p == 1) */
+extern bool         zpl_protected_call(void (*callback)(void*), void* data);
 /*lint -sem(        zpl_read, 1p >= 1) */
 extern bool         zpl_read(const char* filename, bool with_management, void* user_data);
 /*lint -sem(        zpl_read_with_args, 1p >= 2n && 2n > 0) */
@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+from queue import Queue
+from subprocess import PIPE, Popen
+from threading import Timer
+
+
+class CompileServer:
+    """Pool of long-lived ZIMPL processes running in server mode (zimpl -S).
+
+    A server process receives names of ZPL files over its stdin pipe and translates each program once to both the
+    Python and the LP format, so no process is launched per evaluated program. Sources and outputs live in a private
+    scratch directory of each worker (in RAM when /dev/shm is available). Workers are started lazily and belong to the
+    process that started them, thus a server inherited by a forked process (e.g., a MULTICORE evaluation pool) starts
+    its own workers on the first use."""
+    max_requests = 10000  # a worker is restarted after that many requests to release memory leaked by failed programs
+
+    def __init__(self, zimpl_path: str, workers: int = 1, timeout: int = 20):
+        self.zimpl_path = zimpl_path
+        self.workers = workers
+        self.timeout = timeout
+        self._pid = None
+        self._idle = None
+
+    def compile(self, name: str, source: str, load_lp=None) -> tuple:
+        """Translates ZIMPL source to a tuple (Python code, LP code). The generated Python class is called name.
+        If load_lp is given, it is called with the name of the LP file and its result replaces the LP code.
+        Raises ValueError for erroneous programs."""
+        if self._pid != os.getpid():
+            self._start()
+
+        worker = self._idle.get()
+        try:
+            return self._translate(worker, name, source, load_lp)
+        finally:
+            if worker.process.poll() is not None or worker.requests >= CompileServer.max_requests:
+                worker.close()
+                worker = self._spawn()
+            self._idle.put(worker)
+
+    def _translate(self, worker, name: str, source: str, load_lp) -> tuple:
+        base_filename = os.path.join(worker.working_dir, name)
+        with open(base_filename + ".zpl", "wt") as f:
+            f.write(source)
+        try:
+            exit_code = worker.request(base_filename + ".zpl", self.timeout)
+            stderr = ""
+            if os.path.exists(base_filename + ".err"):
+                with open(base_filename + ".err", "rt") as f:
+                    stderr = f.read()
+            if exit_code != 0 or len(stderr) > 0:
+                raise ValueError("Error in ZIMPL program. Exit code: %d.\n%s" % (exit_code, stderr))
+
+            with open(base_filename + ".py", "rt") as f:
+                py_code = f.read()
+            if load_lp is not None:
+                return py_code, load_lp(base_filename + ".lp")
+            with open(base_filename + ".lp", "rt") as f:
+                return py_code, f.read()
+        finally:
+            for ext in (".zpl", ".err", ".py", ".lp"):
+                try:
+                    os.unlink(base_filename + ext)
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        if self._pid != os.getpid():
+            return  # workers belong to another process
+        while not self._idle.empty():
+            self._idle.get().close()
+        self._pid = None
+
+    def _start(self):
+        self._pid = os.getpid()
+        self._idle = Queue()
+        for _ in range(self.workers):
+            self._idle.put(self._spawn())
+
+    @staticmethod
+    def supported(zimpl_path: str, timeout: int = 20) -> bool:
+        """Tells whether ZIMPL at zimpl_path supports server mode (-S), i.e., it was rebuilt from src/utilities/ZIMPL."""
+        try:
+            worker = _Worker(zimpl_path)
+        except OSError:
+            return False
+        try:
+            return worker.request("", timeout) == 0
+        finally:
+            worker.close()
+
+    def _spawn(self):
+        worker = _Worker(self.zimpl_path)
+        if worker.request("", self.timeout) != 0:
+            worker.close()
+            raise RuntimeError("ZIMPL at %s does not support server mode (-S); rebuild it from src/utilities/ZIMPL." % self.zimpl_path)
+        return worker
+
+    def __getstate__(self):
+        # pipes to workers cannot be shared with other processes
+        state = self.__dict__.copy()
+        state["_pid"] = state["_idle"] = None
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _Worker:
+    def __init__(self, zimpl_path: str):
+        self.working_dir = tempfile.mkdtemp(prefix="zimpl", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+        try:
+            self.process = Popen([zimpl_path, "-v0", "-l99", "-S"], cwd=self.working_dir, stdin=PIPE, stdout=PIPE, universal_newlines=True)
+        except OSError:
+            shutil.rmtree(self.working_dir, ignore_errors=True)
+            raise
+        self.requests = 0
+
+    def request(self, zpl_filename: str, timeout: int) -> int:
+        """Returns exit code of translation of zpl_filename; -1 if the translation did not finish within timeout."""
+        self.requests += 1
+        watchdog = Timer(timeout, self.process.kill)
+        watchdog.start()
+        try:
+            self.process.stdin.write(zpl_filename + "\n")
+            self.process.stdin.flush()
+            response = self.process.stdout.readline()
+        except OSError:
+            response = ""
+        finally:
+            watchdog.cancel()
+        if response == "":  # killed by watchdog or crashed
+            self.process.kill()
+            self.process.wait()
+            return self.process.returncode if self.process.returncode > 0 else -1
+        return int(response)
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.wait()
+        self.process.stdout.close()
+        shutil.rmtree(self.working_dir, ignore_errors=True)
@@ -1,8 +1,10 @@
-import runpy, os, re, platform
-from collections import defaultdict
+import runpy, os, re, platform, hashlib
+from collections import defaultdict, OrderedDict
 from subprocess import PIPE
 
 from numpy.random.mtrand import RandomState
+from scipy.linalg import null_space
+import scipy.sparse as sp
 from psutil import Popen, TimeoutExpired
 import pandas as pd
 import numpy as np
@@ -20,11 +22,30 @@ class Interpreter:
     enumerator_regex = re.compile(r'\(=(?P<code>(?!=\)).*)=\)')
     comment_regex = re.compile(r'#.*$')
 
-    def __init__(self, zpl_filename, unlink_files=True):
+    def __init__(self, zpl_filename, unlink_files=True, source=None, compile_server=None):
+        """Translates ZIMPL program to Python and LP code. With compile_server given, the program is translated by
+        the server without writing any files next to zpl_filename and the LP model is parsed into memory once;
+        source defaults to the content of zpl_filename."""
         working_dir = os.path.dirname(zpl_filename)
         name_noext = Interpreter.zpl_regex.sub(r"", zpl_filename)
         self.py_filename = name_noext + ".py"
         self.lp_filename = name_noext + ".lp"
+        self.unlink_files = unlink_files
+
+        if compile_server is not None:
+            if source is None:
+                with open(zpl_filename, "rt") as f:
+                    source = f.read()
+            py_code, model = compile_server.compile(os.path.basename(name_noext), source, Interpreter.read_model)
+
+            if len(py_code) > 2097152:
+                raise ValueError("The ZIMPL program transformed to py script exceeded the size limit. The file is %dMB large." % (len(py_code) >> 20))
+            self.program = self.load_program(py_code, os.path.basename(name_noext))
+            self.vars = [v for v in self.program.variables.keys() if not v.startswith("__")]  # omit auxiliary variables
+
+            self.lp_interpreter = LP_interpreter(self.lp_filename, self.vars, model)
+            return
+
         zpl_mtime = os.path.getmtime(zpl_filename)
 
         py_process = Popen([Interpreter.zimpl_path, "-v0", "-tpy", zpl_filename], cwd=working_dir, stderr=PIPE) if not os.path.exists(self.py_filename) or zpl_mtime > os.path.getmtime(
@@ -32,8 +53,6 @@ class Interpreter:
         lp_process = Popen([Interpreter.zimpl_path, "-v0", "-l99", "-tlp", zpl_filename], cwd=working_dir, stderr=PIPE) if not os.path.exists(self.lp_filename) or zpl_mtime > os.path.getmtime(
             self.lp_filename) else None
 
-        self.unlink_files = unlink_files
-
         if py_process is not None:
             try:
                 py_exit_code = py_process.wait(timeout=20)
@@ -77,6 +96,24 @@ class Interpreter:
 
         self.lp_interpreter = LP_interpreter(self.lp_filename, self.vars)
 
+    @staticmethod
+    def read_model(lp_filename: str) -> Model:
+        if os.stat(lp_filename).st_size > 2097152:
+            raise ValueError("The ZIMPL program transformed to LP format exceeded the size limit. The file is %dMB large." % (os.stat(lp_filename).st_size >> 20))
+        return read(lp_filename, LP_interpreter.gurobi_env)
+
+    def load_program(self, py_code: str, name: str):
+        namespace = {"__name__": __name__}
+        try:
+            exec(compile(py_code, self.py_filename, "exec"), namespace)
+            return namespace[name]()
+        except RecursionError as e:
+            with open(self.py_filename, "wt") as f:  # keep the script for inspection
+                f.write(py_code)
+            print(self.py_filename)
+            self.unlink_files = False
+            raise e
+
     def sample(self, n: int, positive_only: bool = True, class_column: bool = False) -> pd.DataFrame:
         vars = self.vars
         X = pd.DataFrame(columns=vars)
@@ -117,8 +154,8 @@ class Interpreter:
         This method does not work unless model contains integer variables.'''
         return self.lp_interpreter.sample_positive(n, method, budget, convert_to_int, seed)
 
-    def is_satisfied(self, X: pd.DataFrame):
-        return self.lp_interpreter.is_satisfied(X, self.program)
+    def is_satisfied(self, X: pd.DataFrame, constraint_cache=None):
+        return self.lp_interpreter.is_satisfied(X, constraint_cache)
 
     def generate_grammar(self):
         with open(os.path.dirname(__file__) + "/../../../grammars/ZIMPL-dedicated.bnf", "rt") as f:
@@ -197,14 +234,30 @@ class LP_interpreter:
     pinf = float("inf")
     ninf = float("-inf")
     max_fails = 5
+    feasibility_tol = 1e-6  # Gurobi's default FeasibilityTol
+    int_tol = 1e-5  # Gurobi's default IntFeasTol
+    har_chains = 16  # Markov chains run in parallel by the matrix Hit-and-Run sampler
     gurobi_env = Env("")
 
-    def __init__(self, lp_filename, vars):
+    def __init__(self, lp_filename, vars, model: Model = None):
         self.lp_filename = lp_filename
         self.vars = vars
+        self.model = model
+        self._polytope = None
+
+    def parsed_model(self) -> Model:
+        """Returns the model shared by all consumers; it must not be modified. The LP file is parsed on the first call
+        only."""
+        if self.model is None:
+            self.model = read(self.lp_filename, LP_interpreter.gurobi_env)
+        return self.model
+
+    def copy_model(self) -> Model:
+        """Returns a private copy of the model."""
+        return self.parsed_model().copy()
 
     def optimize(self) -> dict:
-        model = read(self.lp_filename, LP_interpreter.gurobi_env)
+        model = self.copy_model()
 
         gurobi_vars = [model.getVarByName(v) for v in self.vars if model.getVarByName(v) is not None]
         milp = any(v.VType in "BI" for v in gurobi_vars)
@@ -231,7 +284,7 @@ class LP_interpreter:
     def sample_positive_branch_and_cut(self, n: int, convert_to_int: bool):
         """Samples positive examples using solver. Distribution of examples is unknown except that all are positive.
         This method does not work unless model contains integer variables."""
-        model = read(self.lp_filename, LP_interpreter.gurobi_env)
+        model = self.copy_model()
         model.Params.PoolSearchMode = 2
         model.Params.PoolSolutions = n  # we want at least n feasible solutions
         model.Params.SolutionLimit = n  # we want no more than n feasible solutions
@@ -275,15 +328,104 @@ class LP_interpreter:
 
         return X
 
+    def polytope(self):
+        """Returns (vars, G, h, N, lb, ub, integer) such that the relaxed feasible region is {x: Gx <= h, lb <= x <= ub}
+        within the affine subspace spanned by the columns of N (None if there are no equality constraints) over
+        variables vars. Returns None unless the model is a (mixed integer) linear program over self.vars only."""
+        if self._polytope is None:
+            model = self.parsed_model()
+            gurobi_vars = model.getVars()
+            names = set(self.vars)
+            if len(gurobi_vars) == 0 or model.NumSOS > 0 or model.NumQConstrs > 0 or model.NumGenConstrs > 0 or \
+                    any(v.VarName not in names for v in gurobi_vars):
+                self._polytope = False
+                return None
+
+            index = {v.VarName: j for j, v in enumerate(gurobi_vars)}
+            vars = [v for v in self.vars if v in index]
+            order = [index[v] for v in vars]
+            gurobi_vars = [gurobi_vars[j] for j in order]
+            constrs = model.getConstrs()
+            A = model.getA().tocsc()[:, order].tocsr() if len(constrs) > 0 else sp.csr_matrix((0, len(vars)))
+            rhs = np.array(model.getAttr(GRB.Attr.RHS, constrs), dtype=np.double)
+            sense = np.array(model.getAttr(GRB.Attr.Sense, constrs), dtype=np.str_)
+
+            # Gx <= h
+            less, greater = sense == GRB.LESS_EQUAL, sense == GRB.GREATER_EQUAL
+            G = sp.vstack([A[less], -A[greater]]).tocsr()
+            h = np.concatenate([rhs[less], -rhs[greater]])
+            equal = sense == GRB.EQUAL
+            N = null_space(A[equal].toarray()) if equal.any() else None
+
+            lb = np.array(model.getAttr(GRB.Attr.LB, gurobi_vars), dtype=np.double)
+            ub = np.array(model.getAttr(GRB.Attr.UB, gurobi_vars), dtype=np.double)
+            integer = np.array([v.VType != GRB.CONTINUOUS for v in gurobi_vars], dtype=np.bool_)
+            self._polytope = (vars, G, h, N, lb, ub, integer)
+        return self._polytope or None
+
+    def canonical_hash(self):
+        """Returns hash of the normalized model, which is equal for programs that differ only in names of constraints,
+        order of constraints or terms, scaling of constraints, duplicate constraints or the objective. Returns None for
+        models with general or quadratic constraints."""
+        model = self.parsed_model()
+        if model.NumGenConstrs > 0 or model.NumQConstrs > 0:
+            return None
+        gurobi_vars = model.getVars()
+        names = np.array([v.VarName for v in gurobi_vars], dtype=np.str_)
+        rank = np.empty(len(names), dtype=np.int64)
+        rank[np.argsort(names, kind="stable")] = np.arange(len(names))
+        variables = sorted((v.VarName, v.VType, v.LB, v.UB) for v in gurobi_vars)
+
+        constrs = model.getConstrs()
+        A = model.getA().tocsr() if len(constrs) > 0 else sp.csr_matrix((0, len(names)))
+        rhs = model.getAttr(GRB.Attr.RHS, constrs)
+        sense = model.getAttr(GRB.Attr.Sense, constrs)
+        rows = set()
+        for i in range(A.shape[0]):
+            row = slice(A.indptr[i], A.indptr[i + 1])
+            order = np.argsort(rank[A.indices[row]])
+            columns, coefficients = rank[A.indices[row]][order], A.data[row][order]
+            columns, coefficients = columns[coefficients != 0.0], coefficients[coefficients != 0.0]
+            # scale to the largest absolute coefficient 1 and turn >= into <=; the first coefficient of = is positive
+            scale = np.abs(coefficients).max() if len(coefficients) > 0 else 1.0
+            if sense[i] == GRB.GREATER_EQUAL or (sense[i] == GRB.EQUAL and len(coefficients) > 0 and coefficients[0] < 0):
+                scale = -scale
+            row_sense = GRB.LESS_EQUAL if sense[i] == GRB.GREATER_EQUAL else sense[i]
+            rows.add((row_sense, tuple(columns.tolist()), tuple("%.12g" % c for c in coefficients / scale), "%.12g" % (rhs[i] / scale + 0.0)))  # + 0.0 turns -0.0 into 0.0
+
+        soss = []
+        for sos in model.getSOSs():
+            sos_type, sos_vars, weights = model.getSOS(sos)
+            soss.append((sos_type, sorted(zip((v.VarName for v in sos_vars), weights))))
+        return hashlib.sha1(repr((variables, sorted(rows), sorted(soss))).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def chords(X: np.ndarray, D: np.ndarray, G, h: np.ndarray, lb: np.ndarray, ub: np.ndarray):
+        """Returns (lambda_min, lambda_max) such that X[k] + lambda * D[k] satisfies Gx <= h and lb <= x <= ub for
+        lambda_min[k] <= lambda <= lambda_max[k]. The intervals are limited to [-1e6, 1e6]."""
+        # rows: constraints, upper bounds, lower bounds
+        slack = np.maximum(np.hstack([h - (G @ X.T).T, ub - X, X - lb]), 0.0)
+        rate = np.hstack([(G @ D.T).T, D, -D])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = slack / rate
+        lambda_max = np.minimum(np.where(rate > 1e-12, ratio, np.inf).min(1, initial=np.inf), 1e6)
+        lambda_min = np.maximum(np.where(rate < -1e-12, ratio, -np.inf).max(1, initial=-np.inf), -1e6)
+        inconsistent = lambda_min > lambda_max
+        lambda_min[inconsistent] = lambda_max[inconsistent] = 0.0
+        return lambda_min, lambda_max
+
     def sample_positive_hit_and_run(self, n: int, budget: int, seed: int = None):
         """Samples uniformly distributed positive examples from feasible region using Hit-and-Run algorithm."""
+        if self.polytope() is not None:
+            return self.sample_positive_matrix_hit_and_run(n, budget, seed)
+
         if seed is not None:
             random_state = np.random.get_state()
-            np.random.set_state(RandomState(seed))
+            np.random.set_state(RandomState(seed % 2 ** 32).get_state())
 
         fails = 0
 
-        model: Model = read(self.lp_filename, LP_interpreter.gurobi_env)
+        model: Model = self.copy_model()
         model.Params.PoolSolutions = 1  # do not use solution pool
 
         gurobi_vars = [model.getVarByName(v) for v in self.vars if model.getVarByName(v) is not None] if len(model.getVars()) > 0 else []
@@ -342,7 +484,7 @@ class LP_interpreter:
 
             random_direction = np.random.uniform(-1.0, 1.0, len_vars_tuple)
             for j, v in enumerate(gurobi_vars):
-                on_line_constraints[j] = model.addConstr(v, GRB.EQUAL, source_point[j] + random_direction[j] * _lambda)
+                on_line_constraints[j] = model.addConstr(v == source_point[j] + random_direction[j] * _lambda)
 
             # get bounds by maximizing and minimizing
             relax_ints()
@@ -392,7 +534,7 @@ class LP_interpreter:
                 # find the closest feasible point
                 # use delta variables to measure distance of a feasible solution to random_point
                 for j, v in enumerate(gurobi_vars):
-                    distance_diff_constraints[j] = model.addConstr(diff_variables[j], GRB.EQUAL, v - random_point[j])
+                    distance_diff_constraints[j] = model.addConstr(diff_variables[j] == v - random_point[j])
                     distance_delta_constraints[j] = model.addGenConstrAbs(delta_variables[j], diff_variables[j])
 
                 # minimize distance
@@ -429,10 +571,97 @@ class LP_interpreter:
         print("\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b", end="")
         return X
 
+    def sample_positive_matrix_hit_and_run(self, n: int, budget: int, seed: int = None):
+        """Samples uniformly distributed positive examples from feasible region using Hit-and-Run algorithm. Chords of
+        har_chains parallel chains are computed from the constraint matrix; the solver finds extreme points and rounds
+        points to the closest feasible point if there are integer variables."""
+        vars, G, h, N, lb, ub, integer = self.polytope()
+        random = RandomState(seed % 2 ** 32) if seed is not None else np.random
+
+        model = self.copy_model()
+        model.Params.PoolSolutions = 1  # do not use solution pool
+        gurobi_vars = [model.getVarByName(v) for v in vars]
+
+        chains = max(min(LP_interpreter.har_chains, n), 1)
+        source_points = np.empty((chains, len(vars)), dtype=np.double)
+        if LP_interpreter.find_extreme_point(model, gurobi_vars, source_points[0], random) is None:
+            return pd.DataFrame(columns=vars, index=pd.RangeIndex(start=0, stop=0), dtype=np.double)
+        source_points[1:] = source_points[0]  # chains diverge with their first random directions
+
+        if integer.any():
+            # minimize L1 distance to a point p using delta >= x - p and delta >= p - x
+            rounding_model = self.copy_model()
+            rounding_model.Params.PoolSolutions = 1
+            rounding_vars = [rounding_model.getVarByName(v) for v in vars]
+            delta_variables = [rounding_model.addVar(0, GRB.INFINITY, 1.0, GRB.CONTINUOUS, v.VarName + "_DELTA") for v in rounding_vars]
+            upper_constraints = [rounding_model.addConstr(d - v >= 0) for d, v in zip(delta_variables, rounding_vars)]
+            lower_constraints = [rounding_model.addConstr(d + v >= 0) for d, v in zip(delta_variables, rounding_vars)]
+            rounding_model.setObjective(quicksum(delta_variables), GRB.MINIMIZE)
+
+        fails = np.zeros(chains, dtype=np.int64)
+
+        def handle_new_fail(k):
+            fails[k] += 1
+            if fails[k] >= LP_interpreter.max_fails:
+                # start over with new random point
+                fails[k] = 0
+                assert LP_interpreter.find_extreme_point(model, gurobi_vars, source_points[k], random) is not None
+
+        X = pd.DataFrame(columns=vars, index=pd.RangeIndex(start=0, stop=n), dtype=np.double)
+        Xv = X.values
+        found = set()
+
+        i = 0
+        while i < n and budget > 0:
+            random_directions = random.uniform(-1.0, 1.0, source_points.shape)
+            if N is not None:
+                random_directions = random_directions @ N @ N.T  # stay within the subspace of equality constraints
+            lambda_min, lambda_max = LP_interpreter.chords(source_points, random_directions, G, h, lb, ub)
+            random_points = source_points + random.uniform(lambda_min, lambda_max)[:, np.newaxis] * random_directions
+
+            for k in range(chains):
+                if i >= n or budget <= 0:
+                    break
+                budget -= 1
+
+                # the first time lambda_min == lambda_max may be the case where source_point is brand new
+                if fails[k] > 0 and lambda_min[k] == lambda_max[k]:
+                    handle_new_fail(k)
+                    continue
+
+                random_point = random_points[k]
+                if integer.any():
+                    # find the closest feasible point
+                    rounding_model.setAttr(GRB.Attr.RHS, upper_constraints, (-random_point).tolist())
+                    rounding_model.setAttr(GRB.Attr.RHS, lower_constraints, random_point.tolist())
+                    rounding_model.optimize()
+                    assert rounding_model.Status in Interpreter.feasible_status
+                    random_point = np.array(rounding_model.getAttr(GRB.Attr.X, rounding_vars), dtype=np.double)
+                    random_point[integer] = np.round(random_point[integer])
+
+                key = (random_point + 0.0).tobytes()  # + 0.0 turns -0.0 into 0.0
+                if key in found:
+                    handle_new_fail(k)
+                else:
+                    found.add(key)
+                    fails[k] = 0
+                    Xv[i] = random_point
+                    source_points[k] = random_point
+                    print("\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\bProgress: %d/%d" % (i, n), end="")
+                    i += 1
+
+        if i < n:
+            # budget exceeded; shrink X
+            print("budget exceeded")
+            X = X[:i]
+
+        print("\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b\b", end="")
+        return X
+
     @staticmethod
-    def find_extreme_point(model: Model, gurobi_vars: list, source_point: np.ndarray):
+    def find_extreme_point(model: Model, gurobi_vars: list, source_point: np.ndarray, random=np.random):
         # random objective
-        obj = quicksum(np.random.uniform(-1.0, 1.0) * v for v in gurobi_vars)
+        obj = quicksum(random.uniform(-1.0, 1.0) * v for v in gurobi_vars)
 
         model.Params.InfUnbdInfo = 1
         model.setObjective(obj, GRB.MINIMIZE)
@@ -454,7 +683,7 @@ class LP_interpreter:
             model.Params.InfUnbdInfo = 0
             model.setObjective(0, GRB.MINIMIZE)
             model.optimize()
-            _lambda = np.random.uniform(0, 1e6)
+            _lambda = random.uniform(0, 1e6)
             for i, v in enumerate(gurobi_vars):
                 if v.VType == "C":
                     source_point[i] = v.X + _lambda * unbounded_ray[i]
@@ -470,21 +699,86 @@ class LP_interpreter:
                 source_point[i] = round(v.X) if v.VType in "BI" else v.X
             return source_point
 
-    def is_satisfied(self, X: pd.DataFrame, py_program=None):
-        if list(X.columns) == len(self.vars) and py_program is not None:  # if no auxiliary variables
-            return py_program.constraints(X)
+    @staticmethod
+    def satisfied(A, X: np.ndarray, rhs: np.ndarray, sense: np.ndarray) -> np.ndarray:
+        """Returns boolean matrix whether row i of X satisfies constraint j (A[j] x sense[j] rhs[j]) at [i, j]."""
+        lhs = np.asarray(A @ X.T).T
+        tol = LP_interpreter.feasibility_tol
+        return np.where(sense == GRB.LESS_EQUAL, lhs <= rhs + tol, np.where(sense == GRB.GREATER_EQUAL, lhs >= rhs - tol, np.abs(lhs - rhs) <= tol))
+
+    @staticmethod
+    def constraint_keys(A, rows: np.ndarray, rhs: np.ndarray, sense: np.ndarray, names: list) -> list:
+        """Returns keys of constraints in rows, which are equal for equal constraints in different models: the sense,
+        the terms sorted by variable names and the right-hand side."""
+        keys = []
+        for i in rows:
+            row = slice(A.indptr[i], A.indptr[i + 1])
+            terms = sorted(zip((names[j] for j in A.indices[row]), A.data[row].tolist()))
+            keys.append((sense[i], tuple(terms), float(rhs[i])))
+        return keys
+
+    def is_satisfied(self, X: pd.DataFrame, constraint_cache=None):
+        """Returns for each row of X whether the model is feasible with variables fixed to the values in the row.
+        Linear constraints over variables in X only are checked for all rows at once; the solver decides the rows that
+        satisfy them if the model has variables missing in X (e.g., auxiliary variables) or non-linear constraints.
+        A ConstraintCache dedicated to X memoizes rows of X satisfying each linear constraint."""
+        model = self.parsed_model()
+        gurobi_vars = model.getVars()
+        constrs = model.getConstrs()
+        columns = {c: j for j, c in enumerate(X.columns)}
+        observed = np.array([v.VarName in columns for v in gurobi_vars], dtype=np.bool_)
+
+        Xv = X.values
+        Xm = Xv[:, [columns[v.VarName] for v in gurobi_vars if v.VarName in columns]]
+        A = model.getA().tocsc() if len(constrs) > 0 else None
+        out = np.ones(X.shape[0], dtype=np.uint16)
+
+        vtypes = np.array([v.VType for v in gurobi_vars if v.VarName in columns], dtype=np.str_)
+        integers = vtypes != GRB.CONTINUOUS
+        if integers.any():
+            out &= (np.abs(Xm[:, integers] - np.round(Xm[:, integers])) <= LP_interpreter.int_tol).all(1)
+        binaries = vtypes == GRB.BINARY
+        if binaries.any():
+            # the solver keeps binary variables in {0, 1} even if their bounds are fixed to other values
+            out &= ((Xm[:, binaries] >= -LP_interpreter.int_tol) & (Xm[:, binaries] <= 1 + LP_interpreter.int_tol)).all(1)
+
+        if A is not None:
+            # constraints over observed variables only
+            checked = np.flatnonzero(np.diff(A[:, ~observed].tocsr().indptr) == 0)
+            rhs = np.array(model.getAttr(GRB.Attr.RHS, constrs), dtype=np.double)
+            sense = np.array(model.getAttr(GRB.Attr.Sense, constrs))
+            if constraint_cache is not None:
+                satisfied = np.packbits(np.ones(X.shape[0], dtype=np.bool_))
+                keys = LP_interpreter.constraint_keys(A.tocsr(), checked, rhs, sense, [v.VarName for v in gurobi_vars])
+                for key in keys:
+                    bits = constraint_cache.get(key)
+                    if bits is not None:
+                        satisfied &= bits
+                missing = [j for j, key in enumerate(keys) if key not in constraint_cache]
+                if len(missing) > 0:
+                    rows = checked[missing]
+                    for j, column in zip(missing, LP_interpreter.satisfied(A[:, observed][rows], Xm, rhs[rows], sense[rows]).T):
+                        bits = np.packbits(column)
+                        constraint_cache.put(keys[j], bits)
+                        satisfied &= bits
+                out &= np.unpackbits(satisfied, count=X.shape[0])
+            else:
+                out &= LP_interpreter.satisfied(A[:, observed][checked], Xm, rhs[checked], sense[checked]).all(1)
+            decided = len(checked) == len(constrs)
+        else:
+            decided = True
+
+        if decided and observed.all() and model.NumSOS == 0 and model.NumQConstrs == 0 and model.NumGenConstrs == 0:
+            return out
 
-        # use solver
-        model = read(self.lp_filename, LP_interpreter.gurobi_env)
+        # use solver for the remaining rows
+        model = model.copy()
         model.Params.PoolSolutions = 1
         model.Params.SolutionLimit = 1
 
-        out = np.empty((X.shape[0]), dtype=np.uint16)
-
         gurobi_vars = [model.getVarByName(v) for v in X.columns] if len(model.getVars()) > 0 else [None for v in X.columns]
 
-        Xv = X.values
-        for i in range(Xv.shape[0]):
+        for i in np.flatnonzero(out):
             for j in range(Xv.shape[1]):
                 _var = gurobi_vars[j]
                 if _var is None:
@@ -499,6 +793,44 @@ class LP_interpreter:
         return out
 
 
+class ConstraintCache:
+    """LRU cache of packed bitsets of rows of a data set satisfying a constraint, limited to max_bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        bits = self.entries.get(key)
+        if bits is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return bits
+
+    def put(self, key, bits: np.ndarray):
+        if key in self.entries:
+            return
+        self.entries[key] = bits
+        self.bytes += ConstraintCache.size(key, bits)
+        while self.bytes > self.max_bytes and len(self.entries) > 0:
+            self.bytes -= ConstraintCache.size(*self.entries.popitem(last=False))
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def size(key, bits: np.ndarray) -> int:
+        return bits.nbytes + 200 + 120 * len(key[1])  # approximate size of the key and the bitset with their headers
+
+
 LP_interpreter.gurobi_env.setParam(GRB.Param.LogToConsole, 0)
 LP_interpreter.gurobi_env.setParam(GRB.Param.Threads, 1)
 LP_interpreter.gurobi_env.setParam(GRB.Param.TimeLimit, 600)  # 10 minutes - protection from hanging in model solving
@@ -0,0 +1,52 @@
+import os, sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utilities.ZIMPLpy.interpreter import LP_interpreter
+
+model = """Maximize
+ obj: x + y + z
+Subject To
+ c1: x + y + z <= 10
+%s
+Bounds
+ 0 <= y <= 3
+ -1 <= z <= 4
+Binaries
+ x
+Generals
+ y
+End
+"""
+
+
+class LPInterpreterTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def is_satisfied(self, constraints, X):
+        filename = os.path.join(self.dir.name, "model.lp")
+        with open(filename, "wt") as f:
+            f.write(model % constraints)
+        return LP_interpreter(filename, list(X.columns)).is_satisfied(X).tolist()
+
+    def test_domains(self):
+        X = pd.DataFrame([[0, 0, 0], [1, 3, 4], [2, 0, 0], [-1, 0, 0], [0.5, 0, 0], [0, 1.5, 0], [1, 3, 0.5],
+                          [1, 3, 7]], columns=["x", "y", "z"], dtype=np.double)
+        expected = [1, 1, 0, 0, 0, 0, 1, 0]
+
+        # Rows are checked with matrix operations.
+        self.assertEqual(self.is_satisfied("", X), expected)
+        # A constraint over a variable missing in X makes the solver check the rows.
+        self.assertEqual(self.is_satisfied(" c2: w >= 0", X), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -431,6 +431,23 @@ def parse_cmd_args(arguments):
                         action='store_true',
                         default=None,
                         help='Saves plots for best fitness.')
+    parser.add_argument('--stats_format',
+                        dest='STATS_FORMAT',
+                        type=str,
+                        choices=['tsv', 'parquet'],
+                        help='Sets the format of the stats file, "tsv" or '
+                             '"parquet" (requires pyarrow).')
+    parser.add_argument('--stats_flush_interval',
+                        dest='STATS_FLUSH_INTERVAL',
+                        type=float,
+                        help='Sets the number of seconds after which '
+                             'buffered stats are written to files. Requires '
+                             'float value.')
+    parser.add_argument('--stats_flush_rows',
+                        dest='STATS_FLUSH_ROWS',
+                        type=int,
+                        help='Sets the number of buffered stats which are '
+                             'written to files at once. Requires int value.')
 
     # REVERSE-MAPPING
     parser.add_argument('--reverse_mapping_target',
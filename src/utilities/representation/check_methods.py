@@ -11,7 +11,7 @@ def check_ind(ind, check):
     :return: False if everything is ok, True if there is an issue.
     """
 
-    if ind.genome == []:
+    if ind.genome is not None and len(ind.genome) == 0:
         # Ensure all individuals at least have a genome.
         return True
 
@@ -47,9 +47,15 @@ def check_genome_mapping(ind):
     # Re-map individual using fast genome mapper to check everything is ok
     new_ind = individual.Individual(ind.genome, None)
     
-    # Get attributes of both individuals.
-    attributes_0 = vars(ind)
-    attributes_1 = vars(new_ind)
+    # Get attributes of both individuals. Individuals keep most attributes
+    # in slots, vars() only holds the others. Slots of properties (e.g.
+    # _tree) are read through the properties.
+    names = [name.lstrip('_') for name in individual.Individual.__slots__
+             if name != '__dict__']
+    attributes_0 = dict(vars(ind), **{name: getattr(ind, name, None) for
+                                      name in names})
+    attributes_1 = dict(vars(new_ind), **{name: getattr(new_ind, name, None)
+                                          for name in names})
     
     if params['GENOME_OPERATIONS']:
         # If this parameter is set then the new individual will have no tree.
@@ -228,37 +234,44 @@ def get_nodes_and_depth(tree, nodes=0, max_depth=0):
     :return: number, max_depth.
     """
 
-    # Increment number of nodes in the tree.
-    nodes += 1
+    # Visit nodes from an explicit stack, deep trees do not exceed the
+    # recursion limit.
+    stack = [tree]
 
-    # Set the depth of the current node.
-    if tree.parent:
-        tree.depth = tree.parent.depth + 1
-    else:
-        tree.depth = 1
-        
-    # Check the recorded max_depth.
-    if tree.depth > max_depth:
-        max_depth = tree.depth
-        
-    # Create list of all non-terminal children of current node.
-    NT_kids = [kid for kid in tree.children if kid.root in
-               params['BNF_GRAMMAR'].non_terminals]
-    
-    if not NT_kids and get_output(tree):
-        # Current node has only terminal children.
+    while stack:
+        tree = stack.pop()
+
+        # Increment number of nodes in the tree.
         nodes += 1
-        
-        # Terminal children increase the current node depth by one.
+
+        # Set the depth of the current node.
+        if tree.parent:
+            tree.depth = tree.parent.depth + 1
+        else:
+            tree.depth = 1
+
         # Check the recorded max_depth.
-        if tree.depth + 1 > max_depth:
-            max_depth = tree.depth + 1
-    
-    else:
-        for child in NT_kids:
-            # Recurse over all children.
-            nodes, max_depth = get_nodes_and_depth(child, nodes, max_depth)
-    
+        if tree.depth > max_depth:
+            max_depth = tree.depth
+
+        # Create list of all non-terminal children of current node.
+        NT_kids = [kid for kid in tree.children if kid.root in
+                   params['BNF_GRAMMAR'].non_terminals]
+
+        if not NT_kids and "".join(kid.root for kid in tree.children):
+            # Current node has only terminal children, which produce some
+            # output.
+            nodes += 1
+
+            # Terminal children increase the current node depth by one.
+            # Check the recorded max_depth.
+            if tree.depth + 1 > max_depth:
+                max_depth = tree.depth + 1
+
+        else:
+            # Visit all children.
+            stack.extend(reversed(NT_kids))
+
     return nodes, max_depth
 
 
@@ -308,38 +321,38 @@ def get_current_depth(tree):
 
 def get_output(ind_tree):
     """
-    Calls the recursive build_output(self) which returns a list of all
-    node roots. Joins this list to create the full phenotype of an
-    individual. This two-step process speeds things up as it only joins
-    the phenotype together once rather than at every node.
+    Builds a list of all node roots. Joins this list to create the full
+    phenotype of an individual. This two-step process speeds things up as
+    it only joins the phenotype together once rather than at every node.
 
     :param ind_tree: a full tree for which the phenotype string is to be built.
     :return: The complete built phenotype string of an individual.
     """
-    
-    def build_output(tree):
-        """
-        Recursively adds all node roots to a list which can be joined to
-        create the phenotype.
 
-        :return: The list of all node roots.
-        """
-        
-        output = []
-        for child in tree.children:
+    output = []
+
+    # Visit children in order from an explicit stack of iterators over
+    # children, deep trees do not exceed the recursion limit.
+    stack = [iter(ind_tree.children)]
+
+    while stack:
+        for child in stack[-1]:
             if not child.children:
                 # If the current child has no children it is a terminal.
                 # Append it to the output.
                 output.append(child.root)
-            
+
             else:
-                # Otherwise it is a non-terminal. Recurse on all
-                # non-terminals.
-                output += build_output(child)
-        
-        return output
-    
-    return "".join(build_output(ind_tree))
+                # Otherwise it is a non-terminal. Visit its children before
+                # its siblings.
+                stack.append(iter(child.children))
+                break
+
+        else:
+            # All children of the iterator have been visited.
+            stack.pop()
+
+    return "".join(output)
 
 
 def ret_true(obj):
@@ -1,10 +1,12 @@
 import math
+import queue
 import re
 import sqlite3
 import sys
+import threading
 import unicodedata
 
-from collections import Iterable
+from collections.abc import Iterable
 from requests.structures import CaseInsensitiveDict
 from sortedcontainers import SortedSet
 
@@ -23,6 +25,9 @@ class DataSet(CaseInsensitiveDict):
     @property
     def id(self) -> int:
         self.__check_closed()
+        if self.__id == -1 and self.__queued:
+            # the id is assigned when the write-behind thread writes the data set
+            self.__database.flush()
         return self.__id
 
     @property
@@ -43,6 +48,7 @@ class DataSet(CaseInsensitiveDict):
         self.__id = -1
         self.__database = None
         self.__closed = False
+        self.__queued = False
         self.__table_name = Helpers.fix_data_object_name(name)
         self.__parent = parent
         self.__database = database
@@ -62,6 +68,11 @@ class DataSet(CaseInsensitiveDict):
     def save(self, with_children=True):
         self.__check_closed()
 
+        if self.__database.write_behind:
+            # the data set is written later by the write-behind thread of the database
+            self.__database.enqueue(self.__snapshot(with_children))
+            return
+
         try:
             self.__database.engine.begin_transaction()
 
@@ -99,6 +110,32 @@ class DataSet(CaseInsensitiveDict):
                 pass
             raise DatabaseException("Cannot save DataSet") from ex
 
+    def __snapshot(self, with_children: bool) -> list:
+        """Returns rows (data set, table name, values, parent, parent table name) to be written in write-behind mode. The row
+        of a parent that was never saved precedes the row of its child."""
+        rows = []
+        if self.__parent is not None and self.__parent.__id == -1 and not self.__parent.__queued:
+            rows += self.__parent.__snapshot(False)
+
+        self.__queued = True
+        rows.append((self, self.__table_name, dict(self), self.__parent,
+                     self.__parent.__table_name if self.__parent is not None else None))
+
+        if with_children:
+            for child in self.__children:
+                rows += child.__snapshot(True)
+
+        return rows
+
+    def _get_id(self) -> int:
+        """Returns the id of the data set even if it is closed. Used by the write-behind thread."""
+        return self.__id
+
+    def _set_id(self, id: int):
+        """Sets the id of the data set written by the write-behind thread."""
+        assert self.__id == -1 or self.__id == id
+        self.__id = id
+
     def __check_closed(self):
         if self.__closed:
             raise DatabaseException("The object is already closed")
@@ -129,10 +166,15 @@ class Experiment(DataSet):
 class Database:
     __CREATE_EXPERIMENTS_TABLE = "CREATE TABLE IF NOT EXISTS experiments(id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT)"
 
-    def __init__(self, database_filename: str):
+    def __init__(self, database_filename: str, write_behind: bool = False):
+        """In write-behind mode, saved data sets are queued and written by a background thread, which writes all queued data
+        sets of a table with a single executemany in one transaction. Saving never waits for the database, errors are
+        raised by the subsequent save, flush() or closing of the database."""
         try:
             self.__closed = False
-            self.engine = DatabaseEngine(database_filename)
+            self.write_behind = write_behind
+            # the connection is used by the write-behind thread after initialization
+            self.engine = DatabaseEngine(database_filename, check_same_thread=not write_behind)
             try:
                 self.engine.begin_transaction()
                 self.__prepare_schema()
@@ -144,15 +186,130 @@ class Database:
         except Exception as ex:
             raise DatabaseException("Cannot initialize database.") from ex
 
+        self.__queue = queue.Queue()
+        self.__error = None
+        self.__writer = None
+        if write_behind:
+            self.__writer = threading.Thread(target=self.__write_queued, name="ExperimentDatabaseWriter", daemon=True)
+            self.__writer.start()
+
     def new_experiment(self) -> Experiment:
         self.__check_closed()
         return Experiment(self)
 
+    def enqueue(self, rows: list):
+        """Queues rows (data set, table name, values, parent, parent table name) for the write-behind thread."""
+        self.__check_closed()
+        self.__raise_error()
+        self.__queue.put(rows)
+
+    def flush(self):
+        """Waits until the write-behind thread writes all queued data sets."""
+        self.__check_closed()
+        if self.write_behind:
+            self.__queue.join()
+            self.__raise_error()
+
+    def __raise_error(self):
+        if self.__error is not None:
+            ex, self.__error = self.__error, None
+            raise DatabaseException("Cannot save DataSet") from ex
+
+    def __write_queued(self):
+        """The loop of the write-behind thread. Writes all rows queued at once, until None is queued."""
+        while True:
+            batches = [self.__queue.get()]
+            while True:
+                try:
+                    batches.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                rows = [row for batch in batches if batch is not None for row in batch]
+                if rows:
+                    self.__write_rows(rows)
+            except Exception as ex:
+                self.__error = ex
+            finally:
+                for _ in batches:
+                    self.__queue.task_done()
+
+            if any(batch is None for batch in batches):
+                return
+
+    def __write_rows(self, rows: list):
+        """Writes rows (data set, table name, values, parent, parent table name) in a single transaction, with one executemany per table. Ids
+        of new data sets are allocated from the largest id of their table, which is safe as the transaction holds the
+        write lock from its start."""
+        tables = {}
+        for row in rows:
+            tables.setdefault(row[1], []).append(row)
+
+        ids = {}
+        self.engine.begin_transaction(immediate=True)
+        try:
+            # columns by case-folded name, which SQLite compares case-insensitively
+            table_columns = {}
+            for table, table_rows in tables.items():
+                columns, parent_table = {}, None
+                for _, _, values, parent, parent_table_name in table_rows:
+                    if parent is not None:
+                        columns.setdefault("parent", "parent")
+                        parent_table = parent_table_name
+                    for col in values:
+                        if not Helpers.equals_ignore_case("id", col) and not Helpers.equals_ignore_case("parent", col):
+                            columns.setdefault(Helpers.normalize_caseless(col), col)
+                self.__ensure_columns(table, columns.values(), parent_table)
+                table_columns[table] = columns
+
+            # allocate ids of new data sets in the order of rows, so parents precede their children
+            next_ids = {}
+            for data_set, table, _, _, _ in rows:
+                if data_set._get_id() < 0 and id(data_set) not in ids:
+                    if table not in next_ids:
+                        next_ids[table] = self.__get_max_id(table) + 1
+                    ids[id(data_set)] = next_ids[table]
+                    next_ids[table] += 1
+
+            def get_id(data_set):
+                return data_set._get_id() if data_set._get_id() >= 0 else ids[id(data_set)]
+
+            for table, table_rows in tables.items():
+                columns = table_columns[table]
+                insert = "INSERT OR REPLACE INTO `%s`(`id`%s) VALUES (?%s)" % (
+                    table, "".join(",`%s`" % col for col in columns.values()), ",?" * len(columns))
+                parameters = []
+                for data_set, _, values, parent, _ in table_rows:
+                    values = {Helpers.normalize_caseless(col): value for (col, value) in values.items()}
+                    if parent is not None:
+                        values["parent"] = get_id(parent)
+                    parameters.append([get_id(data_set)] + [
+                        None if isinstance(value, float) and math.isnan(value) else value
+                        for value in (values.get(col) for col in columns)])
+                self.engine.executemany(insert, parameters)
+
+            self.engine.commit()
+        except Exception as ex:
+            self.engine.rollback()
+            raise ex
+
+        for data_set, _, _, _, _ in rows:
+            if id(data_set) in ids:
+                data_set._set_id(ids[id(data_set)])
+
+    def __get_max_id(self, table: str) -> int:
+        """Returns the largest id ever used in a table, including ids of deleted rows of AUTOINCREMENT tables."""
+        max_id = self.engine.execute("SELECT max(id) FROM `%s`" % table).fetchone()[0] or 0
+        for row in self.engine.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)):
+            max_id = max(max_id, row["seq"])
+        return max_id
+
     def write_data(self, set: DataSet):
         self.__check_closed()
         try:
             self.engine.begin_transaction()
-            self.__ensure_columns(set)
+            self.__ensure_columns(set.table_name, set, set.parent.table_name if "parent" in set else None)
             insert = self.__build_insert_statement(set)
             parameters = {col: None if isinstance(value, float) and math.isnan(value) else value for (col, value) in set.items()}
             self.engine.execute(insert, parameters)
@@ -183,40 +340,40 @@ class Database:
         if self.__closed:
             raise DatabaseException("Database is already closed")
 
-    def __create_table(self, set: DataSet):
-        sql = "CREATE TABLE IF NOT EXISTS `%s`(id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT" % set.table_name
-        for col in set:
+    def __create_table(self, table_name: str, columns, parent_table_name: str):
+        sql = "CREATE TABLE IF NOT EXISTS `%s`(id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT" % table_name
+        for col in columns:
             if Helpers.equals_ignore_case("id", col):
                 continue
 
             sql += ",`%s`" % col
 
             if Helpers.equals_ignore_case("parent", col):
-                sql += " INTEGER NOT NULL REFERENCES `%s`(id) ON DELETE CASCADE ON UPDATE CASCADE DEFERRABLE INITIALLY DEFERRED" % set.parent.table_name
+                sql += " INTEGER NOT NULL REFERENCES `%s`(id) ON DELETE CASCADE ON UPDATE CASCADE DEFERRABLE INITIALLY DEFERRED" % parent_table_name
             else:
                 sql += " NUMERIC NULL"
         sql += ")"
         self.engine.execute(sql)
-        current_columns = self.__get_column_info(set.table_name)
-        self._columns[set.table_name] = current_columns
+        current_columns = self.__get_column_info(table_name)
+        self._columns[table_name] = current_columns
 
         return current_columns
 
-    def __ensure_columns(self, set: DataSet):
-        """Makes sure that a tables contains columns from a given set. If not, then the columns are created."""
+    def __ensure_columns(self, table_name: str, columns, parent_table_name: str = None):
+        """Makes sure that a tables contains given columns. If not, then the columns are created."""
 
         # This is only a view of database, actually the database table can contain such a column even if the collection not.
         # However if the view contains a column, it is guaranteed that database table has such a column.
-        if set.table_name in self._columns:
-            current_columns = self._columns[set.table_name]
+        if table_name in self._columns:
+            current_columns = self._columns[table_name]
         else:
-            current_columns = self.__create_table(set)
+            current_columns = self.__create_table(table_name, columns, parent_table_name)
             # Even if table does not exist in database, we cannot assume that creation of a table with all columns
             # specified by the argument will fulfill our requirements. This is because, to suppress errors, we added
             # IF NOT EXISTS clause to the CREATE statement. In case that the table actually exists, it may not
             # have all required columns. So, continue...
 
-        for col in set:
+        for col in columns:
             if col not in current_columns:
                 try:
                     # create column in database
@@ -225,7 +382,7 @@ class Database:
                     # INTEGER and REAL values are supposed to consume less storage space than the corresponding
                     # TEXT values. What's important the data type conversions are made mostly implicitly by
                     # database engine executing query. See http://www.sqlite.org/datatype3.html for more details.
-                    self.engine.execute("ALTER TABLE `%s` ADD COLUMN `%s` NUMERIC NULL" % (set.table_name, col))
+                    self.engine.execute("ALTER TABLE `%s` ADD COLUMN `%s` NUMERIC NULL" % (table_name, col))
                 except Exception:
                     # just ignore it
                     pass
@@ -255,11 +412,18 @@ class Database:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.__check_closed()
         if not self.__closed:
+            if self.__writer is not None:
+                # write all queued data sets and stop the write-behind thread
+                self.__queue.put(None)
+                self.__writer.join()
+
             # engine may be null if it crashed during this object initialization
             if self.engine is not None:
                 self.engine.__exit__(exc_type, exc_val, exc_tb)
                 self.__closed = True
 
+            self.__raise_error()
+
 
 class DatabaseEngine:
     __extensions = []
@@ -269,10 +433,10 @@ class DatabaseEngine:
         self.__cursor.execute("SELECT last_insert_rowid()")
         return int(self.__cursor.fetchone()[0])
 
-    def __init__(self, database_file):
+    def __init__(self, database_file, check_same_thread=True):
         self.__closed = False
         self.__current_transaction_level = 0
-        self.__connection = sqlite3.connect(database_file, 60.0, isolation_level="DEFERRED")
+        self.__connection = sqlite3.connect(database_file, 60.0, isolation_level="DEFERRED", check_same_thread=check_same_thread)
         self.__connection.row_factory = sqlite3.Row
         self.__cursor = self.__connection.cursor()
         self.__cursor.execute("PRAGMA busy_timeout = %d" % (1 << 30))
@@ -288,13 +452,14 @@ class DatabaseEngine:
         for ext in self.__extensions:
             raise NotImplementedError("Support for extensions is not implemented yet")
 
-    def begin_transaction(self):
+    def begin_transaction(self, immediate=False):
         """Begins database transaction. The subsequent calls to this method increase the level of transactions stack, i.e.
         nested transactions are supported.However the data is guaranteed to be committed to disk, only if the outer most
-        transaction is committed.The roll backs of outer transactions also roll back the nested transactions."""
+        transaction is committed.The roll backs of outer transactions also roll back the nested transactions. An immediate
+        outer most transaction acquires the write lock at its start."""
         self.__check_closed()
         if self.__current_transaction_level == 0:
-            self.__cursor.execute("BEGIN DEFERRED TRANSACTION")
+            self.__cursor.execute("BEGIN %s TRANSACTION" % ("IMMEDIATE" if immediate else "DEFERRED"))
         else:
             self.__cursor.execute("SAVEPOINT sp_%d" % self.__current_transaction_level)
         self.__current_transaction_level += 1  # in case SAVEPOINT failed
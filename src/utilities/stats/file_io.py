@@ -1,9 +1,53 @@
+import atexit
+from array import array
 from os import path, getcwd, makedirs
 from shutil import rmtree
 from copy import copy
 
 from algorithm.parameters import params
 from utilities.stats import trackers
+from utilities.stats.stats_sink import TSVStatsSink, ParquetStatsSink
+
+# Stats sinks by STATS_FORMAT.
+stats_sinks = {"tsv": TSVStatsSink, "parquet": ParquetStatsSink}
+
+
+def open_stats_sink(stats, append=False):
+    """
+    Opens a sink for the stats and best individuals of the current run,
+    closing the previous one.
+
+    :param stats: The stats.stats.stats dictionary.
+    :param append: A boolean flag to append to an existing stats file, e.g.
+    when a run is loaded from a saved state.
+    :return: Nothing.
+    """
+
+    close_stats_sink()
+
+    if params['STATS_FORMAT'] not in stats_sinks:
+        s = "utilities.stats.file_io.open_stats_sink\n" \
+            "Error: unknown STATS_FORMAT %s, must be one of %s." % \
+            (params['STATS_FORMAT'], ", ".join(stats_sinks))
+        raise Exception(s)
+
+    trackers.stats_sink = stats_sinks[params['STATS_FORMAT']](
+        params['FILE_PATH'], sorted(stats.keys()),
+        params['STATS_FLUSH_INTERVAL'], params['STATS_FLUSH_ROWS'], append)
+
+
+@atexit.register
+def close_stats_sink():
+    """
+    Writes all buffered stats and best individuals of the current run and
+    closes the stats file. Called on exit as well.
+
+    :return: Nothing.
+    """
+
+    if trackers.stats_sink is not None:
+        trackers.stats_sink.close()
+        trackers.stats_sink = None
 
 
 def save_stats_to_file(stats, end=False):
@@ -16,38 +60,29 @@ def save_stats_to_file(stats, end=False):
     :return: Nothing.
     """
 
+    if trackers.stats_sink is None:
+        # The headers were saved by a previous process, e.g. the run was
+        # loaded from a saved state. Append to the stats file.
+        open_stats_sink(stats, append=True)
+
     if params['VERBOSE']:
-        filename = path.join(params['FILE_PATH'], "stats.tsv")
-        savefile = open(filename, 'a')
-        for stat in sorted(stats.keys()):
-            savefile.write(str(stats[stat]) + "\t")
-        savefile.write("\n")
-        savefile.close()
+        trackers.stats_sink.write(stats)
 
     elif end:
-        filename = path.join(params['FILE_PATH'], "stats.tsv")
-        savefile = open(filename, 'a')
         for item in trackers.stats_list:
-            for stat in sorted(item.keys()):
-                savefile.write(str(item[stat]) + "\t")
-            savefile.write("\n")
-        savefile.close()
+            trackers.stats_sink.write(item)
 
 
 def save_stats_headers(stats):
     """
-    Saves the headers for all stats in the stats dictionary.
+    Saves the headers for all stats in the stats dictionary. Opens a new
+    stats file.
 
     :param stats: The stats.stats.stats dictionary.
     :return: Nothing.
     """
 
-    filename = path.join(params['FILE_PATH'], "stats.tsv")
-    savefile = open(filename, 'w')
-    for stat in sorted(stats.keys()):
-        savefile.write(str(stat) + "\t")
-    savefile.write("\n")
-    savefile.close()
+    open_stats_sink(stats)
 
 
 def save_best_ind_to_file(stats, ind, end=False, name="best"):
@@ -63,20 +98,27 @@ def save_best_ind_to_file(stats, ind, end=False, name="best"):
     """
 
     filename = path.join(params['FILE_PATH'], (str(name) + ".txt"))
-    savefile = open(filename, 'w')
-    savefile.write("Generation:\n" + str(stats['gen']) + "\n\n")
-    savefile.write("Phenotype:\n" + str(ind.phenotype) + "\n\n")
-    savefile.write("Genotype:\n" + str(ind.genome) + "\n")
-    savefile.write("Tree:\n" + str(ind.tree) + "\n")
+    text = ["Generation:\n" + str(stats['gen']) + "\n\n"]
+    text.append("Phenotype:\n" + str(ind.phenotype) + "\n\n")
+    genome = list(ind.genome) if isinstance(ind.genome, array) else ind.genome
+    text.append("Genotype:\n" + str(genome) + "\n")
+    text.append("Tree:\n" + str(ind.tree) + "\n")
     if hasattr(params['FITNESS_FUNCTION'], "training_test"):
         if end:
-            savefile.write("\nTraining fitness:\n" + str(ind.training_fitness))
-            savefile.write("\nTest fitness:\n" + str(ind.test_fitness))
+            text.append("\nTraining fitness:\n" + str(ind.training_fitness))
+            text.append("\nTest fitness:\n" + str(ind.test_fitness))
         else:
-            savefile.write("\nFitness:\n" + str(ind.fitness))
+            text.append("\nFitness:\n" + str(ind.fitness))
     else:
-        savefile.write("\nFitness:\n" + str(ind.fitness))
-    savefile.close()
+        text.append("\nFitness:\n" + str(ind.fitness))
+
+    if trackers.stats_sink is not None:
+        # Buffer the file, it is written on the next flush of the sink.
+        trackers.stats_sink.write_file(filename, "".join(text))
+
+    else:
+        with open(filename, 'w') as savefile:
+            savefile.write("".join(text))
 
 
 def save_first_front_to_file(stats, end=False, name="first"):
@@ -96,6 +138,10 @@ def save_first_front_to_file(stats, end=False, name="first"):
     # Define the new file path.
     params['FILE_PATH'] = path.join(orig_file_path, str(name)+"_front")
 
+    if trackers.stats_sink is not None:
+        # Write buffered files of the previous front before it is removed.
+        trackers.stats_sink.flush()
+
     # Check if the front folder exists already
     if path.exists(params['FILE_PATH']):
 
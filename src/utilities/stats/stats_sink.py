@@ -0,0 +1,260 @@
+"""Sinks which buffer the stats and best individuals of a run and write them
+to files in batches."""
+
+import abc
+import csv
+from numbers import Number
+from os import path, replace
+from time import monotonic
+
+
+class StatsSink(metaclass=abc.ABCMeta):
+    """
+    Base class of stats sinks. Rows of stats and the contents of other files
+    are buffered until at least flush_interval seconds have passed since the
+    last flush, or flush_rows rows and files are buffered.
+    """
+
+    def __init__(self, columns, flush_interval, flush_rows):
+        """
+        :param columns: The names of all stats, in the order of the columns.
+        :param flush_interval: The number of seconds after which buffered
+        rows and files are written.
+        :param flush_rows: The number of buffered rows and files which are
+        written at once.
+        """
+
+        self.columns = columns
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+
+        # Buffered rows of stats and contents of files by file name.
+        self.rows, self.files = [], {}
+        self.last_flush = monotonic()
+
+    def write(self, stats):
+        """
+        Buffers a row of stats.
+
+        :param stats: The stats.stats.stats dictionary.
+        :return: Nothing.
+        """
+
+        self.rows.append([stats.get(stat) for stat in self.columns])
+        self.flush_if_due()
+
+    def write_file(self, filename, text, flush=False):
+        """
+        Buffers the contents of a file, replacing buffered contents of the
+        same file.
+
+        :param filename: The full name of the file.
+        :param text: The contents of the file.
+        :param flush: A boolean flag to write all buffered rows and files.
+        :return: Nothing.
+        """
+
+        self.files[filename] = text
+
+        if flush:
+            self.flush()
+
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """
+        Writes all buffered rows and files if the flush policy is met.
+
+        :return: Nothing.
+        """
+
+        if len(self.rows) + len(self.files) >= self.flush_rows or \
+                monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all buffered rows and files.
+
+        :return: Nothing.
+        """
+
+        if self.rows:
+            self.write_rows(self.rows)
+            self.rows = []
+
+        for filename, text in self.files.items():
+            with open(filename, 'w') as savefile:
+                savefile.write(text)
+        self.files = {}
+
+        self.last_flush = monotonic()
+
+    @abc.abstractmethod
+    def write_rows(self, rows):
+        """
+        Writes rows of stats to the stats file.
+
+        :param rows: A list of rows, each a list of values of all columns.
+        :return: Nothing.
+        """
+
+        pass
+
+    def close(self):
+        """
+        Writes all buffered rows and files and closes the stats file.
+
+        :return: Nothing.
+        """
+
+        self.flush()
+
+
+class TSVStatsSink(StatsSink):
+    """
+    Writes stats to a tab separated stats.tsv file.
+    """
+
+    def __init__(self, file_path, columns, flush_interval, flush_rows,
+                 append=False):
+        """
+        :param file_path: The folder of the stats file.
+        :param columns: The names of all stats, in the order of the columns.
+        :param flush_interval: The number of seconds after which buffered
+        rows and files are written.
+        :param flush_rows: The number of buffered rows and files which are
+        written at once.
+        :param append: A boolean flag to append rows to an existing stats
+        file. Otherwise, a new file is started with a header.
+        """
+
+        super().__init__(columns, flush_interval, flush_rows)
+
+        self.savefile = open(path.join(file_path, "stats.tsv"),
+                             'a' if append else 'w')
+
+        if not append:
+            self.write_rows([columns])
+
+    def write_rows(self, rows):
+        self.savefile.write("".join("".join(str(value) + "\t" for value in row)
+                                    + "\n" for row in rows))
+        self.savefile.flush()
+
+    def close(self):
+        super().close()
+        self.savefile.close()
+
+
+class ParquetStatsSink(StatsSink):
+    """
+    Writes stats to a stats.parquet file. A parquet file is only readable
+    once its footer is written, thus all rows are kept and the file is
+    written again and replaced on each flush. Columns of numbers are stored
+    as doubles, other columns as strings. Requires pyarrow.
+    """
+
+    def __init__(self, file_path, columns, flush_interval, flush_rows,
+                 append=False):
+        """
+        :param file_path: The folder of the stats file.
+        :param columns: The names of all stats, in the order of the columns.
+        :param flush_interval: The number of seconds after which buffered
+        rows and files are written.
+        :param flush_rows: The number of buffered rows and files which are
+        written at once.
+        :param append: A boolean flag to keep the rows of an existing stats
+        file.
+        """
+
+        try:
+            import pyarrow
+            import pyarrow.parquet
+
+        except ImportError:
+            s = "utilities.stats.stats_sink.ParquetStatsSink\n" \
+                "Error: pyarrow is required to save stats in parquet format."
+            raise Exception(s)
+
+        super().__init__(columns, flush_interval, flush_rows)
+
+        self.pa, self.pq = pyarrow, pyarrow.parquet
+        self.filename = path.join(file_path, "stats.parquet")
+
+        # All rows written so far, None before the first flush.
+        self.table = None
+
+        if append and path.isfile(self.filename):
+            # Keep the rows of the existing file.
+            self.table = self.pq.read_table(self.filename)
+
+    def write_rows(self, rows):
+        columns = list(zip(*rows))
+
+        if self.table is None:
+            # Columns of numbers are doubles, others are strings.
+            schema = self.pa.schema(
+                [(name, self.pa.float64() if all(
+                    isinstance(value, Number) for value in column) else
+                  self.pa.string()) for name, column in
+                 zip(self.columns, columns)])
+
+        else:
+            schema = self.table.schema
+
+        arrays = []
+        for column, field in zip(columns, schema):
+            if field.type == self.pa.float64():
+                values = [float(value) if isinstance(value, Number) else None
+                          for value in column]
+            else:
+                values = [None if value is None else str(value) for value in
+                          column]
+            arrays.append(self.pa.array(values, type=field.type))
+
+        table = self.pa.Table.from_arrays(arrays, schema=schema)
+        self.table = table if self.table is None else \
+            self.pa.concat_tables([self.table, table])
+
+        # Replace the file at once, it stays readable if the run is killed.
+        self.pq.write_table(self.table, self.filename + ".tmp")
+        replace(self.filename + ".tmp", self.filename)
+
+
+def read_stats(file_path):
+    """
+    Reads the stats of a run from its stats.parquet or stats.tsv file.
+
+    :param file_path: The folder of the run.
+    :return: A dictionary of the list of values of each stat. Values of the
+    stats.tsv file are converted to floats where possible.
+    """
+
+    filename = path.join(file_path, "stats.parquet")
+
+    if path.isfile(filename):
+        import pyarrow.parquet
+
+        return pyarrow.parquet.read_table(filename).to_pydict()
+
+    with open(path.join(file_path, "stats.tsv"), newline='') as statsfile:
+        reader = csv.reader(statsfile, delimiter="\t",
+                            quoting=csv.QUOTE_NONE)
+
+        # Rows end with a tab, drop the empty last column.
+        columns = [column for column in next(reader) if column]
+        stats = {column: [] for column in columns}
+
+        for row in reader:
+            for column, value in zip(columns, row):
+                try:
+                    value = float(value)
+
+                except ValueError:
+                    pass
+
+                stats[column].append(value)
+
+    return stats
@@ -286,7 +286,7 @@ class ConcurrentTests(TestBase):
         self.validate_database()
 
     def do_work(self, id: int):
-        s_time = time.clock()
+        s_time = time.perf_counter()
         db = Database(self.__db_file)
         with db.new_experiment() as experiment:
             experiment["in_runnerId"] = id
@@ -295,7 +295,7 @@ class ConcurrentTests(TestBase):
                 iter = experiment.new_child_data_set("iterations")
                 iter["generation"] = i
                 iter["bestFitness"] = 1.0 / (1.0 + i)
-                iter["timeElapsed"] = (time.clock() - s_time)
+                iter["timeElapsed"] = (time.perf_counter() - s_time)
                 # data is saved on exit from "with" statement
 
                 # db.__exit__(None, None, None) # DO NOT uncomment, simulate that process still uses the file
@@ -325,5 +325,101 @@ class ConcurrentTests(TestBase):
         os.remove(self.__db_file)
 
 
+
+class WriteBehindTests(TestBase):
+    def setUp(self):
+        self.__db_file = self._get_temp_file()
+
+    def test_save(self):
+        with Database(self.__db_file, write_behind=True) as db:
+            with db.new_experiment() as experiment:
+                experiment["in_Problem"] = "Keijzer04"
+                experiment.save()
+                self.assertGreaterEqual(experiment.id, 0)  # waits for the write-behind thread
+
+                for i in range(0, 10):
+                    with experiment.new_child_data_set("iterations") as iteration:
+                        iteration["generation"] = i
+                        iteration["bestFitness"] = float("nan") if i == 0 else 1.0 / i
+                        if i == 5:
+                            iteration["Extra"] = "extra"
+
+                experiment["out_TotalTime"] = 2222
+
+            db.flush()
+            rows = db.engine.execute("SELECT * FROM experiments").fetchall()
+            self.assertEqual(1, len(rows))
+            self.assertEqual("Keijzer04", rows[0]["in_Problem"])
+            self.assertEqual(2222, rows[0]["out_TotalTime"])
+
+            rows = db.engine.execute("SELECT * FROM iterations ORDER BY id").fetchall()
+            self.assertEqual(list(range(0, 10)), [row["generation"] for row in rows])
+            self.assertEqual([experiment_id[0] for experiment_id in db.engine.execute("SELECT id FROM experiments")] * 10,
+                             [row["parent"] for row in rows])
+            self.assertIsNone(rows[0]["bestFitness"])
+            self.assertEqual(0.5, rows[2]["bestFitness"])
+            self.assertEqual(["extra" if i == 5 else None for i in range(0, 10)], [row["extra"] for row in rows])
+
+    def test_save_of_unsaved_parent(self):
+        with Database(self.__db_file, write_behind=True) as db:
+            experiment = db.new_experiment()
+            iteration = experiment.new_child_data_set("iterations")
+            iteration["generation"] = 1
+            iteration.save()
+            self.assertGreaterEqual(iteration.id, 0)
+            self.assertGreaterEqual(experiment.id, 0)
+
+            # saving again updates the rows
+            iteration["generation"] = 2
+            experiment.save()
+            db.flush()
+            rows = db.engine.execute("SELECT * FROM iterations").fetchall()
+            self.assertEqual([(iteration.id, experiment.id, 2)], [tuple(row) for row in rows])
+
+    def test_save_does_not_block(self):
+        with Database(self.__db_file, write_behind=True) as db, Database(self.__db_file) as other:
+            # another writer holds the write lock of the file
+            other.engine.begin_transaction(immediate=True)
+
+            experiment = db.new_experiment()
+            start = time.perf_counter()
+            for i in range(0, 100):
+                with experiment.new_child_data_set("iterations") as iteration:
+                    iteration["generation"] = i
+            self.assertLess(time.perf_counter() - start, 1.0)
+
+            other.engine.commit()
+            db.flush()
+            self.assertEqual(100, db.engine.execute("SELECT count(*) FROM iterations").fetchone()[0])
+
+    def test_concurrent_writers(self):
+        dbs = [Database(self.__db_file, write_behind=i % 2 == 0) for i in range(0, 4)]
+        experiments = [db.new_experiment() for db in dbs]
+        for i in range(0, 50):
+            for experiment in experiments:
+                with experiment.new_child_data_set("iterations") as iteration:
+                    iteration["generation"] = i
+        for experiment, db in zip(experiments, dbs):
+            experiment.__exit__(None, None, None)
+            db.__exit__(None, None, None)
+
+        with Database(self.__db_file) as db:
+            rows = db.engine.execute("SELECT parent, count(*), count(DISTINCT generation) FROM iterations GROUP BY parent").fetchall()
+            self.assertEqual([(50, 50)] * 4, [(row[1], row[2]) for row in rows])
+            self.assertEqual(4, db.engine.execute("SELECT count(*) FROM experiments").fetchone()[0])
+
+    def test_error(self):
+        db = Database(self.__db_file, write_behind=True)
+        experiment = db.new_experiment()
+        experiment["value"] = object()  # not supported by sqlite
+        experiment.save()
+        with self.assertRaises(DatabaseException):
+            db.flush()
+        db.__exit__(None, None, None)
+
+    def tearDown(self):
+        os.remove(self.__db_file)
+
+
 if __name__ == '__main__':
     unittest.main()
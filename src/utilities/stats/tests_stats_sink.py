@@ -0,0 +1,81 @@
+import os, sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stats_sink import ParquetStatsSink, StatsSink, TSVStatsSink, read_stats
+
+
+class StatsSinkTests(unittest.TestCase):
+    rows = [{"gen": gen, "best_fitness": 1.5 / (gen + 1), "time_taken": 0.25} for gen in range(5)]
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _write(self, sink_class, **kwargs):
+        sink = sink_class(self.dir.name, sorted(self.rows[0]), flush_interval=3600, flush_rows=10, **kwargs)
+        for row in self.rows:
+            sink.write(row)
+        sink.close()
+
+    def test_tsv_format(self):
+        self._write(TSVStatsSink)
+        with open(os.path.join(self.dir.name, "stats.tsv")) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(lines[0], "best_fitness\tgen\ttime_taken\t")
+        self.assertEqual(lines[1], "1.5\t0\t0.25\t")
+        self.assertEqual(len(lines), len(self.rows) + 1)
+
+    def test_tsv_append(self):
+        self._write(TSVStatsSink)
+        self._write(TSVStatsSink, append=True)
+        stats = read_stats(self.dir.name)
+        self.assertEqual(stats["gen"], [float(row["gen"]) for row in self.rows] * 2)
+        self.assertEqual(stats["best_fitness"], [row["best_fitness"] for row in self.rows] * 2)
+
+    def test_flush_policy(self):
+        sink = TSVStatsSink(self.dir.name, sorted(self.rows[0]), flush_interval=3600, flush_rows=2)
+        file = os.path.join(self.dir.name, "best.txt")
+        sink.write(self.rows[0])
+        sink.write_file(file, "best")
+        self.assertEqual(sink.rows, [])
+        self.assertTrue(os.path.isfile(file))
+        sink.write(self.rows[1])
+        self.assertEqual(len(read_stats(self.dir.name)["gen"]), 1)
+        sink.close()
+        self.assertEqual(len(read_stats(self.dir.name)["gen"]), 2)
+
+    def test_abstract(self):
+        self.assertRaises(TypeError, StatsSink, sorted(self.rows[0]), 3600, 10)
+
+    def test_parquet(self):
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        self._write(ParquetStatsSink)
+        self._write(ParquetStatsSink, append=True)
+        stats = read_stats(self.dir.name)
+        self.assertEqual(stats["gen"], [float(row["gen"]) for row in self.rows] * 2)
+        self.assertEqual(stats["best_fitness"], [row["best_fitness"] for row in self.rows] * 2)
+
+    def test_parquet_killed_run(self):
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        # The stats file is readable after each flush, a run resumes from it without closing the sink.
+        sink = ParquetStatsSink(self.dir.name, sorted(self.rows[0]), flush_interval=3600, flush_rows=2)
+        for row in self.rows:
+            sink.write(row)
+        self.assertEqual(read_stats(self.dir.name)["gen"], [0.0, 1.0, 2.0, 3.0])
+        self._write(ParquetStatsSink, append=True)
+        self.assertEqual(read_stats(self.dir.name)["gen"], [0.0, 1.0, 2.0, 3.0] + [float(row["gen"]) for row in self.rows])
+        self.assertEqual(os.listdir(self.dir.name), ["stats.parquet"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -27,3 +27,7 @@ stats_list = []
 
 best_ever = None
 # Store the best ever individual here.
+
+stats_sink = None
+# The sink which buffers the stats and best individuals of the current run and
+# writes them to files.